@@ -1,10 +1,25 @@
 """Slide AI Backgrounds - Pluggable AI-powered slide background generator."""
 
+import importlib
+
 __version__ = "0.1.0"
 __author__ = "Your Name"
 __email__ = "your.email@example.com"
 
-from .processors import SlideInfo, process_titles, process_file, generate_images
-from .utils import create_provider
+# Imported on first use, so the CLI starts without loading aiohttp, Pillow or PyYAML
+_EXPORTS = {
+    "SlideInfo": ".processors",
+    "process_titles": ".processors",
+    "process_file": ".processors",
+    "stream_slides": ".processors",
+    "generate_images": ".processors",
+    "create_provider": ".utils",
+}
+
+__all__ = ["SlideInfo", "process_titles", "process_file", "stream_slides", "generate_images", "create_provider"]
+
 
-__all__ = ["SlideInfo", "process_titles", "process_file", "generate_images", "create_provider"]
\ No newline at end of file
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,254 @@
+"""Offline benchmark of the generation pipeline using mock providers."""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from . import __version__
+from .processors import DirectoryConfig, SlideInfo, generate_images
+from .processors.directory_generator import process_directory
+from .processors.scheduler import Scheduler
+from .processors.summary import percentile
+from .utils.config_loader import create_provider, provider_options
+from .utils.image_executor import ImageExecutor
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MODES = ("images", "directory")
+
+# Dependencies that should not be imported just to start the CLI
+HEAVY_MODULES = ("PIL", "yaml", "aiohttp", "dotenv")
+
+
+def peak_rss_mb() -> Dict[str, Optional[float]]:
+    """Peak resident set size of this process and of reaped workers."""
+    if resource is None:
+        return {"self": None, "children": None}
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1),
+    }
+
+
+def measure_startup(module: str = "slide_gen.cli", runs: int = 5) -> Dict[str, Any]:
+    """Cold import time of ``module`` in fresh interpreters, from ``-X importtime``.
+    
+    Also reports which heavy dependencies the import pulled in; the CLI
+    should load them only once a command actually needs them.
+    """
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    samples = []
+    loaded = ""
+    for _ in range(runs):
+        process = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                                 capture_output=True, text=True, check=True)
+        for line in process.stderr.splitlines():
+            # "import time: self [us] | cumulative | imported package"
+            fields = line.split("|")
+            if len(fields) == 3 and fields[2].strip() == module:
+                samples.append(int(fields[1]) / 1000)
+        loaded = process.stdout.strip()
+    return {
+        "module": module,
+        "runs": runs,
+        "import_ms": {
+            "median": round(statistics.median(samples), 1),
+            "min": round(min(samples), 1),
+            "max": round(max(samples), 1),
+        },
+        "heavy_modules_loaded": loaded.split(",") if loaded else [],
+    }
+
+
+def bench_slides(count: int) -> List[SlideInfo]:
+    return [SlideInfo(title=f"Benchmark slide {i + 1}", index=i) for i in range(count)]
+
+
+async def run_once(mode: str, slides: int, config: DirectoryConfig, workdir: Path) -> Dict[str, Any]:
+    """Generate one deck and return its timings."""
+    latencies: List[float] = []
+    started = time.perf_counter()
+
+    def on_result(result) -> None:
+        latencies.append(time.perf_counter() - started)
+
+    # Keep the pipeline's progress messages out of the JSON output
+    with contextlib.redirect_stdout(io.StringIO()):
+        if mode == "directory":
+            deck = workdir / "deck"
+            deck.mkdir()
+            (deck / "slides.md").write_text(
+                "\n\n".join(f"# {slide.title}" for slide in bench_slides(slides)), encoding="utf-8")
+            (deck / "config.yaml").write_text(
+                "prompt_provider: mock\nimage_provider: mock\n", encoding="utf-8")
+            overrides = {name: getattr(config, name) for name in (
+                "prompt_concurrency", "image_concurrency", "prompt_batch_size", "variants",
+                "image_executor", "image_workers", "cache", "max_retries")}
+            results = await process_directory(deck, overrides, on_result=on_result)
+        else:
+            options = provider_options(config)
+            async with ImageExecutor.from_config(config) as executor:
+                results = await generate_images(
+                    bench_slides(slides), create_provider("mock", options), create_provider("mock", options),
+                    workdir / "generated",
+                    scheduler=Scheduler.from_config(config),
+                    prompt_batch_size=config.prompt_batch_size,
+                    variants=config.variants,
+                    executor=executor,
+                    on_result=on_result)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "seconds": elapsed,
+        "succeeded": sum(1 for result in results if result.success),
+        "latencies": latencies,
+    }
+
+
+async def run_benchmark(mode: str, slides: int, runs: int, config: DirectoryConfig) -> Dict[str, Any]:
+    """Run ``runs`` decks of ``slides`` slides and aggregate the measurements.
+    
+    A slide's latency is the time from its deck's start until its result
+    arrives, so it includes queueing behind other slides.
+    """
+    cpu_before = os.times()
+    measurements = []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory(prefix="slide-gen-bench-") as workdir:
+            measurements.append(await run_once(mode, slides, config, Path(workdir)))
+    cpu_after = os.times()
+
+    seconds = sum(m["seconds"] for m in measurements)
+    latencies = [latency for m in measurements for latency in m["latencies"]]
+    return {
+        "mode": mode,
+        "slides": slides,
+        "runs": runs,
+        "succeeded": sum(m["succeeded"] for m in measurements),
+        "seconds": round(seconds, 4),
+        "throughput_slides_per_second": round(slides * runs / seconds, 3) if seconds else None,
+        "latency_seconds": {
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "max": round(max(latencies), 4) if latencies else None,
+        },
+        "cpu_seconds": {
+            "user": round(cpu_after.user - cpu_before.user, 3),
+            "system": round(cpu_after.system - cpu_before.system, 3),
+            "children_user": round(cpu_after.children_user - cpu_before.children_user, 3),
+            "children_system": round(cpu_after.children_system - cpu_before.children_system, 3),
+        },
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+async def bench_main(argv: List[str]) -> int:
+    """Entry point for ``slide-gen bench``."""
+    parser = argparse.ArgumentParser(
+        prog="slide-gen bench",
+        description="Benchmark the pipeline offline with mock providers and print JSON metrics"
+    )
+    parser.add_argument("--slides", type=int, default=50, help="Slides per deck (default: 50)")
+    parser.add_argument("--runs", type=int, default=3, help="Decks to generate per mode (default: 3)")
+    parser.add_argument("--mode", choices=MODES + ("all",), default="all",
+                       help="Benchmark generate_images, process_directory or both (default: all)")
+    parser.add_argument("--prompt-latency", type=float, default=0.05,
+                       help="Mean mock prompt latency in seconds (default: 0.05)")
+    parser.add_argument("--image-latency", type=float, default=0.2,
+                       help="Mean mock image latency in seconds (default: 0.2)")
+    parser.add_argument("--latency-distribution", default="lognormal",
+                       choices=("fixed", "uniform", "exponential", "lognormal"),
+                       help="Mock latency distribution (default: lognormal)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                       help="Share of mock calls failing with a 500 (default: 0)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0,
+                       help="Share of mock calls answered with a 429 (default: 0)")
+    parser.add_argument("--image-size", default="1024x1024", help="Mock image size (default: 1024x1024)")
+    parser.add_argument("--seed", default="0", help="Mock random seed (default: 0)")
+    parser.add_argument("--prompt-concurrency", type=int, default=DirectoryConfig.prompt_concurrency)
+    parser.add_argument("--image-concurrency", type=int, default=DirectoryConfig.image_concurrency)
+    parser.add_argument("--prompt-batch-size", type=int, default=DirectoryConfig.prompt_batch_size)
+    parser.add_argument("--variants", type=int, default=DirectoryConfig.variants)
+    parser.add_argument("--image-executor", default=DirectoryConfig.image_executor,
+                       choices=("process", "thread"))
+    parser.add_argument("--image-workers", type=int)
+    parser.add_argument("--startup", action="store_true",
+                       help="Only measure CLI import time and check it against --startup-budget-ms")
+    parser.add_argument("--startup-budget-ms", type=float, default=250.0,
+                       help="Fail --startup if the median import time exceeds this (default: 250)")
+    parser.add_argument("--output", "-o", help="Also write the JSON report to this file")
+    args = parser.parse_args(argv)
+    
+    if args.startup:
+        startup = measure_startup(runs=args.runs)
+        problems = []
+        if startup["import_ms"]["median"] > args.startup_budget_ms:
+            problems.append(f"import took {startup['import_ms']['median']}ms, "
+                            f"budget is {args.startup_budget_ms:g}ms")
+        if startup["heavy_modules_loaded"]:
+            problems.append(f"import loaded {', '.join(startup['heavy_modules_loaded'])}")
+        startup["budget_ms"] = args.startup_budget_ms
+        startup["ok"] = not problems
+        write_report(startup, args.output)
+        for problem in problems:
+            print(f"Startup budget exceeded: {problem}", file=sys.stderr)
+        return 1 if problems else 0
+
+    # The mock provider reads its behaviour from the environment like the real ones
+    os.environ.update({
+        "MOCK_PROMPT_LATENCY": str(args.prompt_latency),
+        "MOCK_IMAGE_LATENCY": str(args.image_latency),
+        "MOCK_LATENCY_DISTRIBUTION": args.latency_distribution,
+        "MOCK_ERROR_RATE": str(args.error_rate),
+        "MOCK_RATE_LIMIT_RATE": str(args.rate_limit_rate),
+        "MOCK_IMAGE_SIZE": args.image_size,
+        "MOCK_SEED": args.seed,
+    })
+    config = DirectoryConfig(
+        prompt_provider="mock",
+        image_provider="mock",
+        prompt_concurrency=args.prompt_concurrency,
+        image_concurrency=args.image_concurrency,
+        prompt_batch_size=args.prompt_batch_size,
+        variants=args.variants,
+        image_executor=args.image_executor,
+        image_workers=args.image_workers,
+        cache=False,
+    )
+
+    modes = MODES if args.mode == "all" else (args.mode,)
+    report = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "settings": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": [await run_benchmark(mode, args.slides, args.runs, config) for mode in modes],
+    }
+
+    write_report(report, args.output)
+    return 0
+
+
+def write_report(report: Dict[str, Any], output: Optional[str] = None) -> None:
+    """Print the JSON report and optionally save it."""
+    text = json.dumps(report, indent=2)
+    print(text)
+    if output:
+        Path(output).write_text(text + "\n", encoding="utf-8")
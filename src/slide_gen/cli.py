@@ -2,15 +2,126 @@
 
 import asyncio
 import argparse
+import sys
+import time
 from pathlib import Path
 
-from .utils.config_loader import create_provider
-from .processors import process_titles, process_file, generate_images
-from .processors.directory_generator import process_directory
+from .utils.config_loader import create_provider, load_environment, provider_options
+from .utils.file_utils import OUTPUT_FORMATS
+from .utils.image_executor import EXECUTOR_MODES
+from .telemetry import create_telemetry, set_telemetry
+
+
+def print_result(result) -> None:
+    """Print one slide's outcome as soon as it completes."""
+    if result.success:
+        print(f"✓ {result.slide.title}: {result.image_path}")
+    else:
+        print(f"✗ {result.slide.title}: {result.error}")
+
+
+def add_generation_options(parser: argparse.ArgumentParser) -> None:
+    """Add the provider, scheduling, cache and output flags shared by every mode."""
+    # Provider options
+    parser.add_argument("--prompt-provider", default="ollama",
+                       help="AI provider for prompts: openai, gemini, ollama, lmstudio or mock; "
+                            "comma-separate several for failover (default: ollama)")
+    parser.add_argument("--image-provider", default="openai",
+                       help="AI provider for images: openai, gemini or mock; "
+                            "comma-separate several for failover (default: openai)")
+    
+    # Scheduling options (override config.yaml in directory mode)
+    parser.add_argument("--prompt-concurrency", type=int,
+                       help="Max concurrent prompt requests (default: 8)")
+    parser.add_argument("--image-concurrency", type=int,
+                       help="Max concurrent image requests (default: 4)")
+    parser.add_argument("--prompt-rpm", type=int,
+                       help="Max prompt requests per minute (default: unlimited)")
+    parser.add_argument("--image-rpm", type=int,
+                       help="Max image requests per minute (default: unlimited)")
+    parser.add_argument("--prompt-batch-size", type=int,
+                       help="Slide titles per prompt request on OpenAI/Gemini (default: 1)")
+    parser.add_argument("--max-retries", type=int,
+                       help="Retries per request for transient failures (default: 3)")
+    parser.add_argument("--stream-prompts", action="store_true",
+                       help="Stream prompts from Ollama, LM Studio and OpenAI, stopping at the first "
+                            "complete one")
+    parser.add_argument("--prompt-time-cap", type=float, metavar="SECONDS",
+                       help="With --stream-prompts, stop reading a prompt after this long and keep "
+                            "what arrived")
+    
+    # Cache options
+    parser.add_argument("--no-cache", action="store_true",
+                       help="Disable the prompt and image cache")
+    parser.add_argument("--refresh", action="store_true",
+                       help="Ignore cached entries and regenerate, updating the cache")
+    
+    # Output
+    parser.add_argument("--variants", type=int,
+                       help="Candidate images to generate per slide (default: 1)")
+    parser.add_argument("--format", dest="output_format", choices=list(OUTPUT_FORMATS),
+                       help="Image file format (default: png)")
+    parser.add_argument("--quality", dest="output_quality", type=int,
+                       help="WebP/JPEG/AVIF quality, 1-100")
+    parser.add_argument("--compress-level", dest="png_compress_level", type=int,
+                       choices=range(10), metavar="0-9",
+                       help="PNG compression level (default: 6)")
+    parser.add_argument("--renditions", type=lambda value: [int(w) for w in value.split(",")],
+                       help="Extra image widths to write, e.g. 1920,1280,640")
+    parser.add_argument("--thumbnail-width", type=int,
+                       help="Also write a thumbnail of each slide at this width")
+    parser.add_argument("--unique-filenames", action="store_true",
+                       help="Give repeated slide titles their own image file (Title-2.png)")
+    parser.add_argument("--image-executor", choices=EXECUTOR_MODES,
+                       help="Run image conversion in a process or thread pool (default: process)")
+    parser.add_argument("--image-workers", type=int,
+                       help="Image conversion workers (default: available cores)")
+    parser.add_argument("--preflight", action="store_true",
+                       help="Probe providers before generating and skip unavailable ones")
+    
+    # Telemetry (off unless an exporter is set)
+    parser.add_argument("--metrics-file", metavar="PATH",
+                       help="Write Prometheus metrics to this file")
+    parser.add_argument("--trace-file", metavar="PATH",
+                       help="Append OTLP/JSON spans to this file, one per line")
+    parser.add_argument("--otlp-endpoint", metavar="URL",
+                       help="Send spans to an OTLP/HTTP collector, e.g. http://localhost:4318 "
+                            "(default: $OTEL_EXPORTER_OTLP_ENDPOINT)")
+
+
+def config_overrides(args: argparse.Namespace) -> dict:
+    """Config values set on the command line, which override config.yaml."""
+    overrides = {
+        name: getattr(args, name)
+        for name in ("prompt_concurrency", "image_concurrency", "prompt_rpm", "image_rpm",
+                     "prompt_batch_size", "max_retries", "variants", "prompt_time_cap",
+                     "image_executor", "image_workers",
+                     "output_format", "output_quality", "png_compress_level",
+                     "renditions", "thumbnail_width")
+        if getattr(args, name) is not None
+    }
+    if args.no_cache:
+        overrides["cache"] = False
+    if args.refresh:
+        overrides["cache_refresh"] = True
+    if args.unique_filenames:
+        overrides["unique_filenames"] = True
+    if args.preflight:
+        overrides["preflight"] = True
+    if args.stream_prompts:
+        overrides["stream_prompts"] = True
+    return overrides
 
 
 async def main():
     """Main CLI entry point."""
+    if sys.argv[1:2] == ["serve"]:
+        from .server import serve_main
+        return await serve_main(sys.argv[2:])
+    if sys.argv[1:2] == ["bench"]:
+        from .bench import bench_main
+        return await bench_main(sys.argv[2:])
+    
     parser = argparse.ArgumentParser(
         description="Generate AI-powered background images for slides"
     )
@@ -20,37 +131,73 @@ async def main():
     input_group.add_argument("--file", "-f", help="Path to slide file")
     input_group.add_argument("--titles", "-t", nargs="+", help="List of slide titles")
     input_group.add_argument("--directory", "-d", help="Directory with slides.md and config.yaml")
+    input_group.add_argument("--directories", nargs="+", metavar="PATTERN",
+                            help="Deck directories or glob patterns (e.g. 'talks/*') "
+                                 "to process through one shared worker pool")
     
-    # Provider options
-    parser.add_argument("--prompt-provider", default="ollama", 
-                       choices=["openai", "gemini", "ollama", "lmstudio"],
-                       help="AI provider for prompts (default: ollama)")
-    parser.add_argument("--image-provider", default="openai",
-                       choices=["openai", "gemini"],
-                       help="AI provider for images (default: openai)")
-    
-    # Output
+    add_generation_options(parser)
     parser.add_argument("--output", "-o", default="generated", help="Output directory")
+    parser.add_argument("--deck-concurrency", type=int, default=8,
+                       help="Decks processed at once with --directories (default: 8)")
+    parser.add_argument("--summary-json", metavar="PATH",
+                       help="Write the run's timing, token, byte and cost summary as JSON")
     
     # Utility options
     parser.add_argument("--health-check", action="store_true", 
-                       help="Check provider health")
+                       help="Probe the prompt and image providers and report latency and models")
+    parser.add_argument("--health-timeout", type=float, default=10.0,
+                       help="Seconds to wait for health check answers (default: 10)")
     
     args = parser.parse_args()
+    load_environment()
+    
+    telemetry = set_telemetry(create_telemetry(args.metrics_file, args.trace_file, args.otlp_endpoint))
+    telemetry.start()
+    try:
+        return await run(args)
+    finally:
+        await telemetry.close()
+
+
+async def run(args: argparse.Namespace) -> int:
+    """Run the generation mode chosen on the command line."""
+    # Imported here so --help and argument errors don't pay for aiohttp, Pillow and PyYAML
+    from .processors import process_titles, stream_slides, generate_images, Scheduler, DirectoryConfig
+    from .processors.directory_generator import process_directory, process_directories
+    from .processors.directory_processor import find_deck_directories, format_cost
+    from .processors.summary import run_summary, write_summary_json
+    from .providers.health import chain_members, format_report, preflight_providers, probe_all
+    from .utils.cache import GenerationCache
+    from .utils.file_utils import EncodeOptions
+    from .utils.image_executor import ImageExecutor
+    from .utils.renditions import RenditionOptions
+    
+    overrides = config_overrides(args)
+    run_config = DirectoryConfig(**overrides)
     
     # Handle health check
     if args.health_check:
         try:
             prompt_provider = create_provider(args.prompt_provider)
             image_provider = create_provider(args.image_provider)
-            
-            print(f"✓ {args.prompt_provider} provider: OK")
-            print(f"✓ {args.image_provider} provider: OK")
         except Exception as e:
             print(f"✗ Provider error: {e}")
             return 1
+        
+        async with prompt_provider, image_provider:
+            reports = await probe_all([prompt_provider, image_provider], args.health_timeout)
+        for report in reports:
+            print(format_report(report))
+        
+        # Each stage needs at least one healthy provider in its chain
+        healthy = {report.provider for report in reports if report.healthy}
+        for provider in (prompt_provider, image_provider):
+            if not any(member.name in healthy for member in chain_members(provider)):
+                return 1
         return 0
     
+    started = time.perf_counter()
+    
     # Process input
     if args.directory:
         # Directory-based workflow
@@ -60,11 +207,34 @@ async def main():
             return 1
         
         try:
-            results = await process_directory(directory)
+            results = await process_directory(directory, overrides=overrides,
+                                              on_result=print_result)
         except Exception as e:
             print(f"Error processing directory: {e}")
             return 1
             
+    elif args.directories:
+        # Many decks sharing one set of providers, limits and workers
+        directories = find_deck_directories(args.directories)
+        if not directories:
+            print("Error: No directories with slides.md found")
+            return 1
+        
+        print(f"Processing {len(directories)} decks...")
+        deck_results = await process_directories(directories, overrides=overrides,
+                                                 on_result=print_result,
+                                                 deck_concurrency=args.deck_concurrency)
+        
+        print("\nDecks:")
+        for deck in deck_results:
+            if deck.error:
+                print(f"✗ {deck.directory}: {deck.error}")
+            else:
+                succeeded = sum(1 for r in deck.results if r.success)
+                print(f"{'✓' if succeeded == len(deck.results) else '✗'} {deck.directory}: "
+                      f"{succeeded}/{len(deck.results)} successful")
+        results = [result for deck in deck_results for result in deck.results]
+        
     elif args.titles:
         slides = process_titles(args.titles)
         if not slides:
@@ -75,49 +245,78 @@ async def main():
         
         # Create providers
         try:
-            prompt_provider = create_provider(args.prompt_provider)
-            image_provider = create_provider(args.image_provider)
+            options = provider_options(run_config)
+            prompt_provider = create_provider(args.prompt_provider, options)
+            image_provider = create_provider(args.image_provider, options)
+            if run_config.preflight:
+                await preflight_providers([prompt_provider, image_provider], run_config.preflight_timeout)
         except Exception as e:
             print(f"Error creating providers: {e}")
             return 1
         
         # Generate images
         output_dir = Path(args.output)
-        results = await generate_images(slides, prompt_provider, image_provider, output_dir)
+        async with ImageExecutor.from_config(run_config) as executor:
+            results = await generate_images(slides, prompt_provider, image_provider, output_dir,
+                                            scheduler=Scheduler.from_config(run_config),
+                                            cache=GenerationCache.from_config(run_config),
+                                            prompt_batch_size=run_config.prompt_batch_size,
+                                            variants=run_config.variants,
+                                            executor=executor,
+                                            encode=EncodeOptions.from_config(run_config),
+                                            renditions=RenditionOptions.from_config(run_config),
+                                            unique_filenames=run_config.unique_filenames,
+                                            on_result=print_result)
         
     elif args.file:
-        slides = process_file(Path(args.file))
-        if not slides:
-            print("Error: No slides found")
+        slide_file = Path(args.file)
+        if not slide_file.exists():
+            print(f"Error: File not found: {slide_file}")
             return 1
         
-        print(f"Processing {len(slides)} slides...")
+        # Slides are parsed as generation proceeds, so large files start generating right away
+        slides = stream_slides(slide_file)
+        print(f"Processing slides from {slide_file}...")
         
         # Create providers
         try:
-            prompt_provider = create_provider(args.prompt_provider)
-            image_provider = create_provider(args.image_provider)
+            options = provider_options(run_config)
+            prompt_provider = create_provider(args.prompt_provider, options)
+            image_provider = create_provider(args.image_provider, options)
+            if run_config.preflight:
+                await preflight_providers([prompt_provider, image_provider], run_config.preflight_timeout)
         except Exception as e:
             print(f"Error creating providers: {e}")
             return 1
         
         # Generate images
         output_dir = Path(args.output)
-        results = await generate_images(slides, prompt_provider, image_provider, output_dir)
+        async with ImageExecutor.from_config(run_config) as executor:
+            results = await generate_images(slides, prompt_provider, image_provider, output_dir,
+                                            scheduler=Scheduler.from_config(run_config),
+                                            cache=GenerationCache.from_config(run_config),
+                                            prompt_batch_size=run_config.prompt_batch_size,
+                                            variants=run_config.variants,
+                                            executor=executor,
+                                            encode=EncodeOptions.from_config(run_config),
+                                            renditions=RenditionOptions.from_config(run_config),
+                                            unique_filenames=run_config.unique_filenames,
+                                            on_result=print_result)
+        if not results:
+            print("Error: No slides found")
+            return 1
         
     else:
-        print("Error: Please provide --titles, --file, or --directory")
+        print("Error: Please provide --titles, --file, --directory or --directories")
         return 1
     
-    # Print results
+    # Print summary (individual results were printed as they completed)
     success_count = sum(1 for r in results if r.success)
     print(f"\nCompleted: {success_count}/{len(results)} successful")
-    
-    for result in results:
-        if result.success:
-            print(f"✓ {result.slide.title}: {result.image_path}")
-        else:
-            print(f"✗ {result.slide.title}: {result.error}")
+    summary = run_summary(results, time.perf_counter() - started)
+    print(f"Estimated cost: {format_cost(summary['cost_usd'])}")
+    if args.summary_json:
+        print(f"Created: {write_summary_json(Path(args.summary_json), summary)}")
     
     return 0
 
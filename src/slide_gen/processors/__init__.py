@@ -1,9 +1,13 @@
 """Processors for slide content and image generation."""
 
-from .slide_processor import SlideInfo, process_titles, process_file
+from .slide_processor import SlideInfo, process_titles, process_file, iter_slides, stream_slides
 from .image_generator import GenerationResult, generate_images
 from .directory_processor import DirectoryConfig, load_config, extract_slides_from_md, create_slides_images_md, create_generation_log
-from .directory_generator import process_directory
+from .directory_generator import process_directory, process_directories
+from .scheduler import Scheduler
+from .pipeline import stream_images
 
-__all__ = ["SlideInfo", "process_titles", "process_file", "GenerationResult", "generate_images", 
-          "DirectoryConfig", "load_config", "extract_slides_from_md", "create_slides_images_md", "create_generation_log", "process_directory"]
\ No newline at end of file
+__all__ = ["SlideInfo", "process_titles", "process_file", "iter_slides", "stream_slides", "GenerationResult", "generate_images", 
+          "DirectoryConfig", "load_config", "extract_slides_from_md", "create_slides_images_md", "create_generation_log", "process_directory",
+          "process_directories",
+          "Scheduler", "stream_images"]
\ No newline at end of file
@@ -1,98 +1,337 @@
 """Directory-based image generation workflow."""
 
 import asyncio
+import time
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import List
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
-from ..providers.base import PromptRequest, ImageRequest
-from ..utils.config_loader import create_provider
-from ..utils.file_utils import save_image, sanitize_filename
-from .slide_processor import SlideInfo
-from .image_generator import GenerationResult
-from .directory_processor import load_config, extract_slides_from_md, create_slides_images_md, create_generation_log
+from ..providers.base import AIProvider
+from ..providers.health import preflight, preflight_providers
+from ..telemetry import get_telemetry
 
+from ..utils.cache import GenerationCache
+from ..utils.config_loader import create_provider, provider_options, provider_chain
+from ..utils.file_utils import EncodeOptions
+from ..utils.image_executor import ImageExecutor
+from ..utils.renditions import Rendition, RenditionOptions, make_thumbnail_strip
+from ..utils.single_flight import SingleFlight
+from .slide_processor import SlideInfo, normalize_title
+from .image_generator import GenerationResult, generate_images
+from .directory_processor import DirectoryConfig, DeckReports, load_config, extract_slides_from_md
+from .manifest import (ManifestEntry, slide_inputs_hash, file_checksum, load_manifest,
+                       save_manifest, is_current, collect_garbage)
+from .scheduler import Scheduler
+from .summary import run_summary, write_summary_json
 
-async def process_directory(directory_path: Path) -> List[GenerationResult]:
-    """Process a directory with slides.md and config.yaml."""
+
+# Seconds over which a pool's retry budget refills
+RETRY_WINDOW = 60.0
+
+
+class DeckPool:
+    """Providers, rate limits, cache and image workers shared by many decks.
+    
+    Every deck in a batch run schedules its slides through the same lanes
+    and pooled provider sessions, so total throughput is bounded by the
+    provider quotas rather than by how many decks are in flight.
+    """
+    
+    def __init__(self, config: DirectoryConfig):
+        self.scheduler = Scheduler.from_config(config)
+        self.cache = GenerationCache.from_config(config)
+        self.executor = ImageExecutor.from_config(config)
+        # The pool may outlive many runs (see server.py), so its retry budget refills
+        self.options = provider_options(config, retry_window=RETRY_WINDOW)
+        self.flights = SingleFlight()
+        self.preflight_timeout = config.preflight_timeout if config.preflight else None
+        self._providers: Dict[Tuple[str, ...], asyncio.Future] = {}
+        self._stack = AsyncExitStack()
+    
+    async def provider(self, name: Union[str, List[str]]) -> AIProvider:
+        """Return the shared provider for a name or chain, opening its session on first use.
+        
+        With pre-flight checks on, a provider is probed once when first
+        opened; every deck asking for it waits for the same probe.
+        """
+        key = tuple(provider_chain(name))
+        if key not in self._providers:
+            self._providers[key] = asyncio.ensure_future(self._open(list(key)))
+        opening = self._providers[key]
+        try:
+            return await asyncio.shield(opening)
+        except Exception:
+            # Let a later deck or job try again, e.g. once the provider is back
+            if self._providers.get(key) is opening:
+                del self._providers[key]
+            raise
+    
+    async def _open(self, names: List[str]) -> AIProvider:
+        provider = create_provider(names, self.options)
+        await provider.__aenter__()
+        if self.preflight_timeout is not None:
+            try:
+                await preflight(provider, self.preflight_timeout)
+            except BaseException:
+                await provider.__aexit__(None, None, None)
+                raise
+        self._stack.push_async_exit(provider)
+        return provider
+    
+    async def __aenter__(self) -> "DeckPool":
+        return self
     
-    # Load configuration
-    config = load_config(directory_path)
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+    
+    async def close(self) -> None:
+        """Close every provider session and release the image workers."""
+        try:
+            await self._stack.aclose()
+        finally:
+            await self.executor.shutdown()
+
+
+@dataclass
+class DeckResult:
+    """Outcome of one deck in a batch run."""
+    directory: Path
+    results: List[GenerationResult] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+async def process_directories(directories: List[Path],
+                              overrides: Optional[Dict[str, Any]] = None,
+                              on_result: Optional[Callable[[GenerationResult], None]] = None,
+                              deck_concurrency: int = 8) -> List[DeckResult]:
+    """Process many deck directories through one shared DeckPool.
+    
+    Pool-wide settings (concurrency, rate limits, cache, retries, image
+    workers) come from ``overrides`` and the defaults; each deck's
+    config.yaml still sets its theme, style, providers and output options.
+    Up to ``deck_concurrency`` decks are in flight at once. A deck that
+    fails is reported in its DeckResult without stopping the others.
+    """
+    overrides = overrides or {}
+    decks = asyncio.Semaphore(deck_concurrency)
+    
+    async with DeckPool(DirectoryConfig(**overrides)) as pool:
+        async def run_deck(directory: Path) -> DeckResult:
+            async with decks:
+                try:
+                    results = await process_directory(directory, overrides, on_result, pool=pool)
+                except Exception as e:
+                    print(f"Error processing {directory}: {e}")
+                    return DeckResult(directory, error=str(e))
+                return DeckResult(directory, results)
+        
+        return list(await asyncio.gather(*(run_deck(directory) for directory in directories)))
+
+
+async def process_directory(directory_path: Path,
+                            overrides: Optional[Dict[str, Any]] = None,
+                            on_result: Optional[Callable[[GenerationResult], None]] = None,
+                            pool: Optional[DeckPool] = None) -> List[GenerationResult]:
+    """Process a directory with slides.md and config.yaml.
+    
+    Slides whose inputs are unchanged since the last run (per the manifest)
+    keep their existing image; only new or changed slides are generated.
+    ``overrides`` replaces individual config.yaml values, e.g. from CLI flags,
+    and ``on_result`` is called as each slide completes. With a ``pool``,
+    providers, limits, cache and image workers are shared with other decks.
+    """
+    started = time.perf_counter()
+    
+    # Load configuration (file reads run off the event loop)
+    config = await asyncio.to_thread(load_config, directory_path)
+    if overrides:
+        config = replace(config, **overrides)
     print(f"Using theme: {config.theme}")
     print(f"Using style: {config.style}")
     
     # Extract slides
-    slides = extract_slides_from_md(directory_path)
+    slides = await asyncio.to_thread(extract_slides_from_md, directory_path)
     print(f"Found {len(slides)} slides")
     
-    # Create providers
-    prompt_provider = create_provider(config.prompt_provider)
-    image_provider = create_provider(config.image_provider)
-    
-    # Generate images
-    results = await generate_images_with_config(
-        slides, 
-        prompt_provider, 
-        image_provider, 
-        directory_path,
-        config
-    )
+    # Create providers sharing one retry budget for the run
+    if pool is not None:
+        prompt_provider = await pool.provider(config.prompt_provider)
+        image_provider = await pool.provider(config.image_provider)
+    else:
+        options = provider_options(config)
+        prompt_provider = create_provider(config.prompt_provider, options)
+        image_provider = create_provider(config.image_provider, options)
+        if config.preflight:
+            await preflight_providers([prompt_provider, image_provider], config.preflight_timeout)
     
-    # Create slides-images.md
-    images_file = create_slides_images_md(directory_path, results)
-    print(f"Created: {images_file}")
+    # Diff slides against the manifest from the previous run
+    previous = await asyncio.to_thread(load_manifest, directory_path)
+    inputs_hashes = {}
+    occurrences: Dict[str, int] = {}
+    for slide in slides:
+        # With unique filenames, each repeat of a title has its own image
+        title = normalize_title(slide.title)
+        occurrences[title] = occurrences.get(title, 0) + 1
+        occurrence = occurrences[title] if config.unique_filenames else 1
+        inputs_hashes[slide.index] = slide_inputs_hash(slide, config, prompt_provider, image_provider,
+                                                       occurrence)
+    # Checking an entry hashes its image, so it is done in a thread too
+    current = set() if config.cache_refresh else await asyncio.to_thread(
+        lambda: {inputs_hash for inputs_hash in inputs_hashes.values()
+                 if inputs_hash in previous and is_current(directory_path, previous[inputs_hash])})
+    reused = []
+    pending = []
+    for slide in slides:
+        inputs_hash = inputs_hashes[slide.index]
+        if inputs_hash in current:
+            entry = previous[inputs_hash]
+            variant_paths = [directory_path / name for name in [entry.image] + entry.variants]
+            renditions = [Rendition(width, directory_path / name)
+                          for name, width in entry.renditions.items()]
+            reused.append(GenerationResult(slide, True, variant_paths[0],
+                                           prompt=entry.prompt,
+                                           theme=config.theme,
+                                           style=config.style,
+                                           variant_paths=variant_paths,
+                                           renditions=renditions,
+                                           thumbnail_path=(directory_path / entry.thumbnail
+                                                           if entry.thumbnail else None)))
+        else:
+            pending.append(slide)
     
-    # Create generation log
-    log_file = create_generation_log(directory_path, results, config)
+    # Reports are written slide by slide as results arrive
+    reports = await DeckReports(directory_path, config, slides).open()
+    
+    def report(result: GenerationResult) -> None:
+        reports.add(result)
+        if on_result:
+            on_result(result)
+    
+    try:
+        if reused:
+            print(f"Unchanged: {len(reused)} slides, generating {len(pending)}")
+            for result in reused:
+                report(result)
+        
+        # Generate images, reusing one pooled session per provider for the run
+        generated = []
+        if pending:
+            with get_telemetry().span("deck", directory=str(directory_path), slides=len(pending)):
+                async with prompt_provider, image_provider:
+                    generated = await generate_images_with_config(
+                        pending, 
+                        prompt_provider, 
+                        image_provider, 
+                        directory_path,
+                        config,
+                        on_result=report,
+                        pool=pool,
+                        reserved_stems=[result.image_path.stem for result in reused]
+                    )
+        
+        results = sorted(reused + list(generated), key=lambda r: r.slide.index)
+        
+        # Record the combined state and drop images nothing refers to anymore
+        removed = await asyncio.to_thread(update_manifest, directory_path, results, inputs_hashes, previous)
+        for path in removed:
+            print(f"Removed: {path}")
+        
+        # Lay the slide thumbnails out in one strip
+        thumbnail_strip = None
+        thumbnails = [result.thumbnail_path for result in results if result.thumbnail_path]
+        if thumbnails:
+            encode = EncodeOptions.from_config(config)
+            thumbnail_strip = await asyncio.to_thread(
+                make_thumbnail_strip, thumbnails, directory_path / f"thumbnails{encode.extension}", encode)
+            print(f"Created: {thumbnail_strip}")
+    except BaseException:
+        await reports.discard()
+        raise
+    
+    # Put slides-images.md and the generation log in place, plus a machine-readable summary
+    summary = run_summary(results, time.perf_counter() - started)
+    images_file, log_file = await reports.finish(results, summary, thumbnail_strip)
+    print(f"Created: {images_file}")
     print(f"Created: {log_file}")
+    summary_file = await asyncio.to_thread(
+        write_summary_json, directory_path / "generation-summary.json", summary)
+    print(f"Created: {summary_file}")
     
     return results
 
 
+def update_manifest(directory: Path, results: List[GenerationResult], inputs_hashes: Dict[int, str],
+                    previous: Dict[str, ManifestEntry]) -> List[Path]:
+    """Save the manifest for a run's results and delete files no entry refers to anymore.
+    
+    A slide that failed keeps its entry from the last run, so its previous
+    image is neither forgotten nor deleted; only files of slides that were
+    replaced or removed from the deck are collected.
+    """
+    entries = []
+    for result in results:
+        if result.success:
+            entries.append(ManifestEntry(
+                title=result.slide.title,
+                inputs_hash=inputs_hashes[result.slide.index],
+                prompt=result.prompt or "",
+                image=result.image_path.name,
+                checksum=file_checksum(result.image_path),
+                variants=[path.name for path in result.variant_paths[1:]],
+                renditions={r.path.name: r.width for r in result.renditions},
+                thumbnail=result.thumbnail_path.name if result.thumbnail_path else "",
+            ))
+    
+    # Carry failed slides forward, matching on inputs first and then on title
+    carried = {entry.inputs_hash for entry in entries}
+    for result in results:
+        if result.success:
+            continue
+        entry = previous.get(inputs_hashes[result.slide.index])
+        if entry is None or entry.inputs_hash in carried:
+            entry = next((candidate for candidate in previous.values()
+                          if candidate.title == result.slide.title
+                          and candidate.inputs_hash not in carried), None)
+        if entry is not None:
+            entries.append(entry)
+            carried.add(entry.inputs_hash)
+    
+    save_manifest(directory, entries)
+    return collect_garbage(directory, previous.values(), entries)
+
+
 async def generate_images_with_config(slides: List[SlideInfo],
                                      prompt_provider,
                                      image_provider, 
                                      output_dir: Path,
-                                     config) -> List[GenerationResult]:
-    """Generate images with directory config."""
+                                     config,
+                                     on_result: Optional[Callable[[GenerationResult], None]] = None,
+                                     pool: Optional[DeckPool] = None,
+                                     reserved_stems: Iterable[str] = ()) -> List[GenerationResult]:
+    """Generate images with directory config.
     
-    async def generate_single(slide: SlideInfo) -> GenerationResult:
-        try:
-            # Generate prompt with theme/style
-            prompt_request = PromptRequest(
-                slide_title=slide.title,
-                slide_content="",
-                theme=config.theme,
-                style=config.style
-            )
-            prompt_response = await prompt_provider.generate_prompt(prompt_request)
-            
-            if not prompt_response.success:
-                return GenerationResult(slide, False, error=prompt_response.error)
-            
-            # Generate image
-            image_request = ImageRequest(prompt=prompt_response.content)
-            image_response = await image_provider.generate_image(image_request)
-            
-            if not image_response.success:
-                return GenerationResult(slide, False, error=image_response.error,
-                                       prompt=prompt_response.content,
-                                       theme=config.theme, 
-                                       style=config.style)
-            
-            # Save image in the directory
-            filename = f"{sanitize_filename(slide.title)}.png"
-            image_path = save_image(image_response.image_data, filename, output_dir)
-            
-            return GenerationResult(slide, True, image_path, 
-                                   prompt=prompt_response.content,
-                                   theme=config.theme, 
-                                   style=config.style)
-            
-        except Exception as e:
-            return GenerationResult(slide, False, error=str(e),
-                                   theme=config.theme, 
-                                   style=config.style)
-    
-    # Generate all slides
-    tasks = [generate_single(slide) for slide in slides]
-    return await asyncio.gather(*tasks)
\ No newline at end of file
+    ``reserved_stems`` are filenames of images kept from the last run.
+    """
+    settings = dict(
+        theme=config.theme,
+        style=config.style,
+        prompt_batch_size=config.prompt_batch_size,
+        variants=config.variants,
+        stream_to_disk=config.stream_to_disk,
+        on_result=on_result,
+        encode=EncodeOptions.from_config(config),
+        renditions=RenditionOptions.from_config(config),
+        unique_filenames=config.unique_filenames,
+        reserved_stems=reserved_stems,
+    )
+    if pool is not None:
+        return await generate_images(slides, prompt_provider, image_provider, output_dir,
+                                     scheduler=pool.scheduler, cache=pool.cache,
+                                     executor=pool.executor, flights=pool.flights, **settings)
+    
+    async with ImageExecutor.from_config(config) as executor:
+        return await generate_images(slides, prompt_provider, image_provider, output_dir,
+                                     scheduler=Scheduler.from_config(config),
+                                     cache=GenerationCache.from_config(config),
+                                     executor=executor, **settings)
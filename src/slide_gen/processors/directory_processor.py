@@ -1,11 +1,14 @@
 """Simple directory-based slide processing."""
 
-import yaml
+import glob
+import html
 from pathlib import Path
-from typing import Dict, Any, List
-from dataclasses import dataclass
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
+from dataclasses import dataclass, field
 
-from .slide_processor import SlideInfo, extract_markdown_headers
+from ..utils.config_loader import provider_chain
+from ..utils.text_writer import AtomicWriter, BackgroundWriter
+from .slide_processor import SlideInfo, iter_slides
 
 
 @dataclass
@@ -13,8 +16,37 @@ class DirectoryConfig:
     """Configuration from config.yaml."""
     theme: str = "professional, modern"
     style: str = "landscape photography, natural lighting"
-    prompt_provider: str = "ollama"
-    image_provider: str = "openai"
+    prompt_provider: Union[str, List[str]] = "ollama"  # a name or an ordered failover chain
+    image_provider: Union[str, List[str]] = "openai"
+    prompt_concurrency: int = 8
+    image_concurrency: int = 4
+    prompt_rpm: Optional[int] = None
+    image_rpm: Optional[int] = None
+    prompt_batch_size: int = 1
+    stream_prompts: bool = False  # read prompts token by token and stop at the first complete one
+    prompt_time_cap: Optional[float] = None  # seconds; a streamed prompt cut off here is kept as is
+    variants: int = 1
+    stream_to_disk: bool = True
+    image_executor: str = "process"  # "process" or "thread"
+    image_workers: Optional[int] = None  # defaults to the available cores
+    output_format: str = "png"  # png, webp, jpeg or avif
+    output_quality: Optional[int] = None  # WebP/JPEG/AVIF quality
+    png_compress_level: int = 6
+    png_optimize: bool = False
+    passthrough: bool = True  # keep provider bytes when they already match the format
+    renditions: List[int] = field(default_factory=list)  # extra widths, e.g. [1920, 1280, 640]
+    thumbnail_width: Optional[int] = None  # also writes a thumbnail strip of the deck
+    unique_filenames: bool = False  # repeated titles get Title-2.png copies instead of sharing
+    cache: bool = True
+    cache_dir: Optional[str] = None
+    cache_max_mb: int = 500
+    cache_refresh: bool = False
+    max_retries: int = 3
+    retry_budget: int = 100
+    breaker_threshold: int = 3
+    breaker_reset_seconds: float = 30.0
+    preflight: bool = False  # probe providers before generating and skip dead ones
+    preflight_timeout: float = 10.0
 
 
 def load_config(directory: Path) -> DirectoryConfig:
@@ -23,6 +55,8 @@ def load_config(directory: Path) -> DirectoryConfig:
     if not config_file.exists():
         return DirectoryConfig()
     
+    import yaml
+    
     with open(config_file, 'r') as f:
         data = yaml.safe_load(f) or {}
     
@@ -31,76 +65,313 @@ def load_config(directory: Path) -> DirectoryConfig:
         style=data.get('style', DirectoryConfig.style),
         prompt_provider=data.get('prompt_provider', DirectoryConfig.prompt_provider),
         image_provider=data.get('image_provider', DirectoryConfig.image_provider),
+        prompt_concurrency=data.get('prompt_concurrency', DirectoryConfig.prompt_concurrency),
+        image_concurrency=data.get('image_concurrency', DirectoryConfig.image_concurrency),
+        prompt_rpm=data.get('prompt_rpm', DirectoryConfig.prompt_rpm),
+        image_rpm=data.get('image_rpm', DirectoryConfig.image_rpm),
+        prompt_batch_size=data.get('prompt_batch_size', DirectoryConfig.prompt_batch_size),
+        stream_prompts=data.get('stream_prompts', DirectoryConfig.stream_prompts),
+        prompt_time_cap=data.get('prompt_time_cap', DirectoryConfig.prompt_time_cap),
+        variants=data.get('variants', DirectoryConfig.variants),
+        stream_to_disk=data.get('stream_to_disk', DirectoryConfig.stream_to_disk),
+        image_executor=data.get('image_executor', DirectoryConfig.image_executor),
+        image_workers=data.get('image_workers', DirectoryConfig.image_workers),
+        output_format=data.get('output_format', DirectoryConfig.output_format),
+        output_quality=data.get('output_quality', DirectoryConfig.output_quality),
+        png_compress_level=data.get('png_compress_level', DirectoryConfig.png_compress_level),
+        png_optimize=data.get('png_optimize', DirectoryConfig.png_optimize),
+        passthrough=data.get('passthrough', DirectoryConfig.passthrough),
+        renditions=data.get('renditions', []),
+        thumbnail_width=data.get('thumbnail_width', DirectoryConfig.thumbnail_width),
+        unique_filenames=data.get('unique_filenames', DirectoryConfig.unique_filenames),
+        cache=data.get('cache', DirectoryConfig.cache),
+        cache_dir=data.get('cache_dir', DirectoryConfig.cache_dir),
+        cache_max_mb=data.get('cache_max_mb', DirectoryConfig.cache_max_mb),
+        max_retries=data.get('max_retries', DirectoryConfig.max_retries),
+        retry_budget=data.get('retry_budget', DirectoryConfig.retry_budget),
+        breaker_threshold=data.get('breaker_threshold', DirectoryConfig.breaker_threshold),
+        breaker_reset_seconds=data.get('breaker_reset_seconds', DirectoryConfig.breaker_reset_seconds),
+        preflight=data.get('preflight', DirectoryConfig.preflight),
+        preflight_timeout=data.get('preflight_timeout', DirectoryConfig.preflight_timeout),
     )
 
 
+def find_deck_directories(patterns: List[str]) -> List[Path]:
+    """Find deck directories (containing slides.md) from paths or glob patterns.
+    
+    A pattern may name a deck directly, match several (``talks/*``), or
+    point at a parent directory, which is searched recursively.
+    """
+    decks = set()
+    for pattern in patterns:
+        matches = [Path(match) for match in glob.glob(pattern, recursive=True)] or [Path(pattern)]
+        for match in matches:
+            if match.is_file() and match.name == "slides.md":
+                match = match.parent
+            if not match.is_dir():
+                continue
+            if (match / "slides.md").exists():
+                decks.add(match)
+            else:
+                decks.update(slides_file.parent for slides_file in match.rglob("slides.md"))
+    return sorted(decks)
+
+
 def extract_slides_from_md(directory: Path) -> List[SlideInfo]:
     """Extract slides from slides.md file."""
     slides_file = directory / "slides.md"
     if not slides_file.exists():
         raise FileNotFoundError(f"slides.md not found in {directory}")
     
-    content = slides_file.read_text(encoding='utf-8')
-    
-    # Extract headers (# Title)
-    headers = extract_markdown_headers(content)
-    
-    return [SlideInfo(title=title.strip(), index=i) 
-            for i, title in enumerate(headers)]
+    # One slide per header (# Title)
+    return list(iter_slides(slides_file))
 
 
-def create_slides_images_md(directory: Path, results: List) -> Path:
-    """Create slides-images.md with embedded images."""
-    output_file = directory / "slides-images.md"
+def create_slides_images_md(directory: Path, results: List,
+                            thumbnail_strip: Optional[Path] = None) -> Path:
+    """Create slides-images.md with embedded images.
     
-    content = "# Slides with Generated Images\n\n"
-    
-    for result in results:
-        if result.success:
-            # Get relative image path
-            image_name = result.image_path.name
-            content += f"## {result.slide.title}\n\n"
-            content += f"![{result.slide.title}]({image_name})\n\n"
-        else:
-            content += f"## {result.slide.title}\n\n"
-            content += f"*Image generation failed: {result.error}*\n\n"
+    Slides with renditions are embedded as ``<img>`` tags with a ``srcset``
+    so browsers pick the smallest file that fits.
+    """
+    with AtomicWriter(directory / "slides-images.md") as writer:
+        writer.writelines(images_md_header(thumbnail_strip))
+        for result in results:
+            writer.writelines(images_md_section(result))
+    return writer.path
+
+
+def images_md_header(thumbnail_strip: Optional[Path] = None) -> Iterator[str]:
+    yield "# Slides with Generated Images\n\n"
+    if thumbnail_strip:
+        yield f"![Thumbnails]({thumbnail_strip.name})\n\n"
+
+
+def images_md_section(result) -> Iterator[str]:
+    """One slide's part of slides-images.md."""
+    yield f"## {result.slide.title}\n\n"
+    if not result.success:
+        yield f"*Image generation failed: {result.error}*\n\n"
+        return
     
-    output_file.write_text(content, encoding='utf-8')
-    return output_file
+    image_name = result.image_path.name
+    if len(result.renditions) > 1:
+        srcset = ", ".join(f"{r.path.name} {r.width}w" for r in result.renditions)
+        alt = html.escape(result.slide.title, quote=True)
+        yield f'<img src="{image_name}" srcset="{srcset}" sizes="100vw" alt="{alt}">\n\n'
+    else:
+        yield f"![{result.slide.title}]({image_name})\n\n"
+    for variant, path in enumerate(result.variant_paths[1:], 2):
+        yield f"![{result.slide.title} (variant {variant})]({path.name})\n\n"
 
 
-def create_generation_log(directory: Path, results: List, config) -> Path:
-    """Create generation-log.md with detailed prompt information."""
-    output_file = directory / "generation-log.md"
+def create_generation_log(directory: Path, results: List, config,
+                          summary: Optional[Dict[str, Any]] = None) -> Path:
+    """Create generation-log.md with detailed prompt information.
     
+    With a ``summary`` from ``run_summary``, the log opens with the run's
+    time, token, byte and cost totals and a per-stage timing table.
+    """
+    with AtomicWriter(directory / "generation-log.md") as writer:
+        writer.writelines(generation_log_header(results, config, summary))
+        for number, result in enumerate(results, 1):
+            writer.writelines(generation_log_section(number, result))
+    return writer.path
+
+
+def generation_log_header(results: List, config,
+                          summary: Optional[Dict[str, Any]] = None) -> Iterator[str]:
     from datetime import datetime
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
-    content = f"# Generation Log\n\n"
-    content += f"**Generated:** {timestamp}\n"
-    content += f"**Theme:** {config.theme}\n"
-    content += f"**Style:** {config.style}\n"
-    content += f"**Prompt Provider:** {config.prompt_provider}\n"
-    content += f"**Image Provider:** {config.image_provider}\n\n"
+    yield "# Generation Log\n\n"
+    yield f"**Generated:** {timestamp}\n"
+    yield f"**Theme:** {config.theme}\n"
+    yield f"**Style:** {config.style}\n"
+    yield f"**Prompt Provider:** {' → '.join(provider_chain(config.prompt_provider))}\n"
+    yield f"**Image Provider:** {' → '.join(provider_chain(config.image_provider))}\n\n"
     
     success_count = sum(1 for r in results if r.success)
-    content += f"**Results:** {success_count}/{len(results)} successful\n\n"
-    content += "---\n\n"
-    
-    for i, result in enumerate(results, 1):
-        content += f"## {i}. {result.slide.title}\n\n"
-        
-        if result.success:
-            content += f"**Status:** ✅ Success\n"
-            content += f"**Image:** {result.image_path.name}\n\n"
-        else:
-            content += f"**Status:** ❌ Failed\n"
-            content += f"**Error:** {result.error}\n\n"
-        
-        if result.prompt:
-            content += f"**Generated Prompt:**\n```\n{result.prompt}\n```\n\n"
-        
-        content += "---\n\n"
-    
-    output_file.write_text(content, encoding='utf-8')
-    return output_file
\ No newline at end of file
+    yield f"**Results:** {success_count}/{len(results)} successful\n"
+    retries = sum(max(0, r.prompt_attempts - 1) + max(0, r.image_attempts - 1) for r in results)
+    backoff = sum(r.backoff_seconds for r in results)
+    yield f"**Retries:** {retries} ({backoff:.1f}s total backoff)\n\n"
+    if summary:
+        yield from summary_lines(summary)
+    yield "---\n\n"
+
+
+def generation_log_section(number: int, result) -> Iterator[str]:
+    """One slide's part of generation-log.md."""
+    yield f"## {number}. {result.slide.title}\n\n"
+    
+    if result.success:
+        yield "**Status:** ✅ Success\n"
+        yield f"**Image:** {result.image_path.name}\n"
+        if len(result.variant_paths) > 1:
+            names = ", ".join(path.name for path in result.variant_paths[1:])
+            yield f"**Variants:** {names}\n"
+        if len(result.renditions) > 1:
+            widths = ", ".join(str(r.width) for r in result.renditions)
+            yield f"**Renditions:** {widths}\n"
+        yield "\n"
+    else:
+        yield "**Status:** ❌ Failed\n"
+        yield f"**Error:** {result.error}\n\n"
+    
+    if result.prompt_attempts > 1 or result.image_attempts > 1:
+        yield (f"**Attempts:** prompt {result.prompt_attempts}, image {result.image_attempts} "
+               f"({result.backoff_seconds:.1f}s backoff)\n\n")
+    
+    if result.coalesced:
+        yield "**Shared:** generated once with an identical slide\n\n"
+    
+    if result.prompt_cache or result.image_cache:
+        yield f"**Cache:** prompt {result.prompt_cache or 'n/a'}, image {result.image_cache or 'n/a'}\n\n"
+    
+    if result.timings:
+        stages = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in result.timings.items())
+        yield f"**Timings:** {stages}\n"
+        yield (f"**Usage:** {result.input_tokens:.0f} input / {result.output_tokens:.0f} output tokens, "
+               f"{format_bytes(result.image_bytes)} received, {format_cost(result.cost)}\n\n")
+    
+    if result.prompt:
+        yield f"**Generated Prompt:**\n```\n{result.prompt}\n```\n\n"
+    
+    yield "---\n\n"
+
+
+class DeckReports:
+    """slides-images.md and generation-log.md, written while a deck generates.
+    
+    Each slide's sections are formatted as its result arrives and appended,
+    in slide order, to temp files on a background thread, so nothing is
+    rebuilt at the end and the event loop never waits on the disk. The
+    headers need the run's totals, so ``finish`` writes them and streams the
+    sections in behind; each report then replaces the previous one
+    atomically. Until then, the previous reports stay in place.
+    """
+    
+    def __init__(self, directory: Path, config, slides: List[SlideInfo]):
+        self.directory = directory
+        self.config = config
+        self._positions = {slide.index: position for position, slide in enumerate(slides)}
+        self._waiting: Dict[int, Any] = {}  # results that arrived ahead of an earlier slide
+        self._next = 0
+        self._writer = BackgroundWriter()
+        self._images: Optional[AtomicWriter] = None
+        self._log: Optional[AtomicWriter] = None
+        self._error: Optional[BaseException] = None
+    
+    async def open(self) -> "DeckReports":
+        await self._writer.run(self._open)
+        return self
+    
+    def _open(self) -> None:
+        self._images = AtomicWriter(self.directory / "slides-images.md")
+        self._log = AtomicWriter(self.directory / "generation-log.md")
+    
+    def add(self, result) -> None:
+        """Queue a slide's sections, once every earlier slide's are queued."""
+        position = self._positions.get(result.slide.index)
+        if position is None or position < self._next:
+            return
+        self._waiting[position] = result
+        while self._next in self._waiting:
+            self._write(self._waiting.pop(self._next))
+    
+    def _write(self, result) -> None:
+        self._next += 1
+        self._writer.submit(self._append, list(images_md_section(result)),
+                            list(generation_log_section(self._next, result)))
+    
+    def _append(self, images: List[str], log: List[str]) -> None:
+        if self._error is not None:
+            return
+        try:
+            self._images.writelines(images)
+            self._log.writelines(log)
+        except OSError as e:
+            self._error = e
+    
+    async def finish(self, results: List, summary: Optional[Dict[str, Any]] = None,
+                     thumbnail_strip: Optional[Path] = None) -> Tuple[Path, Path]:
+        """Write the headers and put both reports in place; returns their paths."""
+        # Slides that never reported, e.g. from a gap in the slide order
+        for position in sorted(self._waiting):
+            self._write(self._waiting.pop(position))
+        try:
+            return await self._writer.run(self._finish, results, summary, thumbnail_strip)
+        finally:
+            self._writer.close()
+    
+    def _finish(self, results: List, summary: Optional[Dict[str, Any]],
+                thumbnail_strip: Optional[Path]) -> Tuple[Path, Path]:
+        try:
+            if self._error is not None:
+                raise self._error
+            self._images.close()
+            self._log.close()
+            with AtomicWriter(self._images.path) as writer:
+                writer.writelines(images_md_header(thumbnail_strip))
+                writer.copy_from(self._images.temp_path)
+            with AtomicWriter(self._log.path) as writer:
+                writer.writelines(generation_log_header(results, self.config, summary))
+                writer.copy_from(self._log.temp_path)
+            return self._images.path, self._log.path
+        finally:
+            self._discard()
+    
+    async def discard(self) -> None:
+        """Drop the partial reports, e.g. when the run failed."""
+        try:
+            await self._writer.run(self._discard)
+        finally:
+            self._writer.close()
+    
+    def _discard(self) -> None:
+        for writer in (self._images, self._log):
+            if writer is not None:
+                writer.discard()
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    """Markdown "Run Summary" section for a run summary."""
+    return "".join(summary_lines(summary))
+
+
+def summary_lines(summary: Dict[str, Any]) -> Iterator[str]:
+    yield "## Run Summary\n\n"
+    if summary.get("seconds") is not None:
+        yield f"**Wall time:** {summary['seconds']:.1f}s"
+        if summary.get("slides_per_second"):
+            yield f" ({summary['slides_per_second']:.2f} slides/s)"
+        yield "\n"
+    yield f"**Tokens:** {summary['input_tokens']} input, {summary['output_tokens']} output\n"
+    yield (f"**Bytes:** {format_bytes(summary['image_bytes'])} received, "
+           f"{format_bytes(summary['bytes_written'])} written\n")
+    yield f"**Estimated cost:** {format_cost(summary['cost_usd'])}"
+    if summary["unpriced_slides"]:
+        yield f" ({summary['unpriced_slides']} slides with unknown pricing)"
+    yield "\n\n"
+    
+    if summary["stages"]:
+        yield "| Stage | Total | Mean | p95 | Max |\n"
+        yield "|---|---|---|---|---|\n"
+        for stage, stats in summary["stages"].items():
+            yield (f"| {stage} | {stats['total']:.2f}s | {stats['mean']:.2f}s "
+                   f"| {stats['p95']:.2f}s | {stats['max']:.2f}s |\n")
+        yield "\n"
+
+
+def format_bytes(count: float) -> str:
+    if count < 1024:
+        return f"{count:.0f} B"
+    for unit in ("KB", "MB", "GB"):
+        count /= 1024
+        if count < 1024 or unit == "GB":
+            return f"{count:.1f} {unit}"
+
+
+def format_cost(cost: Optional[float]) -> str:
+    return "unknown" if cost is None else f"${cost:.4f}"
@@ -1,62 +1,88 @@
 """Simple image generation."""
 
-import asyncio
-from typing import List, Optional
+from typing import AsyncIterable, Callable, Dict, Iterable, List, Optional, Union
 from pathlib import Path
-from dataclasses import dataclass
 
-from ..providers.base import AIProvider, PromptRequest, ImageRequest
-from ..utils.file_utils import save_image, sanitize_filename
+from ..providers.base import AIProvider
+from ..utils.cache import GenerationCache
+from ..utils.file_utils import EncodeOptions
+from ..utils.image_executor import ImageExecutor
+from ..utils.renditions import RenditionOptions
+from ..utils.single_flight import SingleFlight
 from .slide_processor import SlideInfo
+from .results import GenerationResult
+from .pipeline import each_slide, stream_images
+from .scheduler import Scheduler
 
 
-@dataclass
-class GenerationResult:
-    """Result of image generation."""
-    slide: SlideInfo
-    success: bool
-    image_path: Optional[Path] = None
-    error: Optional[str] = None
-    prompt: Optional[str] = None
-    theme: Optional[str] = None
-    style: Optional[str] = None
-
-
-async def generate_images(slides: List[SlideInfo], 
+async def generate_images(slides: Union[Iterable[SlideInfo], AsyncIterable[SlideInfo]],
                          prompt_provider: AIProvider,
                          image_provider: AIProvider,
-                         output_dir: Path = Path("generated")) -> List[GenerationResult]:
-    """Generate images for slides."""
+                         output_dir: Path = Path("generated"),
+                         theme: Optional[str] = None,
+                         style: Optional[str] = None,
+                         scheduler: Optional[Scheduler] = None,
+                         cache: Optional[GenerationCache] = None,
+                         prompt_batch_size: int = 1,
+                         variants: int = 1,
+                         stream_to_disk: bool = True,
+                         executor: Optional[ImageExecutor] = None,
+                         encode: Optional[EncodeOptions] = None,
+                         renditions: Optional[RenditionOptions] = None,
+                         unique_filenames: bool = False,
+                         flights: Optional[SingleFlight] = None,
+                         reserved_stems: Iterable[str] = (),
+                         on_result: Optional[Callable[[GenerationResult], None]] = None) -> List[GenerationResult]:
+    """Generate images for slides.
+    
+    Prompt and image requests run through the scheduler's lanes so each
+    stage stays within its own concurrency and requests-per-minute limits.
+    Cache hits skip the network and the scheduler entirely. ``on_result`` is
+    called as each slide finishes; the returned list is in slide order.
+    ``prompt_batch_size`` > 1 asks for several slides' prompts per request,
+    and ``variants`` > 1 saves several candidate images per slide.
+    ``stream_to_disk`` decodes images straight to temp files where supported.
+    Image conversion runs on ``executor``; without one, a process pool sized
+    to the available cores is used for the run. ``encode`` picks the output
+    format and its quality settings, and ``renditions`` the extra sizes.
+    Repeated slides are generated once and share the image, or get their own
+    numbered copy with ``unique_filenames``. Filenames in ``reserved_stems``
+    are left alone. ``slides`` may also be a generator or async iterable
+    (e.g. ``stream_slides``), which is consumed as generation proceeds.
+    """
+    order: Dict[int, int] = {}
+    results = []
+    
+    async def numbered():
+        # Remember each slide's position as the input is consumed
+        async for slide in each_slide(slides):
+            order[id(slide)] = len(order)
+            yield slide
+    
+    owns_executor = executor is None
+    executor = executor or ImageExecutor()
     
-    async def generate_single(slide: SlideInfo) -> GenerationResult:
-        try:
-            # Generate prompt
-            prompt_request = PromptRequest(
-                slide_title=slide.title,
-                slide_content=""
-            )
-            prompt_response = await prompt_provider.generate_prompt(prompt_request)
-            
-            if not prompt_response.success:
-                return GenerationResult(slide, False, error=prompt_response.error)
-            
-            # Generate image
-            image_request = ImageRequest(prompt=prompt_response.content)
-            image_response = await image_provider.generate_image(image_request)
-            
-            if not image_response.success:
-                return GenerationResult(slide, False, error=image_response.error, 
-                                       prompt=prompt_response.content)
-            
-            # Save image
-            filename = f"{sanitize_filename(slide.title)}.png"
-            image_path = await asyncio.to_thread(save_image, image_response.image_data, filename, output_dir)
-            
-            return GenerationResult(slide, True, image_path, prompt=prompt_response.content)
-            
-        except Exception as e:
-            return GenerationResult(slide, False, error=str(e))
+    # Generate all slides over the providers' pooled sessions
+    try:
+        async with prompt_provider, image_provider:
+            async for result in stream_images(numbered(), prompt_provider, image_provider, output_dir,
+                                              theme=theme, style=style,
+                                              scheduler=scheduler, cache=cache,
+                                              prompt_batch_size=prompt_batch_size,
+                                              variants=variants,
+                                              stream_to_disk=stream_to_disk,
+                                              executor=executor,
+                                              encode=encode,
+                                              renditions=renditions,
+                                              unique_filenames=unique_filenames,
+                                              flights=flights,
+                                              reserved_stems=reserved_stems):
+                if on_result:
+                    on_result(result)
+                results.append(result)
+    finally:
+        if owns_executor:
+            await executor.shutdown()
     
-    # Generate all slides
-    tasks = [generate_single(slide) for slide in slides]
-    return await asyncio.gather(*tasks)
\ No newline at end of file
+    results.sort(key=lambda result: order[id(result.slide)])
+    return results
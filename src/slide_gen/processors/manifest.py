@@ -0,0 +1,131 @@
+"""Slide manifest for incremental directory rebuilds."""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, asdict, field
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from ..providers.base import AIProvider
+from ..utils.cache import cache_key
+from .slide_processor import SlideInfo
+
+MANIFEST_FILE = ".slide-gen-manifest.json"
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class ManifestEntry:
+    """What was generated for one slide."""
+    title: str
+    inputs_hash: str
+    prompt: str
+    image: str
+    checksum: str
+    variants: List[str] = field(default_factory=list)  # extra variant filenames
+    renditions: Dict[str, int] = field(default_factory=dict)  # filename -> width, widest first
+    thumbnail: str = ""
+
+
+def slide_inputs_hash(slide: SlideInfo, config,
+                      prompt_provider: AIProvider,
+                      image_provider: AIProvider,
+                      occurrence: int = 1) -> str:
+    """Hash everything that affects the image generated for a slide.
+    
+    ``occurrence`` tells repeats of a title apart when each gets its own file.
+    """
+    fields = dict(
+        title=slide.title,
+        theme=config.theme,
+        style=config.style,
+        prompt_provider=prompt_provider.name,
+        prompt_model=prompt_provider.model_for("prompt"),
+        image_provider=image_provider.name,
+        image_model=image_provider.model_for("image"),
+    )
+    if config.variants > 1:
+        fields["variants"] = config.variants
+    if occurrence > 1:
+        fields["occurrence"] = occurrence
+    if config.output_format != "png" or config.output_quality is not None:
+        fields["output_format"] = config.output_format
+        fields["output_quality"] = config.output_quality
+    if config.renditions or config.thumbnail_width:
+        fields["renditions"] = sorted(config.renditions, reverse=True)
+        fields["thumbnail_width"] = config.thumbnail_width
+    return cache_key(**fields)
+
+
+def file_checksum(path: Path) -> str:
+    """Return the SHA-256 of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(directory: Path) -> Dict[str, ManifestEntry]:
+    """Load the manifest, keyed by inputs hash. Missing or unreadable manifests are empty."""
+    manifest_file = directory / MANIFEST_FILE
+    if not manifest_file.exists():
+        return {}
+
+    try:
+        data = json.loads(manifest_file.read_text(encoding='utf-8'))
+        if data.get("version") != MANIFEST_VERSION:
+            return {}
+        entries = [ManifestEntry(**item) for item in data.get("slides", [])]
+    except (ValueError, TypeError):
+        return {}
+
+    return {entry.inputs_hash: entry for entry in entries}
+
+
+def save_manifest(directory: Path, entries: List[ManifestEntry]) -> Path:
+    """Write the manifest atomically."""
+    manifest_file = directory / MANIFEST_FILE
+    data = {
+        "version": MANIFEST_VERSION,
+        "slides": [asdict(entry) for entry in entries],
+    }
+    temp_file = manifest_file.with_name(f"{MANIFEST_FILE}.tmp")
+    temp_file.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding='utf-8')
+    os.replace(temp_file, manifest_file)
+    return manifest_file
+
+
+def entry_files(entry: ManifestEntry) -> List[str]:
+    """Every filename an entry refers to."""
+    names = [entry.image] + entry.variants + list(entry.renditions)
+    if entry.thumbnail:
+        names.append(entry.thumbnail)
+    return names
+
+
+def is_current(directory: Path, entry: ManifestEntry) -> bool:
+    """True if the entry's images are still on disk and the main one is unmodified."""
+    image_path = directory / entry.image
+    if not all((directory / name).exists() for name in entry_files(entry)):
+        return False
+    return image_path.exists() and file_checksum(image_path) == entry.checksum
+
+
+def collect_garbage(directory: Path,
+                    previous: Iterable[ManifestEntry],
+                    current: Iterable[ManifestEntry]) -> List[Path]:
+    """Delete images from the previous manifest that nothing references anymore."""
+    keep = {name for entry in current for name in entry_files(entry)}
+    removed = []
+    for entry in previous:
+        for name in entry_files(entry):
+            # Only ever touch plain filenames inside the deck directory
+            if name != Path(name).name:
+                continue
+            image_path = directory / name
+            if name not in keep and image_path.exists():
+                image_path.unlink()
+                removed.append(image_path)
+    return removed
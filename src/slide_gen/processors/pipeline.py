@@ -0,0 +1,491 @@
+"""Streaming prompt → image → save pipeline with bounded queues."""
+
+import asyncio
+import time
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+
+from ..providers.base import AIProvider, AIResponse, PromptRequest, ImageRequest
+from ..telemetry import get_telemetry
+from ..utils.cache import GenerationCache, cache_key
+from ..utils.file_utils import EncodeOptions, copy_image, save_image_timed, sanitize_filename, timed
+from ..utils.image_executor import ImageExecutor
+from ..utils.renditions import Rendition, RenditionOptions, make_renditions
+from ..utils.single_flight import SingleFlight
+from .results import GenerationResult
+from .scheduler import Scheduler
+from .slide_processor import SlideInfo, normalize_title
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+def prompt_cache_key(provider: AIProvider, request: PromptRequest) -> str:
+    """Cache key for a prompt request."""
+    return cache_key(
+        stage="prompt",
+        provider=provider.name,
+        model=provider.model_for("prompt"),
+        title=request.slide_title,
+        content=request.slide_content,
+        theme=request.theme,
+        style=request.style,
+        aspect_ratio=request.aspect_ratio,
+    )
+
+
+def image_cache_key(provider: AIProvider, request: ImageRequest, variant: int = 0) -> str:
+    """Cache key for one variant of an image request."""
+    fields = dict(
+        stage="image",
+        provider=provider.name,
+        model=provider.model_for("image"),
+        prompt=request.prompt,
+        style=request.style,
+        aspect_ratio=request.aspect_ratio,
+        quality=request.quality,
+        size=request.size,
+    )
+    if variant:
+        fields["variant"] = variant
+    return cache_key(**fields)
+
+
+async def request_prompts(provider: AIProvider, requests: List[PromptRequest],
+                          scheduler: Scheduler,
+                          cache: Optional[GenerationCache] = None) -> List[Tuple[AIResponse, Optional[str]]]:
+    """Generate prompts for one or more slides, consulting the cache first.
+    
+    Cache misses go to the provider together, so providers that support
+    batching answer them in a single call. Returns a (response, cache status)
+    pair per request; the status is "hit", "miss" or None without a cache.
+    """
+    outcomes: List[Optional[Tuple[AIResponse, Optional[str]]]] = [None] * len(requests)
+    keys = [prompt_cache_key(provider, request) for request in requests] if cache else []
+    
+    misses = []
+    for index, request in enumerate(requests):
+        cached = await asyncio.to_thread(cache.get_prompt, keys[index]) if cache else None
+        if cached is not None:
+            outcomes[index] = (AIResponse(success=True, content=cached), "hit")
+        else:
+            misses.append(index)
+    
+    if misses:
+        # Wait for the model to load before taking a lane slot
+        await provider.warm_up()
+        responses = await provider.generate_prompts([requests[i] for i in misses], scheduler.prompt)
+        for index, response in zip(misses, responses):
+            # A prompt cut off by the time cap is used once, not reused from the cache
+            if cache and response.success and not (response.metadata or {}).get("partial"):
+                await asyncio.to_thread(cache.put_prompt, keys[index], response.content)
+            outcomes[index] = (response, "miss" if cache else None)
+    
+    return outcomes
+
+
+async def request_image(provider: AIProvider, request: ImageRequest,
+                        scheduler: Scheduler,
+                        cache: Optional[GenerationCache] = None) -> Tuple[AIResponse, Optional[str]]:
+    """Generate an image and its variants, consulting the cache first.
+    
+    It is only a hit when every variant is cached. Returns the response and
+    the cache status ("hit", "miss" or None).
+    """
+    if cache is None:
+        return await provider.generate_variants(request, scheduler.image), None
+    
+    keys = [image_cache_key(provider, request, variant) for variant in range(max(1, request.n))]
+    cached = [await asyncio.to_thread(cache.get_image, key) for key in keys]
+    if all(image is not None for image in cached):
+        return AIResponse(success=True, image_data=cached[0], images=cached), "hit"
+    
+    response = await provider.generate_variants(request, scheduler.image)
+    if response.success:
+        for key, image in zip(keys, response_images(response)):
+            if isinstance(image, Path):
+                await asyncio.to_thread(cache.put_image_file, key, image)
+            else:
+                await asyncio.to_thread(cache.put_image, key, image)
+    return response, "miss"
+
+
+async def each_slide(slides: Union[Iterable[SlideInfo], AsyncIterable[SlideInfo]]) -> AsyncIterator[SlideInfo]:
+    """Iterate slides from a list, a generator or an async iterable alike."""
+    if hasattr(slides, "__aiter__"):
+        async for slide in slides:
+            yield slide
+    else:
+        for slide in slides:
+            yield slide
+
+
+def response_images(response: AIResponse) -> List[Union[bytes, Path]]:
+    """Every image in a response, as spooled files or in-memory bytes."""
+    return response.image_files or response.images or [response.image_data]
+
+
+def copy_slide_files(result: GenerationResult, stem: str) -> GenerationResult:
+    """Copy a slide's images, renditions and thumbnail to files named after ``stem``."""
+    source_stem = result.image_path.stem
+    
+    def copy(path: Path) -> Path:
+        destination = path.with_name(stem + path.name[len(source_stem):])
+        copy_image(path, destination)
+        return destination
+    
+    variant_paths = [copy(path) for path in result.variant_paths]
+    renditions = [Rendition(r.width, variant_paths[0] if r.path == result.image_path else copy(r.path))
+                  for r in result.renditions]
+    thumbnail_path = copy(result.thumbnail_path) if result.thumbnail_path else None
+    return replace(result, image_path=variant_paths[0], variant_paths=variant_paths,
+                   renditions=renditions, thumbnail_path=thumbnail_path)
+
+
+@dataclass
+class _SlideJob:
+    """State carried for one slide between pipeline stages."""
+    slide: SlideInfo
+    stem: str = ""
+    flight: Optional[asyncio.Future] = None  # settled with this slide's result for duplicates
+    prompt: Optional[str] = None
+    images: Optional[List[Union[bytes, Path]]] = None
+    prompt_cache: Optional[str] = None
+    image_cache: Optional[str] = None
+    prompt_attempts: int = 0
+    image_attempts: int = 0
+    backoff_seconds: float = 0.0
+    timings: Dict[str, float] = field(default_factory=dict)
+    queued_at: float = 0.0
+    input_tokens: float = 0
+    output_tokens: float = 0
+    cost: Optional[float] = 0.0
+    image_bytes: int = 0
+    bytes_written: int = 0
+    
+    def enqueued(self) -> "_SlideJob":
+        self.queued_at = time.perf_counter()
+        return self
+    
+    def dequeued(self) -> None:
+        """Add the time since ``enqueued`` to the queue wait."""
+        self.timings["queue_wait"] = (self.timings.get("queue_wait", 0.0)
+                                      + time.perf_counter() - self.queued_at)
+    
+    def record_response(self, stage: str, response: AIResponse) -> None:
+        """Accumulate retry, token and cost metadata from a provider response."""
+        metadata = response.metadata or {}
+        setattr(self, f"{stage}_attempts", metadata.get("attempts", 0))
+        self.backoff_seconds += metadata.get("backoff_seconds", 0.0)
+        self.input_tokens += metadata.get("input_tokens") or 0
+        self.output_tokens += metadata.get("output_tokens") or 0
+        if "cost" in metadata:
+            cost = metadata["cost"]
+            self.cost = None if cost is None or self.cost is None else self.cost + cost
+
+
+async def stream_images(slides: Union[Iterable[SlideInfo], AsyncIterable[SlideInfo]],
+                        prompt_provider: AIProvider,
+                        image_provider: AIProvider,
+                        output_dir: Path = Path("generated"),
+                        theme: Optional[str] = None,
+                        style: Optional[str] = None,
+                        scheduler: Optional[Scheduler] = None,
+                        cache: Optional[GenerationCache] = None,
+                        prompt_batch_size: int = 1,
+                        variants: int = 1,
+                        stream_to_disk: bool = True,
+                        executor: Optional[ImageExecutor] = None,
+                        encode: Optional[EncodeOptions] = None,
+                        renditions: Optional[RenditionOptions] = None,
+                        unique_filenames: bool = False,
+                        flights: Optional[SingleFlight] = None,
+                        reserved_stems: Iterable[str] = (),
+                        queue_size: int = 16,
+                        save_workers: Optional[int] = None) -> AsyncIterator[GenerationResult]:
+    """Generate images for slides, yielding each result as soon as it completes.
+    
+    Slides flow through parse → prompt → image → save stages connected by
+    bounded queues. ``slides`` may be an async iterable such as
+    ``stream_slides``, so generation starts while the input is still read. Each image request starts as soon as its prompt arrives,
+    and at most a few decoded images wait for the save stage at any time.
+    With ``prompt_batch_size`` > 1, each prompt worker takes up to that many
+    queued slides and asks the provider for all of their prompts at once.
+    ``variants`` > 1 generates several candidate images per slide, saved as
+    ``Title.png``, ``Title_v2.png`` and so on. With ``stream_to_disk``,
+    providers that support it decode images straight into temp files in
+    ``output_dir`` rather than memory. Saving (decode, flatten, encode) runs
+    on ``executor`` when given, otherwise in a thread, and writes the format
+    chosen by ``encode`` (PNG by default). ``renditions`` adds downscaled
+    copies and a thumbnail of each slide's first image in the same step.
+    
+    Repeated slides (same title up to case and whitespace, e.g. "Agenda")
+    are generated once: later ones join the first one's in-flight work via
+    ``flights`` and resolve to the same image, or to copies named
+    ``Title-2.png`` and so on with ``unique_filenames``. Different titles
+    that sanitize to the same filename get the same numbered suffix instead
+    of overwriting each other, as do titles whose filename is in
+    ``reserved_stems`` (images kept from an earlier run). Pass a shared SingleFlight to coalesce
+    identical slides across concurrent runs writing to the same directory.
+    The caller is responsible for opening the providers' sessions.
+    """
+    scheduler = scheduler or Scheduler()
+    encode = encode or EncodeOptions()
+    telemetry = get_telemetry()
+    flights = flights if flights is not None else SingleFlight()
+    prompt_workers = scheduler.prompt.concurrency
+    if prompt_provider.parallel_slots():
+        # A local server runs only so many requests at once; more workers would just wait
+        prompt_workers = min(prompt_workers, prompt_provider.parallel_slots())
+    image_workers = scheduler.image.concurrency
+    save_workers = save_workers or (executor.workers if executor else 2)
+    
+    prompt_queue: asyncio.Queue = asyncio.Queue(queue_size)
+    image_queue: asyncio.Queue = asyncio.Queue(queue_size)
+    save_queue: asyncio.Queue = asyncio.Queue(save_workers)
+    results: asyncio.Queue = asyncio.Queue()
+    
+    def finish(job: _SlideJob, success: bool, image_paths: Optional[List[Path]] = None,
+               error: Optional[str] = None, sizes: Optional[List[Rendition]] = None,
+               thumbnail_path: Optional[Path] = None) -> GenerationResult:
+        image_paths = image_paths or []
+        result = GenerationResult(job.slide, success, image_paths[0] if image_paths else None,
+                                error=error, variant_paths=image_paths,
+                                renditions=sizes or [], thumbnail_path=thumbnail_path,
+                                prompt=job.prompt, theme=theme, style=style,
+                                prompt_cache=job.prompt_cache, image_cache=job.image_cache,
+                                prompt_attempts=job.prompt_attempts,
+                                image_attempts=job.image_attempts,
+                                backoff_seconds=job.backoff_seconds,
+                                timings={stage: round(seconds, 4) for stage, seconds in job.timings.items()},
+                                input_tokens=job.input_tokens, output_tokens=job.output_tokens,
+                                cost=job.cost, image_bytes=job.image_bytes,
+                                bytes_written=job.bytes_written)
+        if job.flight is not None and not job.flight.done():
+            job.flight.set_result(result)
+        if telemetry.enabled:
+            telemetry.count("slide_gen_slides_total", status="ok" if success else "failed")
+            for stage, seconds in job.timings.items():
+                telemetry.observe("slide_gen_stage_seconds", seconds, stage=stage)
+        return result
+    
+    async def prompt_stage(jobs: List[_SlideJob]) -> None:
+        prompt_requests = []
+        for job in jobs:
+            job.dequeued()
+            prompt_request = PromptRequest(slide_title=job.slide.title, slide_content="")
+            if theme:
+                prompt_request.theme = theme
+            if style:
+                prompt_request.style = style
+            prompt_requests.append(prompt_request)
+        started = time.perf_counter()
+        with telemetry.span("prompt", slides=len(jobs)):
+            outcomes = await request_prompts(prompt_provider, prompt_requests, scheduler, cache)
+        elapsed = time.perf_counter() - started
+        
+        for job, (response, job.prompt_cache) in zip(jobs, outcomes):
+            job.timings["prompt"] = elapsed
+            job.record_response("prompt", response)
+            if not response.success:
+                await results.put(finish(job, False, error=response.error))
+                continue
+            job.prompt = response.content
+            await image_queue.put(job.enqueued())
+    
+    async def image_stage(job: _SlideJob) -> None:
+        job.dequeued()
+        image_request = ImageRequest(prompt=job.prompt, n=variants,
+                                     spool_dir=output_dir if stream_to_disk else None)
+        with timed(job.timings, "image"), telemetry.span("image", slide=job.slide.title) as span:
+            response, job.image_cache = await request_image(
+                image_provider, image_request, scheduler, cache)
+            span.set(cache=job.image_cache)
+        job.record_response("image", response)
+        
+        if not response.success:
+            await results.put(finish(job, False, error=response.error))
+            return
+        job.images = response_images(response)
+        job.image_bytes = sum(image.stat().st_size if isinstance(image, Path) else len(image)
+                              for image in job.images)
+        await save_queue.put(job.enqueued())
+    
+    async def run_job(func, *args):
+        if executor is not None:
+            return await executor.run(func, *args)
+        return await asyncio.to_thread(func, *args)
+    
+    async def save_stage(job: _SlideJob) -> None:
+        job.dequeued()
+        stem = job.stem
+        images, job.images = job.images, None
+        image_paths = []
+        sizes, thumbnail_path = [], None
+        try:
+            with telemetry.span("save", slide=job.slide.title, images=len(images)):
+                for variant, image_data in enumerate(images, 1):
+                    suffix = "" if variant == 1 else f"_v{variant}"
+                    filename = f"{stem}{suffix}{encode.extension}"
+                    path, timings = await run_job(save_image_timed, image_data, filename, output_dir, encode)
+                    image_paths.append(path)
+                    for stage, seconds in timings.items():
+                        job.timings[stage] = job.timings.get(stage, 0.0) + seconds
+                if renditions and renditions.enabled:
+                    with timed(job.timings, "renditions"):
+                        sizes, thumbnail_path = await run_job(make_renditions, image_paths[0], renditions, encode)
+                written = image_paths + [r.path for r in sizes[1:]] + ([thumbnail_path] if thumbnail_path else [])
+                job.bytes_written = sum(path.stat().st_size for path in written)
+        finally:
+            # Don't leave spooled temp files behind if a save failed
+            for image in images:
+                if isinstance(image, Path) and image.exists():
+                    image.unlink()
+        await results.put(finish(job, True, image_paths, sizes=sizes, thumbnail_path=thumbnail_path))
+    
+    async def run_stage(handle, inbox: asyncio.Queue, workers: int,
+                        batch_size: Optional[int] = None) -> None:
+        """Run ``workers`` consumers of ``inbox`` until each sees _DONE.
+        
+        With a batch_size, ``handle`` receives a list of up to that many jobs
+        already waiting in the queue instead of a single job.
+        """
+        async def worker():
+            finished = False
+            while not finished:
+                job = await inbox.get()
+                if job is _DONE:
+                    return
+                jobs = [job]
+                while batch_size and len(jobs) < batch_size:
+                    try:
+                        job = inbox.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+                    if job is _DONE:
+                        finished = True
+                        break
+                    jobs.append(job)
+                try:
+                    await handle(jobs if batch_size else jobs[0])
+                except Exception as e:
+                    for job in jobs:
+                        await results.put(finish(job, False, error=str(e)))
+        await asyncio.gather(*(worker() for _ in range(workers)))
+    
+    led: List[asyncio.Future] = []
+    followers: List[asyncio.Task] = []
+    
+    def slide_key(slide: SlideInfo) -> str:
+        return cache_key(
+            output_dir=str(output_dir.resolve()),
+            title=normalize_title(slide.title),
+            theme=theme,
+            style=style,
+            prompt_provider=prompt_provider.name,
+            image_provider=image_provider.name,
+            variants=variants,
+            format=encode.format,
+        )
+    
+    async def follow(slide: SlideInfo, flight: asyncio.Future, stem: Optional[str]) -> None:
+        try:
+            leader = await asyncio.shield(flight)
+        except asyncio.CancelledError:
+            if not flight.cancelled():
+                raise
+            await results.put(GenerationResult(slide, False, error="Identical slide's generation was cancelled",
+                                               theme=theme, style=style))
+            return
+        
+        # The work and its cost are counted once, on the leading slide
+        result = replace(leader, slide=slide, coalesced=True,
+                         prompt_attempts=0, image_attempts=0, backoff_seconds=0.0,
+                         timings={}, input_tokens=0, output_tokens=0, cost=0.0,
+                         image_bytes=0, bytes_written=0)
+        if stem and result.success:
+            try:
+                result = await asyncio.to_thread(copy_slide_files, result, stem)
+            except OSError as e:
+                result = replace(result, success=False, error=str(e))
+        await results.put(result)
+    
+    async def parse() -> None:
+        # Compared case-insensitively for case-insensitive filesystems
+        used_stems = {stem.casefold() for stem in reserved_stems}
+        
+        def claim_stem(slide: SlideInfo) -> str:
+            base = stem = sanitize_filename(slide.title)
+            copy = 2
+            while stem.casefold() in used_stems:
+                stem = f"{base}-{copy}"
+                copy += 1
+            used_stems.add(stem.casefold())
+            return stem
+        
+        async for slide in each_slide(slides):
+            flight, leads = flights.join(slide_key(slide))
+            if leads:
+                led.append(flight)
+                await prompt_queue.put(_SlideJob(slide, stem=claim_stem(slide), flight=flight).enqueued())
+            else:
+                stem = claim_stem(slide) if unique_filenames else None
+                followers.append(asyncio.ensure_future(follow(slide, flight, stem)))
+        for _ in range(prompt_workers):
+            await prompt_queue.put(_DONE)
+    
+    async def prompts() -> None:
+        await run_stage(prompt_stage, prompt_queue, prompt_workers,
+                        batch_size=max(1, prompt_batch_size))
+        for _ in range(image_workers):
+            await image_queue.put(_DONE)
+    
+    async def images() -> None:
+        await run_stage(image_stage, image_queue, image_workers)
+        for _ in range(save_workers):
+            await save_queue.put(_DONE)
+    
+    async def warm_up() -> None:
+        outcome = await prompt_provider.warm_up()
+        if outcome is not None:
+            print(outcome)
+    
+    async def run() -> None:
+        # Start loading a local model while slides are parsed and looked up in the cache
+        warming = asyncio.ensure_future(warm_up())
+        stages = [asyncio.ensure_future(stage) for stage in (
+            parse(), prompts(), images(), run_stage(save_stage, save_queue, save_workers))]
+        try:
+            await asyncio.gather(*stages)
+            await asyncio.gather(*followers)
+        finally:
+            for task in [warming] + stages + followers:
+                task.cancel()
+            # Release anyone still waiting on slides this run never finished
+            for flight in led:
+                if not flight.done():
+                    flight.cancel()
+            results.put_nowait(_DONE)
+    
+    async def traced_run() -> None:
+        # Stage spans become children of this one, since tasks inherit the context
+        with telemetry.span("pipeline", output_dir=str(output_dir)):
+            await run()
+    
+    pipeline = asyncio.ensure_future(traced_run())
+    try:
+        while True:
+            result = await results.get()
+            if result is _DONE:
+                break
+            yield result
+        # Surface failures outside per-slide handling, e.g. from parsing
+        await pipeline
+    finally:
+        if not pipeline.done():
+            pipeline.cancel()
+            try:
+                await pipeline
+            except (asyncio.CancelledError, Exception):
+                pass
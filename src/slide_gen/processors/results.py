@@ -0,0 +1,35 @@
+"""Generation result types."""
+
+from typing import Dict, List, Optional
+from pathlib import Path
+from dataclasses import dataclass, field
+
+from ..utils.renditions import Rendition
+from .slide_processor import SlideInfo
+
+
+@dataclass
+class GenerationResult:
+    """Result of image generation."""
+    slide: SlideInfo
+    success: bool
+    image_path: Optional[Path] = None
+    error: Optional[str] = None
+    prompt: Optional[str] = None
+    theme: Optional[str] = None
+    style: Optional[str] = None
+    prompt_cache: Optional[str] = None  # "hit" or "miss"; None when caching is off
+    image_cache: Optional[str] = None
+    prompt_attempts: int = 0  # provider calls made, including retries; 0 on a cache hit
+    image_attempts: int = 0
+    backoff_seconds: float = 0.0
+    variant_paths: List[Path] = field(default_factory=list)  # all variants; image_path is the first
+    renditions: List[Rendition] = field(default_factory=list)  # widest first, including image_path
+    thumbnail_path: Optional[Path] = None
+    coalesced: bool = False  # shared the generation of an identical slide in flight
+    timings: Dict[str, float] = field(default_factory=dict)  # seconds per stage, see summary.STAGES
+    input_tokens: float = 0  # prompt tokens; a batched call is split evenly across its slides
+    output_tokens: float = 0
+    cost: Optional[float] = 0.0  # estimated USD; None when a model's price is unknown
+    image_bytes: int = 0  # image data received from the provider
+    bytes_written: int = 0  # bytes of images saved to disk, renditions included
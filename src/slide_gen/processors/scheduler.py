@@ -0,0 +1,53 @@
+"""Bounded-concurrency scheduling for prompt and image requests."""
+
+import asyncio
+from typing import Optional
+
+from asyncio_throttle import Throttler
+
+
+class Lane:
+    """Concurrency and requests-per-minute limit for one generation stage."""
+
+    def __init__(self, concurrency: int, rpm: Optional[int] = None):
+        if concurrency < 1:
+            raise ValueError("Concurrency must be at least 1")
+        self.concurrency = concurrency
+        self.rpm = rpm
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._throttler = Throttler(rate_limit=rpm, period=60) if rpm else None
+
+    async def __aenter__(self) -> "Lane":
+        await self._semaphore.acquire()
+        if self._throttler is not None:
+            try:
+                await self._throttler.acquire()
+            except BaseException:
+                self._semaphore.release()
+                raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self._semaphore.release()
+
+
+class Scheduler:
+    """Independent lanes for the prompt and image stages."""
+
+    def __init__(self,
+                 prompt_concurrency: int = 8,
+                 image_concurrency: int = 4,
+                 prompt_rpm: Optional[int] = None,
+                 image_rpm: Optional[int] = None):
+        self.prompt = Lane(prompt_concurrency, prompt_rpm)
+        self.image = Lane(image_concurrency, image_rpm)
+
+    @classmethod
+    def from_config(cls, config) -> "Scheduler":
+        """Build a scheduler from a DirectoryConfig."""
+        return cls(
+            prompt_concurrency=config.prompt_concurrency,
+            image_concurrency=config.image_concurrency,
+            prompt_rpm=config.prompt_rpm,
+            image_rpm=config.image_rpm,
+        )
@@ -1,10 +1,17 @@
 """Simple slide processor."""
 
+import asyncio
+import itertools
 import re
-from typing import List
+from typing import AsyncIterator, Iterator, List
 from dataclasses import dataclass
 from pathlib import Path
 
+# A markdown header line: "# Title", "## Title", ...
+HEADER = re.compile(r'#+\s+(.+)')
+
+READ_BUFFER = 1024 * 1024
+
 
 @dataclass
 class SlideInfo:
@@ -13,6 +20,11 @@ class SlideInfo:
     index: int = 0
 
 
+def normalize_title(title: str) -> str:
+    """Title with case and whitespace differences removed, for spotting repeats."""
+    return " ".join(title.split()).casefold()
+
+
 def extract_markdown_headers(content: str) -> List[str]:
     """Extract markdown headers from content using regex."""
     return re.findall(r'^#+\s+(.+)$', content, re.MULTILINE)
@@ -28,14 +40,50 @@ def process_file(file_path: Path) -> List[SlideInfo]:
     """Process a file and extract slide titles."""
     if not file_path.exists():
         raise FileNotFoundError(f"File not found: {file_path}")
+    return list(iter_slides(file_path))
+
+
+def iter_slides(file_path: Path) -> Iterator[SlideInfo]:
+    """Yield slides from a file as it is read, one buffered line at a time.
     
-    content = file_path.read_text(encoding='utf-8')
+    Markdown files (.md) give one slide per header; any other file one per
+    non-empty line. Memory use doesn't grow with the file's size.
+    """
+    markdown = file_path.suffix.lower() == '.md'
+    with open(file_path, 'r', encoding='utf-8', buffering=READ_BUFFER) as f:
+        index = 0
+        for line in f:
+            if markdown:
+                if not line.startswith('#'):
+                    continue
+                match = HEADER.match(line)
+                title = match.group(1).strip() if match else ""
+            else:
+                title = line.strip()
+            if title:
+                yield SlideInfo(title=title, index=index)
+                index += 1
+
+
+async def stream_slides(file_path: Path, batch_size: int = 256) -> AsyncIterator[SlideInfo]:
+    """Yield slides from a file, reading it in a thread a batch at a time.
     
-    if file_path.suffix.lower() == '.md':
-        # Extract markdown headers
-        headers = extract_markdown_headers(content)
-        return [SlideInfo(title=title.strip(), index=i) for i, title in enumerate(headers)]
-    else:
-        # Treat each line as a slide title
-        lines = [line.strip() for line in content.split('\n') if line.strip()]
-        return [SlideInfo(title=line, index=i) for i, line in enumerate(lines)]
\ No newline at end of file
+    Passed to generate_images or stream_images, generation starts with the
+    first batch instead of waiting for the whole file to be parsed.
+    """
+    if not file_path.exists():
+        raise FileNotFoundError(f"File not found: {file_path}")
+    slides = iter_slides(file_path)
+    try:
+        while True:
+            batch = await asyncio.to_thread(list, itertools.islice(slides, batch_size))
+            if not batch:
+                return
+            for slide in batch:
+                yield slide
+    finally:
+        try:
+            slides.close()
+        except ValueError:
+            # Cancelled while a batch was still being read in its thread
+            pass
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""Run summaries aggregated from per-slide timings and usage."""
+
+import json
+import math
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Per-slide stages timed by the pipeline, in pipeline order
+STAGES = ("queue_wait", "prompt", "image", "decode", "encode", "write", "renditions")
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of ``values``."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return round(ordered[rank - 1], 4)
+
+
+def run_summary(results: List, seconds: Optional[float] = None) -> Dict[str, Any]:
+    """Aggregate a run's results into totals and per-stage statistics.
+
+    Slides that shared an identical slide's generation are counted but add
+    no time, tokens or cost. ``cost_usd`` is None when no slide could be
+    priced; ``unpriced_slides`` counts slides using a model of unknown price.
+    """
+    generated = [r for r in results if not r.coalesced]
+    stages = {}
+    for stage in STAGES:
+        values = [r.timings[stage] for r in generated if stage in r.timings]
+        if values:
+            stages[stage] = {
+                "total": round(sum(values), 4),
+                "mean": round(sum(values) / len(values), 4),
+                "p95": percentile(values, 0.95),
+                "max": round(max(values), 4),
+            }
+
+    costs = [r.cost for r in generated if r.cost is not None]
+    succeeded = sum(1 for r in results if r.success)
+    return {
+        "slides": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "coalesced": len(results) - len(generated),
+        "seconds": round(seconds, 4) if seconds is not None else None,
+        "slides_per_second": round(len(results) / seconds, 3) if seconds else None,
+        "stages": stages,
+        "input_tokens": round(sum(r.input_tokens for r in generated)),
+        "output_tokens": round(sum(r.output_tokens for r in generated)),
+        "image_bytes": sum(r.image_bytes for r in generated),
+        "bytes_written": sum(r.bytes_written for r in generated),
+        "cost_usd": round(sum(costs), 4) if costs else None,
+        "unpriced_slides": len(generated) - len(costs),
+        "cache_hits": sum((r.prompt_cache == "hit") + (r.image_cache == "hit") for r in generated),
+        "retries": sum(max(0, r.prompt_attempts - 1) + max(0, r.image_attempts - 1) for r in generated),
+        "backoff_seconds": round(sum(r.backoff_seconds for r in generated), 4),
+    }
+
+
+def write_summary_json(path: Path, summary: Dict[str, Any]) -> Path:
+    """Write a run summary as JSON."""
+    path.write_text(json.dumps(summary, indent=2) + "\n", encoding="utf-8")
+    return path
@@ -1,15 +1,45 @@
-"""AI Provider implementations for different services."""
+"""AI Provider implementations for different services.
 
-from .base import AIProvider
-from .openai_provider import OpenAIProvider
-from .gemini_provider import GeminiProvider
-from .ollama_provider import OllamaProvider
-from .lmstudio_provider import LMStudioProvider
+Provider modules are imported on first use: ``provider_class("openai")``
+or ``from slide_gen.providers import OpenAIProvider`` loads only that
+provider (and aiohttp), not every other one.
+"""
+
+import importlib
+
+# Provider name -> (module, class)
+PROVIDERS = {
+    "openai": ("openai_provider", "OpenAIProvider"),
+    "gemini": ("gemini_provider", "GeminiProvider"),
+    "ollama": ("ollama_provider", "OllamaProvider"),
+    "lmstudio": ("lmstudio_provider", "LMStudioProvider"),
+    "mock": ("mock_provider", "MockProvider"),
+}
+
+_CLASSES = {class_name: module for module, class_name in PROVIDERS.values()}
+_CLASSES.update(AIProvider="base", FailoverProvider="failover")
 
 __all__ = [
     "AIProvider",
     "OpenAIProvider", 
     "GeminiProvider",
     "OllamaProvider",
-    "LMStudioProvider"
-]
\ No newline at end of file
+    "LMStudioProvider",
+    "MockProvider",
+    "PROVIDERS",
+    "provider_class",
+]
+
+
+def provider_class(name: str):
+    """Import and return the provider class registered under ``name``."""
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown provider: {name}")
+    module, class_name = PROVIDERS[name]
+    return getattr(importlib.import_module(f".{module}", __name__), class_name)
+
+
+def __getattr__(name):
+    if name in _CLASSES:
+        return getattr(importlib.import_module(f".{_CLASSES[name]}", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
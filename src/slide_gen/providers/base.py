@@ -1,9 +1,20 @@
 """Abstract base class for AI providers."""
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List
-from dataclasses import dataclass
+from typing import AsyncContextManager, Awaitable, Dict, Any, Optional, List, Tuple
+from pathlib import Path
+from dataclasses import dataclass, replace
 import asyncio
+import time
+import json
+import re
+
+import aiohttp
+
+from ..telemetry import get_telemetry
+from .pricing import estimate_cost
+from .retry import RETRYABLE_STATUS, RetryPolicy, RetryBudget, parse_retry_after, retry_call
+from .prompt_stream import TIME_CAP, StreamedPrompt, estimate_tokens
 
 
 @dataclass
@@ -24,6 +35,8 @@ class ImageRequest:
     aspect_ratio: str = "16:9"
     quality: str = "standard"
     size: Optional[str] = None
+    n: int = 1  # number of variants to generate
+    spool_dir: Optional[Path] = None  # stream decoded images to temp files here when supported
 
 
 @dataclass
@@ -32,18 +45,171 @@ class AIResponse:
     success: bool
     content: Optional[str] = None
     image_data: Optional[bytes] = None
+    images: Optional[List[bytes]] = None  # every variant; image_data is the first
+    image_files: Optional[List[Path]] = None  # spooled temp files instead of in-memory bytes
     error: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
+    status: Optional[int] = None
+    retryable: bool = False
+    retry_after: Optional[float] = None
+
+
+@dataclass
+class WarmUp:
+    """Outcome of loading a local model before the first request."""
+    model: Optional[str]
+    seconds: float
+    error: Optional[str] = None
+
+    def __str__(self) -> str:
+        if self.error:
+            return f"Warm-up: could not load {self.model}: {self.error}"
+        return f"Warm-up: {self.model} ready in {self.seconds:.1f}s"
+
+
+BATCH_SYSTEM_PROMPT = """You are a creative prompt engineer specializing in visual metaphors for presentations. 
+Create compelling, artistic landscape photography prompts that metaphorically represent concepts.
+Focus on real-world photography, not illustrations or paintings.
+Always specify 16:9 aspect ratio in your prompts.
+Respond with JSON only, in the form {"prompts": [{"index": 0, "prompt": "..."}]}, one entry per slide."""
+
+
+def format_batch_prompt(requests: List[PromptRequest]) -> str:
+    """Build the user message asking for one prompt per slide."""
+    first = requests[0]
+    lines = [
+        "Create a single, visually striking landscape photography prompt for each slide below, "
+        "metaphorically representing its title.",
+        f"Theme: {first.theme or 'Professional, modern'}",
+        f"Style preferences: {first.style or 'Professional, metaphorical, landscape photography'}",
+        "",
+        "Slides:",
+    ]
+    for index, request in enumerate(requests):
+        line = f"{index}. {request.slide_title}"
+        if request.slide_content:
+            line += f" (context: {request.slide_content})"
+        lines.append(line)
+    lines.append("")
+    lines.append("Make each prompt detailed and specific for a photographer.")
+    return "\n".join(lines)
+
+
+def parse_batch_prompts(text: str, count: int) -> Dict[int, str]:
+    """Extract prompts by slide index from a batch JSON reply.
+    
+    Entries that are missing or malformed are left out so the caller can
+    fall back to single-slide requests for them.
+    """
+    # Tolerate replies wrapped in a markdown code fence
+    text = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip())
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return {}
+    
+    entries = data.get("prompts", []) if isinstance(data, dict) else data
+    if not isinstance(entries, list):
+        return {}
+    
+    prompts = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        index, prompt = entry.get("index"), entry.get("prompt")
+        if isinstance(index, int) and 0 <= index < count and isinstance(prompt, str) and prompt.strip():
+            prompts[index] = prompt.strip()
+    return prompts
+
+
+def openai_tokens(result: Dict[str, Any]) -> Tuple[int, int]:
+    """(input, output) token counts from an OpenAI-compatible chat response."""
+    usage = result.get("usage") or {}
+    return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
 
 
 class AIProvider(ABC):
     """Abstract base class for AI providers."""
     
+    local = False  # runs on this machine, so requests cost nothing
+    
     def __init__(self, config: Dict[str, Any]):
         """Initialize the provider with configuration."""
         self.config = config
         self.name = self.__class__.__name__
         
+        # Connection pool settings for the shared session
+        self.connection_limit = config.get("connection_limit", 10)
+        self.keepalive_timeout = config.get("keepalive_timeout", 30)
+        self.dns_cache_ttl = config.get("dns_cache_ttl", 300)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_users = 0
+        self._warming: Optional[asyncio.Future] = None
+        
+        # Retries for transient failures; the budget may be shared across providers
+        self.retry_policy = RetryPolicy(
+            max_retries=config.get("max_retries", 3),
+            base_delay=config.get("retry_base_delay", 1.0),
+            max_delay=config.get("retry_max_delay", 30.0),
+        )
+        self.retry_budget: Optional[RetryBudget] = config.get("retry_budget")
+        
+        # Streamed prompts stop at the first complete paragraph or after prompt_time_cap seconds
+        self.stream = config.get("stream", False)
+        self.prompt_time_cap: Optional[float] = config.get("prompt_time_cap")
+        
+    async def __aenter__(self) -> "AIProvider":
+        """Open the shared session for the duration of a run."""
+        self._session_users += 1
+        self.get_session()
+        return self
+        
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        """Close the shared session once the last user leaves."""
+        self._session_users = max(0, self._session_users - 1)
+        if self._session_users == 0:
+            await self.close()
+        
+    def get_session(self) -> aiohttp.ClientSession:
+        """Return the pooled session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=self.connection_limit,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+        
+    async def close(self) -> None:
+        """Close the pooled session and its connections."""
+        if self._warming is not None and not self._warming.done():
+            self._warming.cancel()
+        self._warming = None
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        
+    async def warm_up(self) -> Optional[WarmUp]:
+        """Load the model before the first request.
+        
+        Runs load_model once per session; concurrent callers wait for the
+        same load and get the same outcome (None when there is nothing to
+        load). A failed warm-up is not fatal, requests will simply pay the
+        load time themselves.
+        """
+        if self._warming is None:
+            self._warming = asyncio.ensure_future(self.load_model())
+        return await asyncio.shield(self._warming)
+        
+    async def load_model(self) -> Optional[WarmUp]:
+        """Ask the server to load the configured model; hosted APIs need nothing."""
+        return None
+        
+    def parallel_slots(self) -> Optional[int]:
+        """Requests the server processes at once, if it is a local server with a fixed number."""
+        return None
+        
     @abstractmethod
     async def generate_prompt(self, request: PromptRequest) -> AIResponse:
         """Generate a creative visual prompt for the slide content."""
@@ -54,6 +220,179 @@ class AIProvider(ABC):
         """Generate an image from the prompt."""
         pass
         
+    async def generate_prompt_with_retry(self, request: PromptRequest,
+                                         lane: Optional[AsyncContextManager] = None) -> AIResponse:
+        """Generate a prompt, retrying transient failures; each attempt waits for ``lane``."""
+        return await retry_call(lambda: self.observed("prompt", self.generate_prompt(request)),
+                                self.retry_policy, self.retry_budget, lane)
+        
+    async def generate_image_with_retry(self, request: ImageRequest,
+                                        lane: Optional[AsyncContextManager] = None) -> AIResponse:
+        """Generate an image, retrying transient failures; each attempt waits for ``lane``."""
+        return await retry_call(lambda: self.observed("image", self.generate_image(request)),
+                                self.retry_policy, self.retry_budget, lane)
+        
+    async def observed(self, operation: str, call: Awaitable[AIResponse]) -> AIResponse:
+        """Await one provider call, recording a span and request metrics when telemetry is on."""
+        telemetry = get_telemetry()
+        if not telemetry.enabled:
+            return await call
+        
+        labels = dict(provider=self.name, operation=operation)
+        telemetry.add("slide_gen_provider_in_flight", 1, **labels)
+        started = time.perf_counter()
+        status = "error"
+        try:
+            with telemetry.span(f"{self.name} {operation}", kind="client",
+                                provider=self.name, operation=operation,
+                                model=self.model_for("image" if operation == "image" else "prompt")) as span:
+                response = await call
+                status = "ok" if response.success else str(response.status or "error")
+                metadata = response.metadata or {}
+                span.set(status=status, input_tokens=metadata.get("input_tokens"),
+                         output_tokens=metadata.get("output_tokens"), images=metadata.get("images"))
+                if not response.success:
+                    span.fail(response.error or status)
+        finally:
+            telemetry.add("slide_gen_provider_in_flight", -1, **labels)
+            telemetry.observe("slide_gen_provider_request_seconds", time.perf_counter() - started, **labels)
+            telemetry.count("slide_gen_provider_requests_total", status=status, **labels)
+        
+        if response.success and operation == "image":
+            received = sum(image.stat().st_size if isinstance(image, Path) else len(image)
+                           for image in response.image_files or response.images or [response.image_data]
+                           if image is not None)
+            telemetry.count("slide_gen_provider_bytes_total", received, **labels)
+        return response
+        
+    def max_images_per_request(self) -> int:
+        """Largest ``n`` a single generate_image call accepts."""
+        return 1
+        
+    async def generate_variants(self, request: ImageRequest,
+                                lane: Optional[AsyncContextManager] = None) -> AIResponse:
+        """Generate ``request.n`` images, with retries.
+        
+        Asks for as many images per call as the API allows and splits the
+        rest into parallel calls, each of which takes its own ``lane`` slot.
+        Succeeds if at least one variant was made.
+        """
+        if request.n <= 1:
+            return await self.generate_image_with_retry(request, lane)
+        
+        per_call = max(1, self.max_images_per_request())
+        counts = [min(per_call, request.n - start) for start in range(0, request.n, per_call)]
+        responses = await asyncio.gather(*(
+            self.generate_image_with_retry(replace(request, n=count), lane) for count in counts))
+        
+        images = []
+        image_files = []
+        for response in responses:
+            if response.success and response.image_files:
+                image_files.extend(response.image_files)
+            elif response.success:
+                images.extend(response.images or [response.image_data])
+        metadata = {
+            "attempts": max((r.metadata or {}).get("attempts", 1) for r in responses),
+            "backoff_seconds": sum((r.metadata or {}).get("backoff_seconds", 0.0) for r in responses),
+            "model": next(((r.metadata or {}).get("model") for r in responses if r.success), None),
+            "images": len(images) + len(image_files),
+        }
+        costs = [(r.metadata or {}).get("cost") for r in responses if r.success]
+        metadata["cost"] = None if None in costs else sum(costs)
+        if not images and not image_files:
+            failed = responses[0]
+            failed.metadata = metadata
+            return failed
+        return AIResponse(success=True,
+                          image_data=images[0] if images else None,
+                          images=images or None,
+                          image_files=image_files or None,
+                          metadata=metadata)
+        
+    def supports_batch_prompts(self) -> bool:
+        """Return True if generate_prompt_batch is implemented."""
+        return False
+        
+    async def generate_prompt_batch(self, requests: List[PromptRequest]) -> AIResponse:
+        """Request prompts for several slides in one call.
+        
+        The response content is the raw JSON reply for parse_batch_prompts.
+        """
+        raise NotImplementedError(f"{self.name} does not support batch prompts")
+        
+    async def generate_prompts(self, requests: List[PromptRequest],
+                               lane: Optional[AsyncContextManager] = None) -> List[AIResponse]:
+        """Generate prompts for several slides, with retries.
+        
+        Uses one batch call when the provider supports it and the requests
+        share a theme and style. Any slide missing from the batch reply falls
+        back to its own generate_prompt call. Every call takes its own
+        ``lane`` slot.
+        """
+        parsed: Dict[int, str] = {}
+        batch_metadata: Dict[str, Any] = {}
+        batchable = (len(requests) > 1 and self.supports_batch_prompts()
+                     and len({(r.theme, r.style) for r in requests}) == 1)
+        if batchable:
+            batch = await retry_call(lambda: self.observed("prompt_batch", self.generate_prompt_batch(requests)),
+                                     self.retry_policy, self.retry_budget, lane)
+            if batch.success:
+                parsed = parse_batch_prompts(batch.content or "", len(requests))
+            batch_metadata = dict(batch.metadata or {}, batched=True)
+            # Each slide the batch answered carries its share of the usage;
+            # the others pay for their own fallback calls
+            for key in ("input_tokens", "output_tokens", "cost"):
+                if parsed and batch_metadata.get(key) is not None:
+                    batch_metadata[key] = batch_metadata[key] / len(parsed)
+        
+        async def single(index: int, request: PromptRequest) -> AIResponse:
+            if index in parsed:
+                return AIResponse(success=True, content=parsed[index], metadata=batch_metadata)
+            return await self.generate_prompt_with_retry(request, lane)
+        
+        return list(await asyncio.gather(*(single(i, r) for i, r in enumerate(requests))))
+        
+    def usage_metadata(self, model: Optional[str], input_tokens: float = 0,
+                       output_tokens: float = 0, images: int = 0) -> Dict[str, Any]:
+        """Response metadata recording usage and its estimated cost (None if unknown)."""
+        return {
+            "model": model,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "images": images,
+            "cost": 0.0 if self.local else estimate_cost(model, input_tokens, output_tokens, images),
+        }
+        
+    def streamed_response(self, streamed: StreamedPrompt, model: Optional[str],
+                          input_tokens: float = 0, output_tokens: float = 0,
+                          request_text: str = "") -> AIResponse:
+        """Build an AIResponse from a streamed prompt.
+        
+        Streams stopped early report no usage, so tokens are then estimated
+        from ``request_text`` and the prompt. Prompts cut off by the time
+        cap are marked partial (and are not cached).
+        """
+        if not streamed.content:
+            error = (f"No prompt within {self.prompt_time_cap:g}s" if streamed.stop_reason == TIME_CAP
+                     else "Empty prompt")
+            return AIResponse(success=False, error=error, retryable=True)
+        metadata = self.usage_metadata(model, input_tokens or estimate_tokens(request_text),
+                                       output_tokens or estimate_tokens(streamed.content))
+        metadata.update(stop_reason=streamed.stop_reason, partial=streamed.stop_reason == TIME_CAP)
+        return AIResponse(success=True, content=streamed.content, metadata=metadata)
+        
+    async def error_response(self, response: aiohttp.ClientResponse) -> AIResponse:
+        """Build a failed AIResponse from a non-200 HTTP response."""
+        error_text = await response.text()
+        return AIResponse(
+            success=False,
+            error=f"API error {response.status}: {error_text}",
+            status=response.status,
+            retryable=response.status in RETRYABLE_STATUS,
+            retry_after=parse_retry_after(response.headers.get("Retry-After")),
+        )
+        
     @abstractmethod
     def supports_image_generation(self) -> bool:
         """Return True if this provider supports image generation."""
@@ -64,16 +403,37 @@ class AIProvider(ABC):
         """Return True if this provider supports prompt generation."""
         pass
         
+    def model_for(self, stage: str) -> Optional[str]:
+        """Return the model used for "prompt" or "image" requests."""
+        if stage == "image":
+            return getattr(self, "image_model", None)
+        return getattr(self, "prompt_model", None) or getattr(self, "model", None)
+        
     def validate_config(self) -> bool:
         """Validate the provider configuration."""
         return True
         
+    def health_endpoint(self) -> Optional[Tuple[str, Dict[str, str]]]:
+        """URL and headers of a cheap GET that proves the API is up, or None."""
+        return None
+        
+    def available_models(self, data: Any) -> List[str]:
+        """Model names from the health endpoint's JSON (OpenAI-style listing)."""
+        return [model.get("id", "") for model in (data or {}).get("data", [])]
+        
+    def configured_models(self) -> List[str]:
+        """Models this provider is set up to use, for availability checks."""
+        models = []
+        if self.supports_prompt_generation():
+            models.append(self.model_for("prompt"))
+        if self.supports_image_generation():
+            models.append(self.model_for("image"))
+        return [model for model in dict.fromkeys(models) if model]
+        
+    def model_available(self, model: str, available: List[str]) -> bool:
+        return model in available
+        
     async def health_check(self) -> bool:
-        """Check if the provider is available and healthy."""
-        try:
-            # Simple test request
-            test_request = PromptRequest(slide_title="Test")
-            response = await self.generate_prompt(test_request)
-            return response.success
-        except Exception:
-            return False
\ No newline at end of file
+        """Check if the provider is available and healthy, without generating anything."""
+        from .health import probe
+        return (await probe(self)).healthy
\ No newline at end of file
@@ -0,0 +1,200 @@
+"""Circuit breakers and ordered failover across providers."""
+
+import time
+from dataclasses import replace
+from typing import Any, Awaitable, Dict, List, Optional
+
+from .base import AIProvider, PromptRequest, ImageRequest, AIResponse, WarmUp
+from .retry import is_transient
+
+
+class CircuitBreaker:
+    """Stops calling a provider after repeated consecutive failures.
+
+    Closed: calls pass through. Open: calls are rejected until
+    ``reset_timeout`` has elapsed. Half-open: a single probe call is let
+    through; success closes the breaker, failure opens it again.
+
+    Failures without an HTTP answer (unreachable, timed out) and transient
+    ones (429, 5xx) count; a request the provider rejects (a bad prompt, a
+    content-policy refusal) says nothing about its health.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow(self) -> bool:
+        """Return True if a call may be attempted now."""
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            # Let exactly one probe through
+            self.state = self.HALF_OPEN
+            return True
+        return self.state == self.CLOSED
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def trip(self) -> None:
+        """Open the breaker now, e.g. after a failed pre-flight probe."""
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class FailoverProvider(AIProvider):
+    """Tries an ordered chain of providers, skipping any whose breaker is open.
+
+    Batching (prompt batches, images per request) follows the member calls
+    currently go to, so a chain batches like its healthy primary does.
+    """
+
+    def __init__(self, providers: List[AIProvider], config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        super().__init__(config)
+        if not providers:
+            raise ValueError("Failover chain needs at least one provider")
+        self.providers = providers
+        self.breakers = [
+            CircuitBreaker(config.get("breaker_threshold", 3),
+                           config.get("breaker_reset_seconds", 30.0))
+            for _ in providers
+        ]
+        self.name = " → ".join(provider.name for provider in providers)
+
+    async def __aenter__(self) -> "FailoverProvider":
+        for provider in self.providers:
+            await provider.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        for provider in self.providers:
+            await provider.__aexit__(exc_type, exc, tb)
+
+    async def close(self) -> None:
+        for provider in self.providers:
+            await provider.close()
+        await super().close()
+
+    def supports_image_generation(self) -> bool:
+        return any(provider.supports_image_generation() for provider in self.providers)
+
+    def supports_prompt_generation(self) -> bool:
+        return any(provider.supports_prompt_generation() for provider in self.providers)
+
+    def model_for(self, stage: str) -> Optional[str]:
+        models = [provider.model_for(stage) or "" for provider in self.providers]
+        return " → ".join(models)
+
+    async def generate_prompt(self, request: PromptRequest) -> AIResponse:
+        """Generate a prompt with the first available provider in the chain."""
+        return await self._call("prompt", request)
+
+    async def generate_image(self, request: ImageRequest) -> AIResponse:
+        """Generate an image with the first available provider in the chain."""
+        return await self._call("image", request)
+
+    def supports_batch_prompts(self) -> bool:
+        active = self._active("prompt")
+        return active is not None and active.supports_batch_prompts()
+
+    async def generate_prompt_batch(self, requests: List[PromptRequest]) -> AIResponse:
+        """Generate a prompt batch with the first available provider that batches."""
+        return await self._call("prompt_batch", requests)
+
+    def max_images_per_request(self) -> int:
+        active = self._active("image")
+        return active.max_images_per_request() if active is not None else 1
+
+    async def load_model(self) -> Optional[WarmUp]:
+        # Only the first usable provider: loading fallbacks would compete for memory
+        for provider, breaker in zip(self.providers, self.breakers):
+            if provider.supports_prompt_generation() and breaker.state == CircuitBreaker.CLOSED:
+                return await provider.warm_up()
+        return None
+
+    def parallel_slots(self) -> Optional[int]:
+        active = self._active("prompt")
+        return active.parallel_slots() if active is not None else None
+
+    async def observed(self, operation: str, call: Awaitable[AIResponse]) -> AIResponse:
+        # Each provider in the chain records its own calls
+        return await call
+
+    async def health_check(self) -> bool:
+        for provider in self.providers:
+            if await provider.health_check():
+                return True
+        return False
+
+    def _supports(self, provider: AIProvider, stage: str) -> bool:
+        if stage == "image":
+            return provider.supports_image_generation()
+        if stage == "prompt_batch":
+            return provider.supports_batch_prompts()
+        return provider.supports_prompt_generation()
+
+    def _active(self, stage: str) -> Optional[AIProvider]:
+        """The member the next call for a stage goes to, judged without probing any breaker."""
+        supported = [(provider, breaker) for provider, breaker in zip(self.providers, self.breakers)
+                     if self._supports(provider, stage)]
+        for provider, breaker in supported:
+            if breaker.state == CircuitBreaker.CLOSED:
+                return provider
+        return supported[0][0] if supported else None
+
+    async def _call(self, stage: str, request) -> AIResponse:
+        errors = []
+        retryable = False
+        retry_after = None
+        for provider, breaker in zip(self.providers, self.breakers):
+            if not self._supports(provider, stage):
+                continue
+            if not breaker.allow():
+                errors.append(f"{provider.name}: circuit open")
+                continue
+
+            if stage == "image":
+                # A fallback may take fewer images per call than the primary;
+                # it returns what it can and generate_variants keeps those
+                member_request = replace(request, n=min(request.n, provider.max_images_per_request()))
+                response = await provider.observed("image", provider.generate_image(member_request))
+            elif stage == "prompt_batch":
+                response = await provider.observed("prompt_batch", provider.generate_prompt_batch(request))
+            else:
+                response = await provider.observed("prompt", provider.generate_prompt(request))
+
+            if response.success:
+                breaker.record_success()
+                response.metadata = dict(response.metadata or {}, provider=provider.name)
+                return response
+
+            if response.status is not None and not is_transient(response):
+                # The provider answered, it just refused this request
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+            errors.append(f"{provider.name}: {response.error}")
+            retryable = retryable or response.retryable
+            if response.retry_after is not None:
+                retry_after = min(retry_after or response.retry_after, response.retry_after)
+
+        return AIResponse(
+            success=False,
+            error="All providers failed: " + "; ".join(errors) if errors else "No provider available",
+            retryable=retryable,
+            retry_after=retry_after,
+        )
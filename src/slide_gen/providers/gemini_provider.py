@@ -2,11 +2,12 @@
 
 import os
 import base64
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 import aiohttp
 import asyncio
 
-from .base import AIProvider, PromptRequest, ImageRequest, AIResponse
+from .base import AIProvider, PromptRequest, ImageRequest, AIResponse, BATCH_SYSTEM_PROMPT, format_batch_prompt
+from .streaming import stream_base64_images
 
 
 class GeminiProvider(AIProvider):
@@ -28,6 +29,26 @@ class GeminiProvider(AIProvider):
         
     def supports_prompt_generation(self) -> bool:
         return True
+        
+    def supports_batch_prompts(self) -> bool:
+        return True
+        
+    def max_images_per_request(self) -> int:
+        # Imagen returns at most four samples per prediction request
+        return 4
+    
+    def health_endpoint(self):
+        return f"{self.base_url}/models?pageSize=1000&key={self.api_key}", {}
+    
+    def available_models(self, data) -> List[str]:
+        # Listed as "models/gemini-2.0-flash"
+        return [model.get("name", "").split("/")[-1] for model in (data or {}).get("models", [])]
+    
+    def token_metadata(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Usage metadata from a generateContent response."""
+        usage = result.get("usageMetadata") or {}
+        return self.usage_metadata(self.model, usage.get("promptTokenCount", 0),
+                                   usage.get("candidatesTokenCount", 0))
     
     async def generate_prompt(self, request: PromptRequest) -> AIResponse:
         """Generate a creative visual prompt using Gemini."""
@@ -62,21 +83,61 @@ class GeminiProvider(AIProvider):
         headers = {"Content-Type": "application/json"}
         
         try:
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
-                async with session.post(url, headers=headers, json=payload) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        content = result["candidates"][0]["content"]["parts"][0]["text"]
-                        return AIResponse(success=True, content=content.strip())
-                    else:
-                        error_text = await response.text()
-                        return AIResponse(success=False, error=f"API error {response.status}: {error_text}")
+            session = self.get_session()
+            async with session.post(url, headers=headers, json=payload, timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    content = result["candidates"][0]["content"]["parts"][0]["text"]
+                    return AIResponse(success=True, content=content.strip(),
+                                      metadata=self.token_metadata(result))
+                else:
+                    return await self.error_response(response)
                         
         except asyncio.TimeoutError:
-            return AIResponse(success=False, error="Request timed out")
+            return AIResponse(success=False, error="Request timed out", retryable=True)
+        except aiohttp.ClientError as e:
+            return AIResponse(success=False, error=f"Connection error: {str(e)}", retryable=True)
         except Exception as e:
             return AIResponse(success=False, error=f"Error generating prompt: {str(e)}")
     
+    async def generate_prompt_batch(self, requests: List[PromptRequest]) -> AIResponse:
+        """Generate prompts for several slides in one generateContent call."""
+        url = f"{self.base_url}/models/{self.model}:generateContent?key={self.api_key}"
+        
+        payload = {
+            "contents": [{
+                "parts": [{"text": format_batch_prompt(requests)}]
+            }],
+            "systemInstruction": {
+                "parts": [{"text": BATCH_SYSTEM_PROMPT}]
+            },
+            "generationConfig": {
+                "temperature": 0.7,
+                "maxOutputTokens": 150 * len(requests) + 50,
+                "responseMimeType": "application/json"
+            }
+        }
+        
+        headers = {"Content-Type": "application/json"}
+        
+        try:
+            session = self.get_session()
+            async with session.post(url, headers=headers, json=payload, timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    content = result["candidates"][0]["content"]["parts"][0]["text"]
+                    return AIResponse(success=True, content=content,
+                                      metadata=self.token_metadata(result))
+                else:
+                    return await self.error_response(response)
+                        
+        except asyncio.TimeoutError:
+            return AIResponse(success=False, error="Request timed out", retryable=True)
+        except aiohttp.ClientError as e:
+            return AIResponse(success=False, error=f"Connection error: {str(e)}", retryable=True)
+        except Exception as e:
+            return AIResponse(success=False, error=f"Error generating prompts: {str(e)}")
+    
     async def generate_image(self, request: ImageRequest) -> AIResponse:
         """Generate an image using Imagen."""
         url = f"{self.base_url}/models/{self.image_model}:predict?key={self.api_key}"
@@ -91,7 +152,7 @@ class GeminiProvider(AIProvider):
                 }
             ],
             "parameters": {
-                "sampleCount": 1,
+                "sampleCount": request.n,
                 "aspectRatio": "16:9"
             }
         }
@@ -99,26 +160,35 @@ class GeminiProvider(AIProvider):
         headers = {"Content-Type": "application/json"}
         
         try:
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=120)) as session:
-                async with session.post(url, headers=headers, json=payload) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        # Imagen returns image data in predictions format
-                        if "predictions" in result and result["predictions"]:
-                            prediction = result["predictions"][0]
-                            if "bytesBase64Encoded" in prediction:
-                                image_b64 = prediction["bytesBase64Encoded"]
-                                image_data = base64.b64decode(image_b64)
-                                return AIResponse(success=True, image_data=image_data)
-                            else:
-                                return AIResponse(success=False, error="No image data in prediction")
+            session = self.get_session()
+            async with session.post(url, headers=headers, json=payload, timeout=aiohttp.ClientTimeout(total=120)) as response:
+                if response.status == 200 and request.spool_dir is not None:
+                    # Decode straight to disk instead of holding the JSON in memory
+                    image_files = await stream_base64_images(response, "bytesBase64Encoded", request.spool_dir)
+                    if not image_files:
+                        return AIResponse(success=False, error="No predictions in response")
+                    return AIResponse(success=True, image_files=image_files,
+                                      metadata=self.usage_metadata(self.image_model, images=len(image_files)))
+                elif response.status == 200:
+                    result = await response.json()
+                    # Imagen returns image data in predictions format
+                    if "predictions" in result and result["predictions"]:
+                        images = [base64.b64decode(prediction["bytesBase64Encoded"])
+                                  for prediction in result["predictions"]
+                                  if "bytesBase64Encoded" in prediction]
+                        if images:
+                            return AIResponse(success=True, image_data=images[0], images=images,
+                                              metadata=self.usage_metadata(self.image_model, images=len(images)))
                         else:
-                            return AIResponse(success=False, error="No predictions in response")
+                            return AIResponse(success=False, error="No image data in prediction")
                     else:
-                        error_text = await response.text()
-                        return AIResponse(success=False, error=f"API error {response.status}: {error_text}")
+                        return AIResponse(success=False, error="No predictions in response")
+                else:
+                    return await self.error_response(response)
                         
         except asyncio.TimeoutError:
-            return AIResponse(success=False, error="Image generation timed out")
+            return AIResponse(success=False, error="Image generation timed out", retryable=True)
+        except aiohttp.ClientError as e:
+            return AIResponse(success=False, error=f"Connection error: {str(e)}", retryable=True)
         except Exception as e:
             return AIResponse(success=False, error=f"Error generating image: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,162 @@
+"""Provider health probes and pre-flight checks."""
+
+import asyncio
+import ssl
+import time
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from .base import AIProvider
+
+
+@dataclass
+class HealthReport:
+    """Outcome of probing one provider."""
+    provider: str
+    healthy: bool
+    url: Optional[str] = None
+    status: Optional[int] = None
+    latency: Optional[float] = None  # seconds for the probe request's round trip
+    connect_seconds: Optional[float] = None  # TCP connect, including DNS
+    tls_seconds: Optional[float] = None  # TLS handshake, for https endpoints
+    models: Dict[str, bool] = field(default_factory=dict)  # configured model -> available
+    error: Optional[str] = None
+
+
+async def measure_connection(url: str, timeout: float) -> Tuple[float, Optional[float]]:
+    """Time a fresh TCP connect and TLS handshake to the host serving ``url``."""
+    parts = urlsplit(url)
+    secure = parts.scheme == "https"
+    port = parts.port or (443 if secure else 80)
+    loop = asyncio.get_running_loop()
+
+    started = time.perf_counter()
+    transport, protocol = await asyncio.wait_for(
+        loop.create_connection(asyncio.Protocol, parts.hostname, port), timeout)
+    try:
+        connect_seconds = time.perf_counter() - started
+        tls_seconds = None
+        if secure:
+            started = time.perf_counter()
+            transport = await asyncio.wait_for(loop.start_tls(
+                transport, protocol, ssl.create_default_context(), server_hostname=parts.hostname), timeout)
+            tls_seconds = time.perf_counter() - started
+    finally:
+        transport.close()
+    return connect_seconds, tls_seconds
+
+
+async def probe(provider: AIProvider, timeout: float = 10.0) -> HealthReport:
+    """Probe a provider through its cheapest endpoint, usually a model listing.
+
+    Healthy means the endpoint answered 200 and every configured model is
+    listed. Providers without a probe endpoint are assumed healthy.
+    """
+    endpoint = provider.health_endpoint()
+    if endpoint is None:
+        return HealthReport(provider.name, True)
+    url, headers = endpoint
+    report = HealthReport(provider.name, False, url=url.split("?")[0])
+
+    try:
+        report.connect_seconds, report.tls_seconds = await measure_connection(url, timeout)
+        started = time.perf_counter()
+        async with provider.get_session().get(url, headers=headers,
+                                              timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            report.status = response.status
+            data = await response.json(content_type=None) if response.status == 200 else None
+            report.latency = time.perf_counter() - started
+            if response.status != 200:
+                report.error = f"HTTP {response.status}: {(await response.text())[:200]}"
+                return report
+    except (aiohttp.ClientError, asyncio.TimeoutError, OSError, ValueError) as e:
+        report.error = str(e) or type(e).__name__
+        return report
+
+    available = provider.available_models(data)
+    for model in provider.configured_models():
+        report.models[model] = provider.model_available(model, available)
+    missing = [model for model, found in report.models.items() if not found]
+    if missing:
+        report.error = f"Model not available: {', '.join(missing)}"
+    report.healthy = not missing
+    return report
+
+
+def chain_members(provider: AIProvider) -> List[AIProvider]:
+    """The providers behind a provider: a failover chain's members, or itself."""
+    return list(getattr(provider, "providers", None) or [provider])
+
+
+async def probe_all(providers: List[AIProvider], deadline: float = 10.0) -> List[HealthReport]:
+    """Probe providers concurrently, giving up on any not done by ``deadline`` seconds."""
+    members = []
+    for provider in providers:
+        for member in chain_members(provider):
+            if member not in members:
+                members.append(member)
+
+    tasks = [asyncio.ensure_future(probe(member, deadline)) for member in members]
+    done, pending = await asyncio.wait(tasks, timeout=deadline) if tasks else (set(), set())
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+    reports = []
+    for member, task in zip(members, tasks):
+        if task in pending:
+            reports.append(HealthReport(member.name, False, error=f"No answer within {deadline:g}s"))
+        elif task.exception() is not None:
+            reports.append(HealthReport(member.name, False, error=str(task.exception())))
+        else:
+            reports.append(task.result())
+    return reports
+
+
+async def preflight(provider: AIProvider, deadline: float = 10.0) -> List[HealthReport]:
+    """Probe a provider before a run and route around dead ones.
+
+    Dead members of a failover chain have their circuit breaker opened, so
+    the run skips them until the breaker's reset timeout lets a call probe
+    them again. Raises RuntimeError if no provider in the chain is healthy.
+    """
+    reports = await probe_all([provider], deadline)
+    breakers = getattr(provider, "breakers", None)
+    for index, report in enumerate(reports):
+        if not report.healthy:
+            print(f"Pre-flight: {report.provider} unavailable ({report.error}), skipping")
+            if breakers:
+                breakers[index].trip()
+    if not any(report.healthy for report in reports):
+        errors = "; ".join(f"{report.provider}: {report.error}" for report in reports)
+        raise RuntimeError(f"No healthy provider for {provider.name}: {errors}")
+    return reports
+
+
+async def preflight_providers(providers: List[AIProvider], deadline: float = 10.0) -> None:
+    """Run ``preflight`` on several providers at once, e.g. the prompt and image providers."""
+    async with AsyncExitStack() as stack:
+        for provider in providers:
+            await stack.enter_async_context(provider)
+        await asyncio.gather(*(preflight(provider, deadline) for provider in providers))
+
+
+def format_report(report: HealthReport) -> str:
+    """One line describing a probe result."""
+    def ms(seconds: Optional[float]) -> str:
+        return "-" if seconds is None else f"{seconds * 1000:.0f}ms"
+
+    line = f"{'✓' if report.healthy else '✗'} {report.provider}"
+    if report.url:
+        line += (f" {report.url}: {ms(report.latency)} round trip "
+                 f"(connect {ms(report.connect_seconds)}, TLS {ms(report.tls_seconds)})")
+    if report.models:
+        line += "; models: " + ", ".join(f"{model} {'✓' if found else '✗'}"
+                                         for model, found in report.models.items())
+    if report.error and not report.healthy:
+        line += f" - {report.error}"
+    return line
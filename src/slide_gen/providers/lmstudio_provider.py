@@ -1,21 +1,31 @@
 """LM Studio provider implementation for local AI models."""
 
 import os
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, List, Optional
 import aiohttp
 import asyncio
 
-from .base import AIProvider, PromptRequest, ImageRequest, AIResponse
+from .base import AIProvider, PromptRequest, ImageRequest, AIResponse, WarmUp, openai_tokens
+from .prompt_stream import read_prompt, sse_chunks, sse_text
 
 
 class LMStudioProvider(AIProvider):
     """LM Studio provider for local AI models via OpenAI-compatible API."""
     
+    local = True
+    
     def __init__(self, config: Dict[str, Any]):
         super().__init__(config)
         self.base_url = config.get("base_url", "http://localhost:1234/v1")
         self.model = config.get("model", "local-model")  # LM Studio uses "local-model" by default
         self.timeout = config.get("timeout", 60)
+        self.load_timeout = config.get("load_timeout", 300)
+        # Seconds a just-in-time loaded model stays loaded while idle (None: LM Studio's default)
+        self.ttl = config.get("ttl")
+        # Predictions LM Studio runs at once; extra requests wait on its side
+        self.num_parallel = int(config.get("num_parallel", 1))
+        self._slots = asyncio.Semaphore(self.num_parallel)
         
     def supports_image_generation(self) -> bool:
         # LM Studio doesn't natively support image generation
@@ -48,29 +58,58 @@ class LMStudioProvider(AIProvider):
             ],
             "temperature": 0.7,
             "max_tokens": 150,
-            "stream": False
+            "stream": self.stream
         }
+        if self.ttl is not None:
+            payload["ttl"] = self.ttl
         
         headers = {"Content-Type": "application/json"}
         
         try:
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
-                async with session.post(url, headers=headers, json=payload) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        content = result["choices"][0]["message"]["content"]
-                        return AIResponse(success=True, content=content.strip())
-                    else:
-                        error_text = await response.text()
-                        return AIResponse(success=False, error=f"API error {response.status}: {error_text}")
+            session = self.get_session()
+            async with self._slots, session.post(url, headers=headers, json=payload,
+                                                 timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                if response.status == 200 and self.stream:
+                    streamed = await read_prompt(sse_chunks(response), sse_text, self.prompt_time_cap)
+                    return self.streamed_response(streamed, self.model, *openai_tokens(streamed.last or {}),
+                                                  request_text=system_prompt + user_prompt)
+                elif response.status == 200:
+                    result = await response.json()
+                    content = result["choices"][0]["message"]["content"]
+                    return AIResponse(success=True, content=content.strip(),
+                                      metadata=self.usage_metadata(self.model, *openai_tokens(result)))
+                else:
+                    return await self.error_response(response)
                         
         except aiohttp.ClientConnectorError:
-            return AIResponse(success=False, error="Could not connect to LM Studio. Is it running?")
+            return AIResponse(success=False, error="Could not connect to LM Studio. Is it running?",
+                              retryable=True)
         except asyncio.TimeoutError:
-            return AIResponse(success=False, error="Request timed out")
+            return AIResponse(success=False, error="Request timed out", retryable=True)
         except Exception as e:
             return AIResponse(success=False, error=f"Error generating prompt: {str(e)}")
     
+    async def load_model(self) -> WarmUp:
+        """Load the model with a one-token completion; LM Studio loads models on first use."""
+        payload = {"model": self.model, "messages": [{"role": "user", "content": "Hi"}],
+                   "max_tokens": 1, "stream": False}
+        if self.ttl is not None:
+            payload["ttl"] = self.ttl
+        started = time.perf_counter()
+        try:
+            session = self.get_session()
+            async with session.post(f"{self.base_url}/chat/completions", json=payload,
+                                    timeout=aiohttp.ClientTimeout(total=self.load_timeout)) as response:
+                if response.status != 200:
+                    return WarmUp(self.model, time.perf_counter() - started, f"HTTP {response.status}")
+                await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return WarmUp(self.model, time.perf_counter() - started, str(e) or type(e).__name__)
+        return WarmUp(self.model, time.perf_counter() - started)
+    
+    def parallel_slots(self) -> Optional[int]:
+        return self.num_parallel
+    
     async def generate_image(self, request: ImageRequest) -> AIResponse:
         """LM Studio doesn't support image generation natively."""
         return AIResponse(
@@ -78,12 +117,9 @@ class LMStudioProvider(AIProvider):
             error="LM Studio provider doesn't support image generation. Use a different provider for images."
         )
         
-    async def health_check(self) -> bool:
-        """Check if LM Studio is running and responding."""
-        try:
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5)) as session:
-                # Check if LM Studio is responding
-                async with session.get(f"{self.base_url}/models") as response:
-                    return response.status == 200
-        except Exception:
-            return False
\ No newline at end of file
+    def health_endpoint(self):
+        return f"{self.base_url}/models", {}
+    
+    def model_available(self, model: str, available: List[str]) -> bool:
+        # "local-model" means whichever model is loaded
+        return model in available or (model == "local-model" and bool(available))
@@ -0,0 +1,162 @@
+"""Deterministic mock provider for offline runs and benchmarks."""
+
+import asyncio
+import hashlib
+import io
+import json
+import math
+import random
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from PIL import Image
+
+from ..utils.file_utils import open_spool_file
+from .base import AIProvider, PromptRequest, ImageRequest, AIResponse
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+
+class MockProvider(AIProvider):
+    """Generates prompts and images locally with simulated API behaviour.
+
+    Latency is drawn from a configurable distribution, and a share of calls
+    can fail with a retryable 500 (``error_rate``) or a 429 carrying
+    Retry-After (``rate_limit_rate``). With a ``seed``, the sequence of
+    latencies and failures is reproducible. Images are PNGs of
+    ``image_size``; "noise" images compress like photographs, "solid" ones
+    are tiny.
+    """
+
+    local = True
+
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config)
+        self.model = config.get("model", "mock")
+        self.image_model = config.get("image_model", "mock-image")
+        self.prompt_latency = float(config.get("prompt_latency", 0.05))
+        self.image_latency = float(config.get("image_latency", 0.2))
+        self.latency_distribution = config.get("latency_distribution", "fixed")
+        self.error_rate = float(config.get("error_rate", 0.0))
+        self.rate_limit_rate = float(config.get("rate_limit_rate", 0.0))
+        self.retry_after = float(config.get("retry_after", 0.1))
+        self.image_size = parse_size(config.get("image_size", "1024x1024"))
+        self.image_pattern = config.get("image_pattern", "noise")
+        self.random = random.Random(config.get("seed"))
+        self._image: Optional[asyncio.Future] = None
+        if self.latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {self.latency_distribution} "
+                             f"(expected one of {', '.join(LATENCY_DISTRIBUTIONS)})")
+
+    def supports_image_generation(self) -> bool:
+        return True
+
+    def supports_prompt_generation(self) -> bool:
+        return True
+
+    def supports_batch_prompts(self) -> bool:
+        return True
+
+    def max_images_per_request(self) -> int:
+        return 4
+
+    async def generate_prompt(self, request: PromptRequest) -> AIResponse:
+        """Return a prompt derived from the slide title."""
+        failure = await self._simulate(self.prompt_latency)
+        if failure:
+            return failure
+        content = mock_prompt(request)
+        return AIResponse(success=True, content=content,
+                          metadata=self.usage_metadata(self.model, 120, len(content) // 4))
+
+    async def generate_prompt_batch(self, requests: List[PromptRequest]) -> AIResponse:
+        """Return a batch JSON reply for several slides."""
+        failure = await self._simulate(self.prompt_latency)
+        if failure:
+            return failure
+        prompts = [{"index": index, "prompt": mock_prompt(request)}
+                   for index, request in enumerate(requests)]
+        content = json.dumps({"prompts": prompts})
+        return AIResponse(success=True, content=content,
+                          metadata=self.usage_metadata(self.model, 120 + 20 * len(requests), len(content) // 4))
+
+    async def generate_image(self, request: ImageRequest) -> AIResponse:
+        """Return ``request.n`` copies of a synthetic PNG."""
+        failure = await self._simulate(self.image_latency)
+        if failure:
+            return failure
+        images = [await self._render()] * max(1, request.n)
+
+        if request.spool_dir is not None:
+            image_files = await asyncio.to_thread(spool_images, images, request.spool_dir)
+            return AIResponse(success=True, image_files=image_files,
+                              metadata=self.usage_metadata(self.image_model, images=len(images)))
+        return AIResponse(success=True, image_data=images[0], images=images,
+                          metadata=self.usage_metadata(self.image_model, images=len(images)))
+
+    async def _render(self) -> bytes:
+        """Build the synthetic PNG once; concurrent first callers share the same render."""
+        if self._image is None:
+            self._image = asyncio.ensure_future(
+                asyncio.to_thread(synthetic_png, self.image_size, self.image_pattern))
+        return await asyncio.shield(self._image)
+
+    async def _simulate(self, mean_latency: float) -> Optional[AIResponse]:
+        """Sleep for a sampled latency and maybe return an injected failure."""
+        await asyncio.sleep(self._latency(mean_latency))
+        roll = self.random.random()
+        if roll < self.rate_limit_rate:
+            return AIResponse(success=False, error="API error 429: mock rate limit",
+                              status=429, retryable=True, retry_after=self.retry_after)
+        if roll < self.rate_limit_rate + self.error_rate:
+            return AIResponse(success=False, error="API error 500: mock failure",
+                              status=500, retryable=True)
+        return None
+
+    def _latency(self, mean: float) -> float:
+        if mean <= 0 or self.latency_distribution == "fixed":
+            return max(0.0, mean)
+        if self.latency_distribution == "uniform":
+            return self.random.uniform(0, 2 * mean)
+        if self.latency_distribution == "exponential":
+            return self.random.expovariate(1 / mean)
+        # Log-normal with the given mean and a long right tail
+        sigma = 0.5
+        return self.random.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma)
+
+
+def parse_size(value) -> Tuple[int, int]:
+    """Parse "WIDTHxHEIGHT" (or an existing pair) into integers."""
+    if isinstance(value, str):
+        width, _, height = value.lower().partition("x")
+        return int(width), int(height or width)
+    width, height = value
+    return int(width), int(height)
+
+
+def mock_prompt(request: PromptRequest) -> str:
+    digest = hashlib.sha256(request.slide_title.encode("utf-8")).hexdigest()[:8]
+    return (f"{request.style} photograph representing \"{request.slide_title}\", "
+            f"{request.theme}, 16:9 aspect ratio [{digest}]")
+
+
+def synthetic_png(size: Tuple[int, int], pattern: str = "noise") -> bytes:
+    """Encode a PNG of the given size."""
+    if pattern == "noise":
+        image = Image.effect_noise(size, 64).convert("RGB")
+    else:
+        image = Image.new("RGB", size, (40, 90, 140))
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def spool_images(images: List[bytes], directory: Path) -> List[Path]:
+    """Write images to temp files, as a streaming provider would."""
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for image in images:
+        path, f = open_spool_file(directory)
+        with f:
+            f.write(image)
+        paths.append(path)
+    return paths
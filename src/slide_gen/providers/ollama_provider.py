@@ -1,21 +1,33 @@
 """Ollama provider implementation for local AI models."""
 
 import os
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, List, Optional
 import aiohttp
 import asyncio
 
-from .base import AIProvider, PromptRequest, ImageRequest, AIResponse
+from .base import AIProvider, PromptRequest, ImageRequest, AIResponse, WarmUp
+from .prompt_stream import ndjson_chunks, read_prompt
 
 
 class OllamaProvider(AIProvider):
     """Ollama provider for local AI models."""
     
+    local = True
+    
     def __init__(self, config: Dict[str, Any]):
         super().__init__(config)
         self.base_url = config.get("base_url", "http://localhost:11434")
         self.model = config.get("model", "llama3.2")
         self.timeout = config.get("timeout", 60)
+        # Loading a model from disk can take far longer than answering a prompt
+        self.load_timeout = config.get("load_timeout", 300)
+        # How long the server keeps the model loaded after the last request
+        self.keep_alive = config.get("keep_alive", "30m")
+        # Requests the server runs at once per model (its OLLAMA_NUM_PARALLEL);
+        # more would only queue on the server and count against our timeout
+        self.num_parallel = int(config.get("num_parallel", 4))
+        self._slots = asyncio.Semaphore(self.num_parallel)
         
     def supports_image_generation(self) -> bool:
         # Ollama doesn't natively support image generation
@@ -45,7 +57,8 @@ class OllamaProvider(AIProvider):
         payload = {
             "model": self.model,
             "prompt": full_prompt,
-            "stream": False,
+            "stream": self.stream,
+            "keep_alive": self.keep_alive,
             "options": {
                 "temperature": 0.7,
                 "num_predict": 150
@@ -55,23 +68,51 @@ class OllamaProvider(AIProvider):
         headers = {"Content-Type": "application/json"}
         
         try:
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
-                async with session.post(url, headers=headers, json=payload) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        content = result.get("response", "").strip()
-                        return AIResponse(success=True, content=content)
-                    else:
-                        error_text = await response.text()
-                        return AIResponse(success=False, error=f"API error {response.status}: {error_text}")
+            session = self.get_session()
+            async with self._slots, session.post(url, headers=headers, json=payload,
+                                                 timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                if response.status == 200 and self.stream:
+                    streamed = await read_prompt(ndjson_chunks(response), lambda chunk: chunk.get("response"),
+                                                 self.prompt_time_cap)
+                    # Only the final chunk carries token counts
+                    last = streamed.last or {}
+                    return self.streamed_response(streamed, self.model, last.get("prompt_eval_count", 0),
+                                                  last.get("eval_count", 0), full_prompt)
+                elif response.status == 200:
+                    result = await response.json()
+                    content = result.get("response", "").strip()
+                    return AIResponse(success=True, content=content,
+                                      metadata=self.usage_metadata(self.model, result.get("prompt_eval_count", 0),
+                                                                   result.get("eval_count", 0)))
+                else:
+                    return await self.error_response(response)
                         
         except aiohttp.ClientConnectorError:
-            return AIResponse(success=False, error="Could not connect to Ollama. Is it running?")
+            return AIResponse(success=False, error="Could not connect to Ollama. Is it running?",
+                              retryable=True)
         except asyncio.TimeoutError:
-            return AIResponse(success=False, error="Request timed out")
+            return AIResponse(success=False, error="Request timed out", retryable=True)
         except Exception as e:
             return AIResponse(success=False, error=f"Error generating prompt: {str(e)}")
     
+    async def load_model(self) -> WarmUp:
+        """Load the model into memory; a generate request without a prompt only loads it."""
+        payload = {"model": self.model, "keep_alive": self.keep_alive}
+        started = time.perf_counter()
+        try:
+            session = self.get_session()
+            async with session.post(f"{self.base_url}/api/generate", json=payload,
+                                    timeout=aiohttp.ClientTimeout(total=self.load_timeout)) as response:
+                if response.status != 200:
+                    return WarmUp(self.model, time.perf_counter() - started, f"HTTP {response.status}")
+                await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return WarmUp(self.model, time.perf_counter() - started, str(e) or type(e).__name__)
+        return WarmUp(self.model, time.perf_counter() - started)
+    
+    def parallel_slots(self) -> Optional[int]:
+        return self.num_parallel
+    
     async def generate_image(self, request: ImageRequest) -> AIResponse:
         """Ollama doesn't support image generation natively."""
         return AIResponse(
@@ -79,17 +120,12 @@ class OllamaProvider(AIProvider):
             error="Ollama provider doesn't support image generation. Use a different provider for images."
         )
         
-    async def health_check(self) -> bool:
-        """Check if Ollama is running and the model is available."""
-        try:
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5)) as session:
-                # Check if Ollama is running
-                async with session.get(f"{self.base_url}/api/tags") as response:
-                    if response.status == 200:
-                        models = await response.json()
-                        # Check if our model is available
-                        model_names = [model.get("name", "") for model in models.get("models", [])]
-                        return any(self.model in name for name in model_names)
-                    return False
-        except Exception:
-            return False
\ No newline at end of file
+    def health_endpoint(self):
+        return f"{self.base_url}/api/tags", {}
+    
+    def available_models(self, data) -> List[str]:
+        return [model.get("name", "") for model in (data or {}).get("models", [])]
+    
+    def model_available(self, model: str, available: List[str]) -> bool:
+        # "llama3.1" is listed as "llama3.1:latest"
+        return any(name == model or name.split(":")[0] == model for name in available)
@@ -2,11 +2,14 @@
 
 import os
 import base64
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 import aiohttp
 import asyncio
 
-from .base import AIProvider, PromptRequest, ImageRequest, AIResponse
+from .base import (AIProvider, PromptRequest, ImageRequest, AIResponse, BATCH_SYSTEM_PROMPT,
+                   format_batch_prompt, openai_tokens)
+from .prompt_stream import read_prompt, sse_chunks, sse_text
+from .streaming import stream_base64_images
 
 
 class OpenAIProvider(AIProvider):
@@ -28,6 +31,16 @@ class OpenAIProvider(AIProvider):
         
     def supports_prompt_generation(self) -> bool:
         return True
+        
+    def supports_batch_prompts(self) -> bool:
+        return True
+        
+    def max_images_per_request(self) -> int:
+        # DALL-E 3 only accepts n=1; newer image models take up to 10
+        return 1 if self.image_model == "dall-e-3" else 10
+    
+    def health_endpoint(self):
+        return f"{self.base_url}/models", {"Authorization": f"Bearer {self.api_key}"}
     
     async def generate_prompt(self, request: PromptRequest) -> AIResponse:
         """Generate a creative visual prompt using OpenAI."""
@@ -57,24 +70,69 @@ class OpenAIProvider(AIProvider):
             "temperature": 0.7,
             "max_tokens": 150
         }
+        if self.stream:
+            # The last event then carries the usage, if the stream is read to the end
+            payload.update(stream=True, stream_options={"include_usage": True})
         
         try:
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
-                async with session.post(f"{self.base_url}/chat/completions", 
-                                      headers=headers, json=payload) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        content = result["choices"][0]["message"]["content"]
-                        return AIResponse(success=True, content=content.strip())
-                    else:
-                        error_text = await response.text()
-                        return AIResponse(success=False, error=f"API error {response.status}: {error_text}")
+            session = self.get_session()
+            async with session.post(f"{self.base_url}/chat/completions", 
+                                  headers=headers, json=payload, timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                if response.status == 200 and self.stream:
+                    streamed = await read_prompt(sse_chunks(response), sse_text, self.prompt_time_cap)
+                    return self.streamed_response(streamed, self.prompt_model, *openai_tokens(streamed.last or {}),
+                                                  request_text=system_prompt + user_prompt)
+                elif response.status == 200:
+                    result = await response.json()
+                    content = result["choices"][0]["message"]["content"]
+                    return AIResponse(success=True, content=content.strip(),
+                                      metadata=self.usage_metadata(self.prompt_model, *openai_tokens(result)))
+                else:
+                    return await self.error_response(response)
                         
         except asyncio.TimeoutError:
-            return AIResponse(success=False, error="Request timed out")
+            return AIResponse(success=False, error="Request timed out", retryable=True)
+        except aiohttp.ClientError as e:
+            return AIResponse(success=False, error=f"Connection error: {str(e)}", retryable=True)
         except Exception as e:
             return AIResponse(success=False, error=f"Error generating prompt: {str(e)}")
     
+    async def generate_prompt_batch(self, requests: List[PromptRequest]) -> AIResponse:
+        """Generate prompts for several slides in one chat completion."""
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        
+        payload = {
+            "model": self.prompt_model,
+            "messages": [
+                {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+                {"role": "user", "content": format_batch_prompt(requests)}
+            ],
+            "temperature": 0.7,
+            "max_tokens": 150 * len(requests) + 50
+        }
+        
+        try:
+            session = self.get_session()
+            async with session.post(f"{self.base_url}/chat/completions", 
+                                  headers=headers, json=payload, timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    content = result["choices"][0]["message"]["content"]
+                    return AIResponse(success=True, content=content,
+                                      metadata=self.usage_metadata(self.prompt_model, *openai_tokens(result)))
+                else:
+                    return await self.error_response(response)
+                        
+        except asyncio.TimeoutError:
+            return AIResponse(success=False, error="Request timed out", retryable=True)
+        except aiohttp.ClientError as e:
+            return AIResponse(success=False, error=f"Connection error: {str(e)}", retryable=True)
+        except Exception as e:
+            return AIResponse(success=False, error=f"Error generating prompts: {str(e)}")
+    
     async def generate_image(self, request: ImageRequest) -> AIResponse:
         """Generate an image using DALL-E."""
         headers = {
@@ -93,26 +151,34 @@ class OpenAIProvider(AIProvider):
         payload = {
             "model": self.image_model,
             "prompt": request.prompt,
-            "n": 1,
+            "n": request.n,
             "size": size,
             "quality": request.quality,
             "response_format": "b64_json"
         }
         
         try:
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=120)) as session:
-                async with session.post(f"{self.base_url}/images/generations",
-                                      headers=headers, json=payload) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        image_b64 = result["data"][0]["b64_json"]
-                        image_data = base64.b64decode(image_b64)
-                        return AIResponse(success=True, image_data=image_data)
-                    else:
-                        error_text = await response.text()
-                        return AIResponse(success=False, error=f"API error {response.status}: {error_text}")
+            session = self.get_session()
+            async with session.post(f"{self.base_url}/images/generations",
+                                  headers=headers, json=payload, timeout=aiohttp.ClientTimeout(total=120)) as response:
+                if response.status == 200 and request.spool_dir is not None:
+                    # Decode straight to disk instead of holding the JSON in memory
+                    image_files = await stream_base64_images(response, "b64_json", request.spool_dir)
+                    if not image_files:
+                        return AIResponse(success=False, error="No image data in response")
+                    return AIResponse(success=True, image_files=image_files,
+                                      metadata=self.usage_metadata(self.image_model, images=len(image_files)))
+                elif response.status == 200:
+                    result = await response.json()
+                    images = [base64.b64decode(item["b64_json"]) for item in result["data"]]
+                    return AIResponse(success=True, image_data=images[0], images=images,
+                                      metadata=self.usage_metadata(self.image_model, images=len(images)))
+                else:
+                    return await self.error_response(response)
                         
         except asyncio.TimeoutError:
-            return AIResponse(success=False, error="Image generation timed out")
+            return AIResponse(success=False, error="Image generation timed out", retryable=True)
+        except aiohttp.ClientError as e:
+            return AIResponse(success=False, error=f"Connection error: {str(e)}", retryable=True)
         except Exception as e:
             return AIResponse(success=False, error=f"Error generating image: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,58 @@
+"""Rough per-request cost estimates from published list prices.
+
+Prices are in USD and change over time; they are estimates for comparing
+runs, not billing figures. Models are matched exactly first, then by the
+longest known prefix (so dated snapshots like ``gpt-4o-2024-08-06`` match).
+"""
+
+from typing import Dict, Optional, Tuple
+
+# USD per million (input, output) tokens
+TOKEN_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4": (30.0, 60.0),
+    "gpt-4-turbo": (10.0, 30.0),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.6),
+    "gpt-4.1": (2.0, 8.0),
+    "gpt-4.1-mini": (0.4, 1.6),
+    "gpt-4.1-nano": (0.1, 0.4),
+    "gpt-3.5-turbo": (0.5, 1.5),
+    "gemini-2.0-flash": (0.1, 0.4),
+    "gemini-2.0-flash-exp": (0.0, 0.0),
+    "gemini-2.5-flash": (0.3, 2.5),
+    "gemini-2.5-pro": (1.25, 10.0),
+    "gemini-1.5-flash": (0.075, 0.3),
+    "gemini-1.5-pro": (1.25, 5.0),
+}
+
+# USD per generated image at the default 16:9 size and quality
+IMAGE_PRICES: Dict[str, float] = {
+    "dall-e-3": 0.08,
+    "dall-e-2": 0.02,
+    "gpt-image-1": 0.063,
+    "imagen-4.0-generate": 0.04,
+    "imagen-4.0-fast-generate": 0.02,
+    "imagen-4.0-ultra-generate": 0.06,
+    "imagen-3.0-generate": 0.03,
+}
+
+
+def _lookup(prices: Dict, model: str):
+    if model in prices:
+        return prices[model]
+    matches = [name for name in prices if model.startswith(name)]
+    return prices[max(matches, key=len)] if matches else None
+
+
+def estimate_cost(model: Optional[str], input_tokens: float = 0, output_tokens: float = 0,
+                  images: int = 0) -> Optional[float]:
+    """Estimated USD cost of a request, or None if the model's price is unknown."""
+    if not model:
+        return None
+    if images:
+        price = _lookup(IMAGE_PRICES, model)
+        return None if price is None else price * images
+    prices = _lookup(TOKEN_PRICES, model)
+    if prices is None:
+        return None
+    return (input_tokens * prices[0] + output_tokens * prices[1]) / 1_000_000
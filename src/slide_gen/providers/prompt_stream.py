@@ -0,0 +1,101 @@
+"""Reading prompts from streamed (token by token) completions."""
+
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import aiohttp
+
+COMPLETE = "complete"  # the first paragraph of the prompt is finished
+END = "end"  # the stream ended on its own
+TIME_CAP = "time_cap"  # cut off by the wall-clock cap; content is partial
+
+
+@dataclass
+class StreamedPrompt:
+    """A prompt read from a token stream, and why reading stopped."""
+    content: str
+    stop_reason: str
+    last: Optional[Dict[str, Any]] = None  # final chunk read, which may carry usage
+
+
+async def ndjson_chunks(response: aiohttp.ClientResponse) -> AsyncIterator[Dict[str, Any]]:
+    """Objects of a newline-delimited JSON stream (Ollama)."""
+    async for line in response.content:
+        if line.strip():
+            yield json.loads(line)
+
+
+async def sse_chunks(response: aiohttp.ClientResponse) -> AsyncIterator[Dict[str, Any]]:
+    """JSON payloads of a server-sent event stream, up to "[DONE]" (OpenAI-compatible APIs)."""
+    async for line in response.content:
+        line = line.strip()
+        if not line.startswith(b"data:"):
+            continue
+        data = line[5:].strip()
+        if data == b"[DONE]":
+            return
+        yield json.loads(data)
+
+
+def sse_text(chunk: Dict[str, Any]) -> Optional[str]:
+    """Text of an OpenAI-style chat completion chunk; usage-only chunks have none."""
+    choices = chunk.get("choices") or [{}]
+    return (choices[0].get("delta") or {}).get("content")
+
+
+def first_paragraph(text: str) -> Optional[str]:
+    """The prompt's first paragraph, once a blank line shows it is finished.
+
+    Models asked for "only the prompt" often add commentary after it, and
+    sometimes a "Here is your prompt:" line before it; those are skipped.
+    """
+    paragraphs = [p.strip() for p in text.lstrip().split("\n\n")]
+    while len(paragraphs) > 1 and paragraphs[0].endswith(":"):
+        paragraphs.pop(0)
+    if len(paragraphs) > 1 and paragraphs[0]:
+        return paragraphs[0]
+    return None
+
+
+async def read_prompt(chunks: AsyncIterator[Dict[str, Any]],
+                      text_of: Callable[[Dict[str, Any]], Optional[str]],
+                      time_cap: Optional[float] = None) -> StreamedPrompt:
+    """Collect a prompt from a stream of chunks.
+
+    Stops as soon as the first paragraph is complete, leaving the model's
+    remaining output unread (closing the response stops the generation).
+    With ``time_cap`` seconds, stops at the cap and keeps what has arrived.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + time_cap if time_cap else None
+    iterator = chunks.__aiter__()
+    parts: List[str] = []
+    last = None
+    try:
+        while True:
+            try:
+                if deadline is None:
+                    chunk = await iterator.__anext__()
+                else:
+                    chunk = await asyncio.wait_for(iterator.__anext__(), max(0.0, deadline - loop.time()))
+            except StopAsyncIteration:
+                return StreamedPrompt("".join(parts).strip(), END, last)
+            except asyncio.TimeoutError:
+                return StreamedPrompt("".join(parts).strip(), TIME_CAP, last)
+            last = chunk
+            piece = text_of(chunk) or ""
+            parts.append(piece)
+            # A paragraph can only have ended if this piece has a newline
+            if "\n" in piece:
+                prompt = first_paragraph("".join(parts))
+                if prompt is not None:
+                    return StreamedPrompt(prompt, COMPLETE, last)
+    finally:
+        await iterator.aclose()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for text whose usage the stream didn't report."""
+    return max(1, len(text) // 4) if text else 0
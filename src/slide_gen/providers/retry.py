@@ -0,0 +1,121 @@
+"""Retry with capped exponential backoff, jitter and a shared retry budget."""
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import AsyncContextManager, Awaitable, Callable, Optional
+
+from ..telemetry import get_telemetry
+
+# HTTP statuses worth retrying: throttling, timeouts and transient server errors
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+@dataclass
+class RetryPolicy:
+    """How often and how long to back off before giving up on a request."""
+    max_retries: int = 3
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+
+    def backoff(self, retry: int) -> float:
+        """Full-jitter delay before the given retry (1-based)."""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (retry - 1)))
+        return random.uniform(0, ceiling)
+
+
+class RetryBudget:
+    """Caps the number of retries across a run.
+
+    Shared by every provider in a run so a throttling storm cannot multiply
+    the load on an API that is already struggling. With a ``window`` the
+    budget refills at ``max_retries`` per ``window`` seconds instead, for
+    long-lived pools that would otherwise run dry for good.
+    """
+
+    def __init__(self, max_retries: int = 100, window: Optional[float] = None):
+        self.max_retries = max_retries
+        self.window = window
+        self.used = 0
+        self._available = float(max_retries)
+        self._refilled_at = time.monotonic()
+
+    def try_spend(self) -> bool:
+        """Consume one retry, returning False once the budget is exhausted."""
+        if self.window:
+            now = time.monotonic()
+            self._available = min(float(self.max_retries),
+                                  self._available + (now - self._refilled_at) * self.max_retries / self.window)
+            self._refilled_at = now
+        if self._available < 1:
+            return False
+        self._available -= 1
+        self.used += 1
+        return True
+
+
+def is_transient(response) -> bool:
+    """True if a failure says the provider is unwell (throttled, timed out, unreachable, 5xx)."""
+    return response.retryable or (response.status is not None and response.status >= 500)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+async def retry_call(call: Callable[[], Awaitable],
+                     policy: RetryPolicy,
+                     budget: Optional[RetryBudget] = None,
+                     lane: Optional[AsyncContextManager] = None):
+    """Run ``call`` until it succeeds, fails fatally or runs out of retries.
+
+    ``call`` returns an AIResponse. Retryable failures wait for Retry-After
+    when the server sends one (capped at ``policy.max_delay``), otherwise for
+    a jittered exponential backoff. Each attempt is made inside ``lane`` (a
+    scheduler Lane), so every request counts against its limits and no slot
+    is held while backing off. The returned response's metadata records
+    ``attempts`` and ``backoff_seconds``.
+    """
+    attempts = 0
+    backoff_total = 0.0
+    while True:
+        attempts += 1
+        if lane is None:
+            response = await call()
+        else:
+            async with lane:
+                response = await call()
+        if (response.success or not response.retryable
+                or attempts > policy.max_retries
+                or (budget is not None and not budget.try_spend())):
+            break
+
+        get_telemetry().count("slide_gen_provider_retries_total", status=response.status or "error")
+        if response.retry_after is not None:
+            delay = min(response.retry_after, policy.max_delay)
+        else:
+            delay = policy.backoff(attempts)
+        started = time.monotonic()
+        await asyncio.sleep(delay)
+        backoff_total += time.monotonic() - started
+
+    response.metadata = dict(response.metadata or {},
+                             attempts=attempts,
+                             backoff_seconds=backoff_total)
+    return response
@@ -0,0 +1,125 @@
+"""Stream base64 image payloads from JSON responses straight to disk."""
+
+import base64
+from pathlib import Path
+from typing import BinaryIO, List, Optional
+
+import aiohttp
+
+from ..utils.file_utils import open_spool_file
+
+CHUNK_SIZE = 64 * 1024
+
+
+class Base64FieldWriter:
+    """Decodes every string value of one JSON field into its own temp file.
+
+    Fed the raw response body chunk by chunk, it scans for ``"<field>": "``,
+    base64-decodes the value in 4-character aligned pieces as it arrives and
+    writes the bytes out, so neither the JSON document, the base64 text nor
+    the decoded image is ever held in memory as a whole.
+    """
+
+    def __init__(self, field: str, directory: Path):
+        self.marker = f'"{field}"'.encode()
+        self.directory = directory
+        self.paths: List[Path] = []
+        self._buffer = b""
+        self._in_value = False
+        self._carry = b""
+        self._file: Optional[BinaryIO] = None
+
+    def feed(self, chunk: bytes) -> None:
+        self._buffer += chunk
+        progress = True
+        while self._buffer and progress:
+            progress = self._consume_value() if self._in_value else self._find_value()
+
+    def finish(self) -> List[Path]:
+        """Return the decoded files; a truncated value is an error."""
+        if self._in_value:
+            self.discard()
+            raise ValueError("Response ended inside an image payload")
+        return self.paths
+
+    def discard(self) -> None:
+        """Remove every file written so far."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        for path in self.paths:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        self.paths = []
+
+    def _find_value(self) -> bool:
+        """Advance to the next value of the field; False if more input is needed."""
+        index = self._buffer.find(self.marker)
+        if index < 0:
+            # Keep enough bytes to match a marker split across chunks
+            self._buffer = self._buffer[-(len(self.marker) - 1):]
+            return False
+
+        after = self._buffer[index + len(self.marker):]
+        rest = after.lstrip()
+        if not rest:
+            return False
+        if not rest.startswith(b":"):
+            # The field name appeared as a value, not a key
+            self._buffer = after
+            return True
+        rest = rest[1:].lstrip()
+        if not rest:
+            return False
+        if not rest.startswith(b'"'):
+            self._buffer = rest
+            return True
+
+        path, self._file = open_spool_file(self.directory)
+        self.paths.append(path)
+        self._buffer = rest[1:]
+        self._in_value = True
+        self._carry = b""
+        return True
+
+    def _consume_value(self) -> bool:
+        """Decode buffered value bytes; False if more input is needed."""
+        end = self._buffer.find(b'"')
+        if end < 0:
+            # Hold back a trailing backslash so escapes are never split
+            cut = len(self._buffer) - 1 if self._buffer.endswith(b"\\") else len(self._buffer)
+            segment, self._buffer = self._buffer[:cut], self._buffer[cut:]
+            self._write(segment, final=False)
+            return False
+
+        segment, self._buffer = self._buffer[:end], self._buffer[end + 1:]
+        self._write(segment, final=True)
+        self._file.close()
+        self._file = None
+        self._in_value = False
+        return True
+
+    def _write(self, segment: bytes, final: bool) -> None:
+        # JSON may escape "/" and wrap long strings; neither is base64 data
+        segment = segment.replace(b"\\/", b"/").replace(b"\\n", b"").replace(b"\\r", b"")
+        data = self._carry + segment
+        usable = len(data) if final else len(data) - len(data) % 4
+        if usable:
+            self._file.write(base64.b64decode(data[:usable]))
+        self._carry = data[usable:]
+
+
+async def stream_base64_images(response: aiohttp.ClientResponse, field: str,
+                               directory: Path) -> List[Path]:
+    """Decode each ``field`` value in a JSON response body into a temp file in ``directory``."""
+    directory.mkdir(parents=True, exist_ok=True)
+    writer = Base64FieldWriter(field, directory)
+    try:
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            writer.feed(chunk)
+        return writer.finish()
+    except BaseException:
+        writer.discard()
+        raise
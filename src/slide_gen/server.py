@@ -0,0 +1,308 @@
+"""Long-running generation server with a prioritized job queue."""
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+import uuid
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from .processors import DirectoryConfig, GenerationResult, process_titles
+from .processors.directory_generator import DeckPool, process_directory, generate_images_with_config
+from .providers.health import chain_members, probe_all
+from .telemetry import create_telemetry, get_telemetry, set_telemetry
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class Job:
+    """A deck or list of titles waiting for, or going through, generation."""
+    id: str
+    key: str  # identical submissions share a key and are coalesced
+    priority: int  # higher runs first
+    directory: Optional[str] = None
+    titles: Optional[List[str]] = None
+    options: Dict[str, Any] = field(default_factory=dict)
+    status: str = QUEUED
+    results: List[GenerationResult] = field(default_factory=list)
+    error: Optional[str] = None
+    submissions: int = 1
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def status_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "priority": self.priority,
+            "directory": self.directory,
+            "titles": self.titles,
+            "submissions": self.submissions,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "succeeded": sum(1 for result in self.results if result.success),
+            "slides": len(self.results),
+        }
+
+
+def result_dict(result: GenerationResult) -> Dict[str, Any]:
+    """JSON-friendly view of a slide result."""
+    return {
+        "title": result.slide.title,
+        "success": result.success,
+        "image": str(result.image_path) if result.image_path else None,
+        "variants": [str(path) for path in result.variant_paths[1:]],
+        "renditions": {str(r.path): r.width for r in result.renditions},
+        "thumbnail": str(result.thumbnail_path) if result.thumbnail_path else None,
+        "prompt": result.prompt,
+        "error": result.error,
+    }
+
+
+class GenerationServer:
+    """Runs jobs through one warm DeckPool.
+
+    Providers, pooled sessions, the cache and image workers are created once
+    and reused by every job. Jobs wait in a priority queue; a job identical
+    to one already queued or running is not queued again but joins the
+    existing one (raising its priority if needed). Jobs may only read and
+    write under ``root``, since a deck run writes reports and deletes stale
+    images in its directory.
+    """
+
+    def __init__(self, config: DirectoryConfig, overrides: Dict[str, Any],
+                 prompt_provider: str, image_provider: str,
+                 job_workers: int = 2, keep_finished: int = 500,
+                 root: Optional[Path] = None):
+        self.config = config
+        self.root = (root or Path.cwd()).resolve()
+        self.overrides = overrides
+        self.prompt_provider = prompt_provider
+        self.image_provider = image_provider
+        self.job_workers = job_workers
+        self.keep_finished = keep_finished
+        self.jobs: Dict[str, Job] = {}
+        self.active: Dict[str, Job] = {}  # key -> queued or running job
+        self.queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._order = itertools.count()
+        self._workers: List[asyncio.Task] = []
+        self.pool: Optional[DeckPool] = None
+
+    def submit(self, data: Dict[str, Any]) -> Tuple[Job, bool]:
+        """Queue a job from a request body; returns the job and whether it was coalesced."""
+        directory = data.get("directory")
+        titles = data.get("titles")
+        if bool(directory) == bool(titles):
+            raise ValueError("Provide either 'directory' or 'titles'")
+        priority = int(data.get("priority", 0))
+
+        if directory:
+            path = self.resolve_path(directory)
+            if not (path / "slides.md").exists():
+                raise ValueError(f"slides.md not found in {directory}")
+            options = {}
+            key = json.dumps(["deck", str(path)])
+            directory = str(path)
+        else:
+            if not isinstance(titles, list) or not all(isinstance(t, str) for t in titles):
+                raise ValueError("'titles' must be a list of strings")
+            options = {
+                "output": str(self.resolve_path(data.get("output", "generated"))),
+                "theme": data.get("theme", self.config.theme),
+                "style": data.get("style", self.config.style),
+                "prompt_provider": data.get("prompt_provider", self.prompt_provider),
+                "image_provider": data.get("image_provider", self.image_provider),
+            }
+            key = json.dumps(["titles", titles, options], sort_keys=True)
+
+        job = self.active.get(key)
+        if job is not None:
+            job.submissions += 1
+            if job.status == QUEUED and priority > job.priority:
+                # Requeue at the higher priority; the stale entry is skipped
+                job.priority = priority
+                self.queue.put_nowait((-priority, next(self._order), job))
+            return job, True
+
+        job = Job(id=uuid.uuid4().hex[:12], key=key, priority=priority,
+                  directory=directory, titles=titles, options=options)
+        self.jobs[job.id] = job
+        self.active[key] = job
+        self.queue.put_nowait((-priority, next(self._order), job))
+        return job, False
+
+    def resolve_path(self, value: Any) -> Path:
+        """Resolve a client-supplied path against the root, refusing anything outside it."""
+        if not isinstance(value, str):
+            raise ValueError("Paths must be strings")
+        path = (self.root / value).resolve()
+        try:
+            path.relative_to(self.root)
+        except ValueError:
+            raise ValueError(f"{value} is outside the server root") from None
+        return path
+
+    async def run_job(self, job: Job) -> None:
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            if job.directory:
+                job.results = await process_directory(Path(job.directory), self.overrides,
+                                                      pool=self.pool)
+            else:
+                options = job.options
+                config = replace(self.config, theme=options["theme"], style=options["style"])
+                prompt_provider = await self.pool.provider(options["prompt_provider"])
+                image_provider = await self.pool.provider(options["image_provider"])
+                job.results = await generate_images_with_config(
+                    process_titles(job.titles), prompt_provider, image_provider,
+                    Path(options["output"]), config, pool=self.pool)
+            job.status = DONE
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            self.active.pop(job.key, None)
+            self._forget_finished()
+
+    async def worker(self) -> None:
+        while True:
+            _, _, job = await self.queue.get()
+            try:
+                if job.status == QUEUED:
+                    await self.run_job(job)
+            finally:
+                self.queue.task_done()
+
+    def _forget_finished(self) -> None:
+        finished = [job for job in self.jobs.values() if job.status in (DONE, FAILED)]
+        for job in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self.jobs[job.id]
+
+    # HTTP handlers
+
+    async def handle_submit(self, request: web.Request) -> web.Response:
+        try:
+            data = await request.json()
+            job, coalesced = self.submit(data)
+        except (ValueError, TypeError, AttributeError) as e:
+            return web.json_response({"error": str(e)}, status=400)
+        return web.json_response(dict(job.status_dict(), coalesced=coalesced), status=202)
+
+    async def handle_list(self, request: web.Request) -> web.Response:
+        return web.json_response([job.status_dict() for job in self.jobs.values()])
+
+    async def handle_status(self, request: web.Request) -> web.Response:
+        job = self.jobs.get(request.match_info["job_id"])
+        if job is None:
+            return web.json_response({"error": "Unknown job"}, status=404)
+        return web.json_response(job.status_dict())
+
+    async def handle_result(self, request: web.Request) -> web.Response:
+        job = self.jobs.get(request.match_info["job_id"])
+        if job is None:
+            return web.json_response({"error": "Unknown job"}, status=404)
+        if job.status in (QUEUED, RUNNING):
+            return web.json_response(job.status_dict(), status=202)
+        return web.json_response(dict(job.status_dict(),
+                                      results=[result_dict(r) for r in job.results]))
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        running = sum(1 for job in self.active.values() if job.status == RUNNING)
+        health = {
+            "status": "ok",
+            "queued": len(self.active) - running,
+            "running": running,
+        }
+        if request.query.get("probe"):
+            # Probe the default providers too; 503 if either stage has none healthy
+            try:
+                providers = [await self.pool.provider(self.prompt_provider),
+                             await self.pool.provider(self.image_provider)]
+            except Exception as e:
+                return web.json_response(dict(health, status="unhealthy", error=str(e)), status=503)
+            reports = await probe_all(providers, float(request.query.get("timeout", 10)))
+            healthy = {report.provider for report in reports if report.healthy}
+            health["providers"] = [asdict(report) for report in reports]
+            if not all(any(member.name in healthy for member in chain_members(provider))
+                       for provider in providers):
+                return web.json_response(dict(health, status="unhealthy"), status=503)
+        return web.json_response(health)
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=get_telemetry().metrics.prometheus_text(), content_type="text/plain")
+
+    async def on_startup(self, app: web.Application) -> None:
+        get_telemetry().start()
+        self.pool = DeckPool(self.config)
+        self._workers = [asyncio.ensure_future(self.worker()) for _ in range(self.job_workers)]
+
+    async def on_cleanup(self, app: web.Application) -> None:
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        await self.pool.close()
+        await get_telemetry().close()
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.add_routes([
+            web.post("/jobs", self.handle_submit),
+            web.get("/jobs", self.handle_list),
+            web.get("/jobs/{job_id}", self.handle_status),
+            web.get("/jobs/{job_id}/result", self.handle_result),
+            web.get("/health", self.handle_health),
+            web.get("/metrics", self.handle_metrics),
+        ])
+        app.on_startup.append(self.on_startup)
+        app.on_cleanup.append(self.on_cleanup)
+        return app
+
+
+async def serve_main(argv: List[str]) -> int:
+    """Entry point for ``slide-gen serve``."""
+    from .cli import add_generation_options, config_overrides
+    from .utils.config_loader import load_environment
+
+    parser = argparse.ArgumentParser(
+        prog="slide-gen serve",
+        description="Serve slide generation jobs over HTTP with warm providers"
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on (default: 8080)")
+    parser.add_argument("--job-workers", type=int, default=2,
+                       help="Jobs processed at once (default: 2)")
+    parser.add_argument("--root", type=Path, default=Path.cwd(),
+                       help="Directory jobs may read and write under (default: current directory)")
+    add_generation_options(parser)
+    args = parser.parse_args(argv)
+    load_environment()
+
+    overrides = config_overrides(args)
+    # Metrics are always collected so /metrics can be scraped
+    set_telemetry(create_telemetry(args.metrics_file, args.trace_file, args.otlp_endpoint, enabled=True))
+    server = GenerationServer(DirectoryConfig(**overrides), overrides,
+                              args.prompt_provider, args.image_provider,
+                              job_workers=args.job_workers, root=args.root)
+    runner = web.AppRunner(server.app())
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, args.host, args.port).start()
+        print(f"Serving on http://{args.host}:{args.port} (root: {server.root})")
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+    return 0
@@ -0,0 +1,404 @@
+"""Optional tracing and metrics with pluggable exporters.
+
+Telemetry is off unless an exporter is configured; while off, ``span``
+returns a shared no-op context manager and metric calls return at once, so
+instrumented code pays for little more than an attribute check. When on,
+spans follow the OpenTelemetry data model (trace and span ids, parent
+links, attributes, status) and can be sent to an OTLP/HTTP collector or
+written as JSON lines; counters, gauges and histograms are kept in memory
+and rendered in the Prometheus text format, for a scrape endpoint or the
+node exporter's textfile collector.
+"""
+
+import asyncio
+import json
+import os
+import secrets
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from . import __version__
+
+# Metric name -> (type, help)
+METRICS = {
+    "slide_gen_provider_requests_total": ("counter", "Provider API calls by outcome (ok, HTTP status or error)"),
+    "slide_gen_provider_request_seconds": ("histogram", "Provider API call latency"),
+    "slide_gen_provider_in_flight": ("gauge", "Provider API calls currently in flight"),
+    "slide_gen_provider_bytes_total": ("counter", "Image bytes received from providers"),
+    "slide_gen_provider_retries_total": ("counter", "Provider calls retried, by the failed attempt's status"),
+    "slide_gen_stage_seconds": ("histogram", "Per-slide time spent in each pipeline stage"),
+    "slide_gen_slides_total": ("counter", "Slides finished, by outcome"),
+    "slide_gen_telemetry_dropped_spans_total": ("counter", "Spans dropped because the export queue was full"),
+}
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("slide_gen_span", default=None)
+
+
+@dataclass
+class Span:
+    """A timed operation within a trace."""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    kind: str = "internal"  # or "client" for calls to providers
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def fail(self, error: str) -> None:
+        self.error = error
+
+
+class _NoopSpan:
+    """Stands in for a Span while telemetry is off."""
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def fail(self, error: str) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Metrics:
+    """In-memory counters, gauges and histograms keyed by name and labels."""
+
+    def __init__(self):
+        self.values: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], List[float]] = {}  # bucket counts, then sum and count
+
+    def add(self, name: str, value: float, labels: Labels) -> None:
+        key = (name, labels)
+        self.values[key] = self.values.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, labels: Labels) -> None:
+        key = (name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = [0.0] * (len(BUCKETS) + 2)
+        for index, bound in enumerate(BUCKETS):
+            if value <= bound:
+                histogram[index] += 1
+        histogram[-2] += value
+        histogram[-1] += 1
+
+    def prometheus_text(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            values = [(labels, value) for (metric, labels), value in self.values.items() if metric == name]
+            histograms = [(labels, h) for (metric, labels), h in self.histograms.items() if metric == name]
+            if not values and not histograms:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(values):
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+            for labels, histogram in sorted(histograms):
+                for bound, count in zip(BUCKETS, histogram):
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', str(bound)),))} {_format_value(count)}")
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {_format_value(histogram[-1])}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram[-2]:.6f}")
+                lines.append(f"{name}_count{_format_labels(labels)} {_format_value(histogram[-1])}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+class Telemetry:
+    """Records spans and metrics and hands them to exporters.
+
+    Span exporters receive finished spans in batches from ``flush``;
+    metric exporters receive the Prometheus text. Call ``start`` to flush
+    periodically, and ``close`` at exit. Spans are also flushed early once
+    the queue is half full; any that still overflow it are counted in
+    ``dropped_spans`` and reported at close.
+    """
+
+    def __init__(self, span_exporters: Optional[List[Any]] = None,
+                 metric_exporters: Optional[List[Any]] = None,
+                 enabled: Optional[bool] = None,
+                 max_queued_spans: int = 2048):
+        self.span_exporters = span_exporters or []
+        self.metric_exporters = metric_exporters or []
+        self.enabled = bool(self.span_exporters or self.metric_exporters) if enabled is None else enabled
+        self.metrics = Metrics()
+        self._spans: Deque[Span] = deque(maxlen=max_queued_spans)
+        self._flusher: Optional[asyncio.Task] = None
+        self._early_flush: Optional[asyncio.Task] = None
+        self._warned = False
+        self.dropped_spans = 0
+
+    @contextmanager
+    def _span(self, name: str, kind: str, attributes: Dict[str, Any]) -> Iterator[Span]:
+        parent = _current_span.get()
+        span = Span(name, trace_id=parent.trace_id if parent else secrets.token_hex(16),
+                    span_id=secrets.token_hex(8), parent_id=parent.span_id if parent else None,
+                    kind=kind, attributes=attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.fail(str(e) or type(e).__name__)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = time.time_ns()
+            if self.span_exporters:
+                self._queue(span)
+
+    def _queue(self, span: Span) -> None:
+        if len(self._spans) == self._spans.maxlen:
+            self.dropped_spans += 1
+            self.count("slide_gen_telemetry_dropped_spans_total")
+        self._spans.append(span)
+        if len(self._spans) >= self._spans.maxlen // 2 and (
+                self._early_flush is None or self._early_flush.done()):
+            try:
+                self._early_flush = asyncio.get_running_loop().create_task(self.flush())
+            except RuntimeError:
+                pass  # No loop to flush from; close() will export what fits
+
+    def span(self, name: str, kind: str = "internal", **attributes: Any):
+        """Context manager timing ``name`` as a child of the current span."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return self._span(name, kind, attributes)
+
+    def count(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Increment a counter."""
+        if self.enabled:
+            self.metrics.add(name, value, _labels(labels))
+
+    def add(self, name: str, delta: float, **labels: Any) -> None:
+        """Move a gauge up or down."""
+        if self.enabled:
+            self.metrics.add(name, delta, _labels(labels))
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Record a histogram sample."""
+        if self.enabled:
+            self.metrics.observe(name, value, _labels(labels))
+
+    async def flush(self) -> None:
+        """Send queued spans and the current metrics to the exporters."""
+        spans = list(self._spans)
+        self._spans.clear()
+        for exporter in self.span_exporters:
+            if spans:
+                await self._export(exporter.export, spans)
+        if self.metric_exporters:
+            text = self.metrics.prometheus_text()
+            for exporter in self.metric_exporters:
+                await self._export(exporter.export, text)
+
+    async def _export(self, export, data) -> None:
+        try:
+            await export(data)
+        except Exception as e:
+            # Telemetry must never fail a run; warn once and carry on
+            if not self._warned:
+                print(f"Warning: telemetry export failed: {e}")
+                self._warned = True
+
+    def start(self, interval: float = 10.0) -> None:
+        """Flush every ``interval`` seconds until ``close``."""
+        if self.enabled and self._flusher is None:
+            self._flusher = asyncio.ensure_future(self._flush_periodically(interval))
+
+    async def _flush_periodically(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    async def close(self) -> None:
+        """Stop periodic flushing and export what is left."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        if self._early_flush is not None:
+            await self._early_flush
+            self._early_flush = None
+        if self.enabled:
+            await self.flush()
+        if self.dropped_spans:
+            print(f"Warning: telemetry dropped {self.dropped_spans} spans (export queue full)")
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def otlp_span(span: Span) -> Dict[str, Any]:
+    """A span in the OTLP/JSON encoding."""
+    data = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 3 if span.kind == "client" else 1,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": otlp_attributes(span.attributes),
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+    }
+    if span.parent_id:
+        data["parentSpanId"] = span.parent_id
+    return data
+
+
+def otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    encoded = []
+    for key, value in attributes.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            encoded.append({"key": key, "value": {"boolValue": value}})
+        elif isinstance(value, int):
+            encoded.append({"key": key, "value": {"intValue": str(value)}})
+        elif isinstance(value, float):
+            encoded.append({"key": key, "value": {"doubleValue": value}})
+        else:
+            encoded.append({"key": key, "value": {"stringValue": str(value)}})
+    return encoded
+
+
+class OTLPSpanExporter:
+    """Posts spans to an OpenTelemetry collector over OTLP/HTTP with JSON."""
+
+    def __init__(self, endpoint: str, headers: Optional[Dict[str, str]] = None,
+                 service_name: str = "slide-gen", timeout: float = 10.0):
+        endpoint = endpoint.rstrip("/")
+        self.url = endpoint if endpoint.endswith("/v1/traces") else f"{endpoint}/v1/traces"
+        self.headers = dict(headers or {}, **{"Content-Type": "application/json"})
+        self.service_name = service_name
+        self.timeout = timeout
+
+    async def export(self, spans: List[Span]) -> None:
+        import aiohttp
+
+        body = {"resourceSpans": [{
+            "resource": {"attributes": otlp_attributes({"service.name": self.service_name})},
+            "scopeSpans": [{
+                "scope": {"name": "slide_gen", "version": __version__},
+                "spans": [otlp_span(span) for span in spans],
+            }],
+        }]}
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
+            async with session.post(self.url, json=body, headers=self.headers) as response:
+                if response.status >= 400:
+                    raise RuntimeError(f"OTLP export failed with HTTP {response.status}")
+
+
+class JSONLinesSpanExporter:
+    """Appends spans to a file, one OTLP/JSON span per line."""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    async def export(self, spans: List[Span]) -> None:
+        text = "".join(json.dumps(otlp_span(span)) + "\n" for span in spans)
+        await asyncio.to_thread(self._append, text)
+
+    def _append(self, text: str) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(text)
+
+
+class PrometheusFileExporter:
+    """Rewrites a file with the current metrics, e.g. for a textfile collector."""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    async def export(self, text: str) -> None:
+        await asyncio.to_thread(self._write, text)
+
+    def _write(self, text: str) -> None:
+        # Write then rename, so a collector never reads a half-written file
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(f".{self.path.name}.tmp")
+        temp_path.write_text(text, encoding="utf-8")
+        os.replace(temp_path, self.path)
+
+
+def parse_headers(value: str) -> Dict[str, str]:
+    """Parse OTEL_EXPORTER_OTLP_HEADERS-style "key=value,key2=value2"."""
+    headers = {}
+    for pair in value.split(","):
+        key, _, item = pair.partition("=")
+        if key.strip():
+            headers[key.strip()] = item.strip()
+    return headers
+
+
+def create_telemetry(metrics_file: Optional[str] = None,
+                     trace_file: Optional[str] = None,
+                     otlp_endpoint: Optional[str] = None,
+                     enabled: Optional[bool] = None) -> Telemetry:
+    """Build telemetry from options, falling back to the standard OTEL_* variables."""
+    otlp_endpoint = (otlp_endpoint or os.getenv("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT")
+                     or os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"))
+    span_exporters: List[Any] = []
+    if otlp_endpoint:
+        span_exporters.append(OTLPSpanExporter(
+            otlp_endpoint,
+            headers=parse_headers(os.getenv("OTEL_EXPORTER_OTLP_HEADERS", "")),
+            service_name=os.getenv("OTEL_SERVICE_NAME", "slide-gen")))
+    if trace_file:
+        span_exporters.append(JSONLinesSpanExporter(Path(trace_file)))
+    metric_exporters = [PrometheusFileExporter(Path(metrics_file))] if metrics_file else []
+    return Telemetry(span_exporters, metric_exporters, enabled=enabled)
+
+
+_telemetry = Telemetry()
+
+
+def get_telemetry() -> Telemetry:
+    """The process-wide telemetry; disabled unless ``set_telemetry`` installed one."""
+    return _telemetry
+
+
+def set_telemetry(telemetry: Telemetry) -> Telemetry:
+    global _telemetry
+    _telemetry = telemetry
+    return telemetry
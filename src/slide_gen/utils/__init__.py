@@ -1,6 +1,9 @@
 """Utility functions and helpers."""
 
-from .file_utils import save_image, sanitize_filename
+from .file_utils import save_image, sanitize_filename, EncodeOptions
 from .config_loader import create_provider
+from .cache import GenerationCache
+from .image_executor import ImageExecutor
+from .renditions import RenditionOptions
 
-__all__ = ["save_image", "sanitize_filename", "create_provider"]
\ No newline at end of file
+__all__ = ["save_image", "sanitize_filename", "EncodeOptions", "create_provider", "GenerationCache", "ImageExecutor", "RenditionOptions"]
\ No newline at end of file
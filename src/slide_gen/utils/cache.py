@@ -0,0 +1,155 @@
+"""Content-addressed on-disk cache for generated prompts and images."""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Optional
+
+
+def default_cache_dir() -> Path:
+    """Return the cache directory, honouring SLIDE_GEN_CACHE_DIR and XDG_CACHE_HOME."""
+    if os.getenv("SLIDE_GEN_CACHE_DIR"):
+        return Path(os.environ["SLIDE_GEN_CACHE_DIR"])
+    base = os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "slide-gen"
+
+
+def cache_key(**fields: Any) -> str:
+    """Hash request fields into a stable cache key."""
+    encoded = json.dumps(fields, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class GenerationCache:
+    """Size-bounded LRU cache of prompts and image bytes.
+
+    Entries live at ``<directory>/<kind>/<key[:2]>/<key>``. A hit refreshes the
+    entry's mtime, and eviction removes the least recently used entries until
+    the cache fits in ``max_bytes`` again. Writes may come from worker
+    threads, so the size bookkeeping is done under a lock.
+    """
+
+    def __init__(self, directory: Optional[Path] = None,
+                 max_bytes: int = 500 * 1024 * 1024,
+                 refresh: bool = False):
+        self.directory = Path(directory) if directory else default_cache_dir()
+        self.max_bytes = max_bytes
+        self.refresh = refresh
+        self._size: Optional[int] = None
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_config(cls, config) -> Optional["GenerationCache"]:
+        """Build a cache from a DirectoryConfig, or None when caching is off."""
+        if not config.cache:
+            return None
+        return cls(
+            directory=Path(config.cache_dir) if config.cache_dir else None,
+            max_bytes=config.cache_max_mb * 1024 * 1024,
+            refresh=config.cache_refresh,
+        )
+
+    def get_prompt(self, key: str) -> Optional[str]:
+        """Return a cached prompt, or None on a miss."""
+        data = self._read("prompts", key)
+        return data.decode("utf-8") if data is not None else None
+
+    def put_prompt(self, key: str, prompt: str) -> None:
+        """Store a generated prompt."""
+        self._write("prompts", key, prompt.encode("utf-8"))
+
+    def get_image(self, key: str) -> Optional[bytes]:
+        """Return cached image bytes, or None on a miss."""
+        return self._read("images", key)
+
+    def put_image(self, key: str, image_data: bytes) -> None:
+        """Store generated image bytes."""
+        self._write("images", key, image_data)
+
+    def put_image_file(self, key: str, source: Path) -> None:
+        """Store generated image bytes from a file without reading it into memory."""
+        path = self._path("images", key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        shutil.copyfile(source, temp_path)
+        self._commit(path, temp_path)
+
+    def _path(self, kind: str, key: str) -> Path:
+        return self.directory / kind / key[:2] / key
+
+    def _read(self, kind: str, key: str) -> Optional[bytes]:
+        if self.refresh:
+            return None
+        path = self._path(kind, key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        # Mark as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def _write(self, kind: str, key: str, data: bytes) -> None:
+        path = self._path(kind, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        temp_path.write_bytes(data)
+        self._commit(path, temp_path)
+
+    def _commit(self, path: Path, temp_path: Path) -> None:
+        """Move a fully written temp file into place and enforce the size limit."""
+        size = temp_path.stat().st_size
+        with self._lock:
+            previous = path.stat().st_size if path.exists() else 0
+            os.replace(temp_path, path)
+
+            if self._size is None:
+                self._size = self._disk_usage()
+            else:
+                self._size += size - previous
+            if self._size > self.max_bytes:
+                self.evict()
+
+    def _entries(self):
+        for kind in ("prompts", "images"):
+            root = self.directory / kind
+            if root.exists():
+                for path in root.glob("*/*"):
+                    if not path.name.endswith(".tmp"):
+                        yield path
+
+    def _disk_usage(self) -> int:
+        return sum(path.stat().st_size for path in self._entries())
+
+    def evict(self) -> None:
+        """Remove least recently used entries until under the size limit."""
+        with self._lock:
+            self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
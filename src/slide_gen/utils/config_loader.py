@@ -1,39 +1,113 @@
 """Simple configuration loading."""
 
 import os
-from dotenv import load_dotenv
+from typing import Any, Dict, List, Optional, Union
 
-load_dotenv()
+from ..providers import provider_class
+from ..providers.retry import RetryBudget
 
-from ..providers.openai_provider import OpenAIProvider
-from ..providers.gemini_provider import GeminiProvider
-from ..providers.ollama_provider import OllamaProvider
-from ..providers.lmstudio_provider import LMStudioProvider
+_environment_loaded = False
 
-def create_provider(provider_name: str):
-    """Create a provider instance with environment config."""
+
+def load_environment() -> None:
+    """Load API keys and settings from .env, once, on first use."""
+    global _environment_loaded
+    if not _environment_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _environment_loaded = True
+
+
+def provider_options(config, retry_window: Optional[float] = None) -> Dict[str, Any]:
+    """Run-level provider settings from a DirectoryConfig.
+    
+    Call once per run: every provider created with the returned options
+    shares the same retry budget. Long-lived pools pass ``retry_window`` so
+    the budget refills over time rather than being spent once.
+    """
+    return {
+        "max_retries": config.max_retries,
+        "retry_budget": RetryBudget(config.retry_budget, retry_window),
+        "breaker_threshold": config.breaker_threshold,
+        "breaker_reset_seconds": config.breaker_reset_seconds,
+        "stream": config.stream_prompts,
+        "prompt_time_cap": config.prompt_time_cap,
+    }
+
+
+def provider_chain(value: Union[str, List[str]]) -> List[str]:
+    """Split a provider setting into an ordered list of provider names.
+    
+    Accepts a single name, a comma-separated string or a list.
+    """
+    names = value.split(",") if isinstance(value, str) else list(value)
+    return [name.strip() for name in names if name.strip()]
+
+
+def create_provider(provider_name: Union[str, List[str]], options: Optional[Dict[str, Any]] = None):
+    """Create a provider instance with environment config.
     
+    ``provider_name`` may name an ordered failover chain, e.g.
+    ``"ollama,lmstudio,openai"`` or a list, which is wrapped in a
+    FailoverProvider. ``options`` adds run-level settings shared by every
+    provider, such as ``max_retries`` and ``retry_budget``.
+    """
+    options = options or {}
+    
+    names = provider_chain(provider_name)
+    if len(names) > 1:
+        from ..providers.failover import FailoverProvider
+        return FailoverProvider([create_provider(name, options) for name in names], options)
+    provider_name = names[0] if names else ""
+    return provider_class(provider_name)({**provider_config(provider_name), **options})
+
+
+def duration(value: str):
+    """A keep-alive like "30m" as Ollama expects it: plain numbers are seconds."""
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def provider_config(provider_name: str) -> Dict[str, Any]:
+    """Settings for a provider from the environment (and .env)."""
+    load_environment()
     if provider_name == "openai":
-        return OpenAIProvider({
+        return {
             "api_key": os.getenv("OPENAI_API_KEY"),
             "prompt_model": os.getenv("OPENAI_PROMPT_MODEL", "gpt-4"),
             "image_model": os.getenv("OPENAI_IMAGE_MODEL", "dall-e-3"),
-        })
+        }
     elif provider_name == "gemini":
-        return GeminiProvider({
+        return {
             "api_key": os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY"),
             "model": os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp"),
             "image_model": os.getenv("GEMINI_IMAGE_MODEL", "imagen-4.0-generate-preview-06-06"),
-        })
+        }
     elif provider_name == "ollama":
-        return OllamaProvider({
+        return {
             "base_url": os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
             "model": os.getenv("OLLAMA_MODEL", "llama3.1"),
-        })
+            "keep_alive": duration(os.getenv("OLLAMA_KEEP_ALIVE", "30m")),
+            "num_parallel": int(os.getenv("OLLAMA_NUM_PARALLEL", "4")),
+        }
     elif provider_name == "lmstudio":
-        return LMStudioProvider({
+        return {
             "base_url": os.getenv("LMSTUDIO_BASE_URL", "http://localhost:1234/v1"),
             "model": os.getenv("LMSTUDIO_MODEL", "local-model"),
-        })
-    else:
-        raise ValueError(f"Unknown provider: {provider_name}")
\ No newline at end of file
+            "ttl": int(os.getenv("LMSTUDIO_TTL")) if os.getenv("LMSTUDIO_TTL") else None,
+            "num_parallel": int(os.getenv("LMSTUDIO_NUM_PARALLEL", "1")),
+        }
+    elif provider_name == "mock":
+        return {
+            "prompt_latency": float(os.getenv("MOCK_PROMPT_LATENCY", "0.05")),
+            "image_latency": float(os.getenv("MOCK_IMAGE_LATENCY", "0.2")),
+            "latency_distribution": os.getenv("MOCK_LATENCY_DISTRIBUTION", "fixed"),
+            "error_rate": float(os.getenv("MOCK_ERROR_RATE", "0")),
+            "rate_limit_rate": float(os.getenv("MOCK_RATE_LIMIT_RATE", "0")),
+            "image_size": os.getenv("MOCK_IMAGE_SIZE", "1024x1024"),
+            "image_pattern": os.getenv("MOCK_IMAGE_PATTERN", "noise"),
+            "seed": os.getenv("MOCK_SEED"),
+        }
+    return {}
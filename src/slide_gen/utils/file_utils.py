@@ -1,10 +1,78 @@
 """Simple file utilities."""
 
+import os
 import re
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from PIL import Image
+from typing import TYPE_CHECKING, BinaryIO, Dict, Iterator, Optional, Tuple, Union
 from io import BytesIO
 
+if TYPE_CHECKING:
+    from PIL import Image
+
+# Output format name -> (Pillow format, file extension)
+OUTPUT_FORMATS = {
+    "png": ("PNG", ".png"),
+    "webp": ("WEBP", ".webp"),
+    "jpeg": ("JPEG", ".jpg"),
+    "avif": ("AVIF", ".avif"),
+}
+
+# Quality used when none is configured
+DEFAULT_QUALITY = {"webp": 85, "jpeg": 90, "avif": 60}
+
+
+@dataclass
+class EncodeOptions:
+    """How generated images are written to disk."""
+    format: str = "png"
+    quality: Optional[int] = None  # WebP, JPEG and AVIF
+    compress_level: int = 6  # PNG zlib level, 0-9
+    optimize: bool = False  # extra PNG/JPEG optimization pass
+    passthrough: bool = True  # keep provider bytes untouched when format and mode already match
+    
+    def __post_init__(self):
+        if self.format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {self.format} "
+                             f"(expected one of {', '.join(OUTPUT_FORMATS)})")
+        if self.format == "avif":
+            from PIL import Image
+            Image.init()
+            if "AVIF" not in Image.SAVE:
+                raise ValueError("AVIF output needs Pillow 11.2+ or the pillow-avif-plugin package")
+    
+    @classmethod
+    def from_config(cls, config) -> "EncodeOptions":
+        """Build encode options from a DirectoryConfig."""
+        return cls(
+            format=config.output_format,
+            quality=config.output_quality,
+            compress_level=config.png_compress_level,
+            optimize=config.png_optimize,
+            passthrough=config.passthrough,
+        )
+    
+    @property
+    def extension(self) -> str:
+        return OUTPUT_FORMATS[self.format][1]
+    
+    @property
+    def pillow_format(self) -> str:
+        return OUTPUT_FORMATS[self.format][0]
+    
+    def save_params(self) -> dict:
+        """Keyword arguments for Image.save."""
+        if self.format == "png":
+            return {"compress_level": self.compress_level, "optimize": self.optimize}
+        params = {"quality": self.quality or DEFAULT_QUALITY[self.format]}
+        if self.format == "jpeg":
+            params["optimize"] = self.optimize
+        return params
+
 
 def sanitize_filename(text: str, max_length: int = 50) -> str:
     """Sanitize text for use as a filename."""
@@ -14,19 +82,123 @@ def sanitize_filename(text: str, max_length: int = 50) -> str:
     return safe_text if safe_text else "unnamed"
 
 
-def save_image(image_data: bytes, filename: str, output_dir: Path) -> Path:
-    """Save image data to a file."""
+def open_spool_file(directory: Path) -> Tuple[Path, BinaryIO]:
+    """Create a temp file for a streamed image in ``directory``.
+    
+    Unlike tempfile.mkstemp (mode 0600), the file gets the usual
+    permissions from the umask, so an image renamed into place from it is
+    as readable as any other output.
+    """
+    path = directory / f".slide-gen-{uuid.uuid4().hex}.part"
+    return path, open(path, "xb")
+
+
+def move_into_place(source: Path, destination: Path) -> None:
+    """Atomically rename a file, copying when it lives on another filesystem."""
+    try:
+        os.replace(source, destination)
+    except OSError:
+        shutil.move(str(source), str(destination))
+
+
+def copy_image(source: Path, destination: Path) -> Path:
+    """Copy an image file atomically."""
+    _write_atomic(destination, lambda temp_path: shutil.copyfile(source, temp_path))
+    return destination
+
+
+@contextmanager
+def timed(timings: Optional[Dict[str, float]], stage: str) -> Iterator[None]:
+    """Add the seconds spent in the block to ``timings[stage]``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+
+
+def save_image(image_data: Union[bytes, Path], filename: str, output_dir: Path,
+               options: Optional[EncodeOptions] = None,
+               timings: Optional[Dict[str, float]] = None) -> Path:
+    """Save image data to a file.
+    
+    ``image_data`` is either raw bytes or a spooled temp file, which is
+    consumed. When the provider already returned the target format in RGB,
+    the bytes are written untouched (a spooled file is simply renamed);
+    otherwise the image is flattened and re-encoded per ``options``.
+    Seconds spent decoding, encoding and writing are added to ``timings``.
+    """
+    from PIL import Image
+    
+    options = options or EncodeOptions()
     output_dir.mkdir(parents=True, exist_ok=True)
     file_path = output_dir / filename
     
-    # Convert to PNG
+    if isinstance(image_data, Path):
+        try:
+            # Opening only reads the header; pixels are decoded on demand
+            with Image.open(image_data) as image:
+                if _can_pass_through(image, options):
+                    image.close()
+                    with timed(timings, "write"):
+                        move_into_place(image_data, file_path)
+                    return file_path
+                encode_image(image, file_path, options, timings)
+        finally:
+            if image_data.exists():
+                image_data.unlink()
+        return file_path
+    
     image = Image.open(BytesIO(image_data))
-    if image.mode in ('RGBA', 'LA', 'P'):
-        background = Image.new('RGB', image.size, (255, 255, 255))
-        if image.mode == 'P':
-            image = image.convert('RGBA')
-        background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
-        image = background
-    
-    image.save(file_path, 'PNG')
-    return file_path
\ No newline at end of file
+    if _can_pass_through(image, options):
+        with timed(timings, "write"):
+            _write_atomic(file_path, lambda temp_path: temp_path.write_bytes(image_data))
+    else:
+        encode_image(image, file_path, options, timings)
+    return file_path
+
+
+def save_image_timed(image_data: Union[bytes, Path], filename: str, output_dir: Path,
+                     options: Optional[EncodeOptions] = None) -> Tuple[Path, Dict[str, float]]:
+    """save_image, also returning its stage timings (for use across processes)."""
+    timings: Dict[str, float] = {}
+    return save_image(image_data, filename, output_dir, options, timings), timings
+
+
+def _can_pass_through(image: "Image.Image", options: EncodeOptions) -> bool:
+    return options.passthrough and image.format == options.pillow_format and image.mode == 'RGB'
+
+
+def encode_image(image: "Image.Image", file_path: Path, options: EncodeOptions,
+                 timings: Optional[Dict[str, float]] = None) -> None:
+    """Flatten transparency onto white and encode in the configured format."""
+    from PIL import Image
+    
+    with timed(timings, "decode"):
+        image.load()
+        if image.mode in ('RGBA', 'LA', 'P'):
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            if image.mode == 'P':
+                image = image.convert('RGBA')
+            background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
+            image = background
+        elif options.format != "png" and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+    
+    with timed(timings, "encode"):
+        buffer = BytesIO()
+        image.save(buffer, options.pillow_format, **options.save_params())
+    with timed(timings, "write"):
+        _write_atomic(file_path, lambda temp_path: temp_path.write_bytes(buffer.getbuffer()))
+
+
+def _write_atomic(file_path: Path, write) -> None:
+    """Call ``write(temp_path)`` and rename the result over ``file_path``."""
+    temp_path = file_path.with_name(f".{file_path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        write(temp_path)
+        os.replace(temp_path, file_path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
@@ -0,0 +1,56 @@
+"""Off-loop executor for CPU-bound image post-processing."""
+
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+EXECUTOR_MODES = ("process", "thread")
+
+
+def available_cores() -> int:
+    """Number of CPU cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return os.cpu_count() or 1
+
+
+class ImageExecutor:
+    """Runs Pillow decode, alpha flattening and encode away from the event loop.
+
+    The "process" mode sidesteps the GIL so encodes never stall network I/O
+    for other slides; "thread" avoids process start-up and pickling for
+    small runs. At most ``max_pending`` jobs are submitted at once, so a
+    burst of finished downloads waits here instead of piling up in the pool.
+    """
+
+    def __init__(self, mode: str = "process", workers: Optional[int] = None,
+                 max_pending: Optional[int] = None):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown executor mode: {mode} (expected one of {', '.join(EXECUTOR_MODES)})")
+        self.mode = mode
+        self.workers = workers or available_cores()
+        self._executor: Executor = (ProcessPoolExecutor(self.workers) if mode == "process"
+                                    else ThreadPoolExecutor(self.workers))
+        self._slots = asyncio.Semaphore(max_pending or self.workers * 2)
+
+    @classmethod
+    def from_config(cls, config) -> "ImageExecutor":
+        """Build an executor from a DirectoryConfig."""
+        return cls(mode=config.image_executor, workers=config.image_workers)
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run ``func(*args)`` in the pool once a slot is free."""
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+
+    async def __aenter__(self) -> "ImageExecutor":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.shutdown()
+
+    async def shutdown(self) -> None:
+        """Wait for running jobs and release the workers."""
+        await asyncio.to_thread(self._executor.shutdown, True)
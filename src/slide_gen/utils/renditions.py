@@ -0,0 +1,105 @@
+"""Responsive renditions and thumbnails of generated images."""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple
+
+from .file_utils import EncodeOptions, encode_image
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+
+@dataclass
+class Rendition:
+    """One width of a generated image."""
+    width: int
+    path: Path
+
+
+@dataclass
+class RenditionOptions:
+    """Which derivative sizes to write next to each slide image."""
+    widths: List[int] = field(default_factory=list)
+    thumbnail_width: Optional[int] = None
+
+    @classmethod
+    def from_config(cls, config) -> "RenditionOptions":
+        """Build rendition options from a DirectoryConfig."""
+        return cls(widths=list(config.renditions), thumbnail_width=config.thumbnail_width)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.widths or self.thumbnail_width)
+
+
+def rendition_filename(image_path: Path, width: int) -> str:
+    return f"{image_path.stem}_{width}w{image_path.suffix}"
+
+
+def thumbnail_filename(image_path: Path) -> str:
+    return f"{image_path.stem}_thumb{image_path.suffix}"
+
+
+def make_renditions(image_path: Path, options: RenditionOptions,
+                    encode: Optional[EncodeOptions] = None) -> Tuple[List[Rendition], Optional[Path]]:
+    """Write downscaled copies of a saved image.
+
+    The image is decoded once and each size is resized from the next larger
+    one, widest first, so every step is a small, cheap reduction. Widths at
+    or above the original are skipped. Returns the renditions, widest first
+    and including the original, and the thumbnail path if one was written.
+    """
+    from PIL import Image
+    
+    encode = encode or EncodeOptions()
+    with Image.open(image_path) as source:
+        source.load()
+    renditions = [Rendition(source.width, image_path)]
+
+    current = source
+    for width in sorted(set(options.widths), reverse=True):
+        if width >= current.width:
+            continue
+        current = _resize(current, width)
+        path = image_path.with_name(rendition_filename(image_path, width))
+        encode_image(current, path, encode)
+        renditions.append(Rendition(width, path))
+
+    thumbnail_path = None
+    if options.thumbnail_width:
+        thumbnail = current
+        if options.thumbnail_width < current.width:
+            thumbnail = _resize(current, options.thumbnail_width)
+        thumbnail_path = image_path.with_name(thumbnail_filename(image_path))
+        encode_image(thumbnail, thumbnail_path, encode)
+
+    return renditions, thumbnail_path
+
+
+def make_thumbnail_strip(thumbnails: Iterable[Path], output_path: Path,
+                         encode: Optional[EncodeOptions] = None, gap: int = 8) -> Path:
+    """Lay slide thumbnails out left to right in a single image."""
+    from PIL import Image
+    
+    images = [Image.open(path) for path in thumbnails]
+    try:
+        height = max(image.height for image in images)
+        width = sum(image.width for image in images) + gap * (len(images) - 1)
+        strip = Image.new('RGB', (width, height), (255, 255, 255))
+        x = 0
+        for image in images:
+            strip.paste(image.convert('RGB'), (x, 0))
+            x += image.width + gap
+    finally:
+        for image in images:
+            image.close()
+    encode_image(strip, output_path, encode or EncodeOptions())
+    return output_path
+
+
+def _resize(image: "Image.Image", width: int) -> "Image.Image":
+    from PIL import Image
+    
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.LANCZOS)
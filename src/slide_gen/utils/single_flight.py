@@ -0,0 +1,30 @@
+"""Coalesce concurrent work that shares a key."""
+
+import asyncio
+from typing import Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """Lets concurrent callers with the same key share one in-flight result.
+    
+    The first caller for a key leads: it does the work and settles the
+    returned future. Callers that join while it is in flight get the same
+    future back and simply wait for it. Once settled, the key is free again.
+    """
+    
+    def __init__(self):
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+    
+    def join(self, key: Hashable) -> Tuple[asyncio.Future, bool]:
+        """Return the future for ``key`` and whether the caller leads it."""
+        future = self._flights.get(key)
+        if future is not None:
+            return future, False
+        future = asyncio.get_running_loop().create_future()
+        self._flights[key] = future
+        future.add_done_callback(lambda done: self._release(key, done))
+        return future, True
+    
+    def _release(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._flights.get(key) is future:
+            del self._flights[key]
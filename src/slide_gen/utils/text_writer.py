@@ -0,0 +1,85 @@
+"""Buffered, atomic text file writers."""
+
+import asyncio
+import os
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, Optional, TextIO
+
+BUFFER_SIZE = 64 * 1024
+
+
+class AtomicWriter:
+    """A text file written under a temp name and renamed into place on commit.
+
+    Writes go through a buffered file, so a report is streamed to disk
+    piece by piece rather than built as one string, and readers only ever
+    see the previous file or the complete new one.
+    """
+
+    def __init__(self, path: Path, buffer_size: int = BUFFER_SIZE):
+        self.path = path
+        self.temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        self._file: Optional[TextIO] = open(self.temp_path, "w", encoding="utf-8", buffering=buffer_size)
+
+    def write(self, text: str) -> None:
+        self._file.write(text)
+
+    def writelines(self, lines: Iterable[str]) -> None:
+        self._file.writelines(lines)
+
+    def copy_from(self, path: Path) -> None:
+        """Append the contents of another text file."""
+        with open(path, "r", encoding="utf-8") as source:
+            shutil.copyfileobj(source, self._file, BUFFER_SIZE)
+
+    def close(self) -> None:
+        """Flush and close the temp file without putting it in place."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def commit(self) -> Path:
+        """Flush and rename the file into place."""
+        self.close()
+        os.replace(self.temp_path, self.path)
+        return self.path
+
+    def discard(self) -> None:
+        """Drop everything written, leaving any existing file untouched."""
+        self.close()
+        if self.temp_path.exists():
+            self.temp_path.unlink()
+
+    def __enter__(self) -> "AtomicWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+
+
+class BackgroundWriter:
+    """Runs blocking file calls on one worker thread, in submission order.
+
+    Lets code on the event loop hand off writes without waiting for them,
+    e.g. from a synchronous per-result callback.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slide-gen-writer")
+
+    def submit(self, func, *args) -> asyncio.Future:
+        """Queue ``func(*args)`` behind everything submitted before it."""
+        return asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def run(self, func, *args):
+        """Queue ``func(*args)`` and wait for its result."""
+        return await self.submit(func, *args)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,37 @@
+"""Parsing batched prompt replies."""
+
+from slide_gen.providers.base import PromptRequest, format_batch_prompt, parse_batch_prompts
+
+
+def test_parses_prompts_by_index():
+    text = '{"prompts": [{"index": 1, "prompt": " Dunes at dawn "}, {"index": 0, "prompt": "A bridge"}]}'
+    assert parse_batch_prompts(text, 2) == {0: "A bridge", 1: "Dunes at dawn"}
+
+
+def test_accepts_a_bare_list_in_a_code_fence():
+    text = '```json\n[{"index": 0, "prompt": "A bridge"}]\n```'
+    assert parse_batch_prompts(text, 1) == {0: "A bridge"}
+
+
+def test_skips_missing_and_malformed_entries():
+    text = """{"prompts": [
+        {"index": 0, "prompt": "A bridge"},
+        {"index": 1, "prompt": "   "},
+        {"index": 2},
+        {"index": "3", "prompt": "String index"},
+        {"index": 9, "prompt": "Out of range"},
+        "not an entry"
+    ]}"""
+    assert parse_batch_prompts(text, 5) == {0: "A bridge"}
+
+
+def test_unparseable_reply_yields_nothing():
+    assert parse_batch_prompts("Sure! Here are your prompts:", 3) == {}
+    assert parse_batch_prompts('{"prompts": "none"}', 3) == {}
+
+
+def test_batch_prompt_numbers_every_slide():
+    text = format_batch_prompt([PromptRequest(slide_title="Agenda"),
+                                PromptRequest(slide_title="Q&A", slide_content="questions")])
+    assert "0. Agenda" in text
+    assert "1. Q&A (context: questions)" in text
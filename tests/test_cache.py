@@ -0,0 +1,40 @@
+"""The on-disk generation cache."""
+
+import os
+import time
+
+from slide_gen.utils.cache import GenerationCache, cache_key
+
+
+def test_round_trips_prompts_and_images(tmp_path):
+    cache = GenerationCache(tmp_path)
+    key = cache_key(title="Agenda", model="mock")
+    assert cache.get_prompt(key) is None
+
+    cache.put_prompt(key, "A winding road")
+    cache.put_image(key, b"png bytes")
+
+    assert cache.get_prompt(key) == "A winding road"
+    assert cache.get_image(key) == b"png bytes"
+
+
+def test_refresh_ignores_existing_entries(tmp_path):
+    GenerationCache(tmp_path).put_prompt("k" * 64, "old")
+    assert GenerationCache(tmp_path, refresh=True).get_prompt("k" * 64) is None
+
+
+def test_evicts_least_recently_used_entries(tmp_path):
+    cache = GenerationCache(tmp_path, max_bytes=25)
+    cache.put_image("a" * 64, b"a" * 10)
+    cache.put_image("b" * 64, b"b" * 10)
+    now = time.time()
+    os.utime(cache._path("images", "a" * 64), (now - 100, now - 100))
+    os.utime(cache._path("images", "b" * 64), (now - 50, now - 50))
+
+    # Reading "a" makes "b" the least recently used
+    assert cache.get_image("a" * 64) is not None
+    cache.put_image("c" * 64, b"c" * 10)
+
+    assert cache.get_image("b" * 64) is None
+    assert cache.get_image("a" * 64) == b"a" * 10
+    assert cache.get_image("c" * 64) == b"c" * 10
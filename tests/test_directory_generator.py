@@ -0,0 +1,76 @@
+"""Incremental deck rebuilds: the manifest diff and garbage collection."""
+
+import json
+
+import pytest
+
+from slide_gen.processors import process_directory
+from slide_gen.processors.manifest import MANIFEST_FILE
+
+OVERRIDES = {"cache": False, "image_executor": "thread", "max_retries": 0}
+
+
+@pytest.fixture(autouse=True)
+def fast_mock(monkeypatch):
+    monkeypatch.setenv("MOCK_PROMPT_LATENCY", "0")
+    monkeypatch.setenv("MOCK_IMAGE_LATENCY", "0")
+    monkeypatch.setenv("MOCK_IMAGE_SIZE", "16x9")
+    monkeypatch.setenv("MOCK_ERROR_RATE", "0")
+
+
+@pytest.fixture
+def deck(tmp_path):
+    (tmp_path / "config.yaml").write_text("prompt_provider: mock\nimage_provider: mock\n")
+    return tmp_path
+
+
+def write_slides(deck, *titles):
+    (deck / "slides.md").write_text("".join(f"# {title}\n\n" for title in titles))
+
+
+def manifest_titles(deck):
+    data = json.loads((deck / MANIFEST_FILE).read_text())
+    return sorted(entry["title"] for entry in data["slides"])
+
+
+def modified(deck):
+    return {path.name: path.stat().st_mtime_ns for path in deck.glob("*.png")}
+
+
+async def test_unchanged_slides_are_reused(deck):
+    write_slides(deck, "Agenda", "Growth")
+    results = await process_directory(deck, OVERRIDES)
+    assert all(result.success for result in results)
+    before = modified(deck)
+
+    results = await process_directory(deck, OVERRIDES)
+
+    assert all(result.success for result in results)
+    assert modified(deck) == before
+    assert manifest_titles(deck) == ["Agenda", "Growth"]
+
+
+async def test_changed_and_removed_slides_are_collected(deck):
+    write_slides(deck, "Agenda", "Growth", "Q&A")
+    await process_directory(deck, OVERRIDES)
+    agenda = (deck / "Agenda.png").stat().st_mtime_ns
+
+    write_slides(deck, "Agenda", "Growth Plan")
+    await process_directory(deck, OVERRIDES)
+
+    assert sorted(modified(deck)) == ["Agenda.png", "Growth_Plan.png"]
+    assert (deck / "Agenda.png").stat().st_mtime_ns == agenda
+    assert manifest_titles(deck) == ["Agenda", "Growth Plan"]
+
+
+async def test_a_failed_slide_keeps_its_previous_image(deck, monkeypatch):
+    write_slides(deck, "Agenda", "Growth")
+    await process_directory(deck, OVERRIDES)
+    before = modified(deck)
+
+    monkeypatch.setenv("MOCK_ERROR_RATE", "1")
+    results = await process_directory(deck, dict(OVERRIDES, cache_refresh=True))
+
+    assert not any(result.success for result in results)
+    assert modified(deck) == before
+    assert manifest_titles(deck) == ["Agenda", "Growth"]
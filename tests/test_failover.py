@@ -0,0 +1,97 @@
+"""Failover chains and circuit breakers."""
+
+import socket
+
+from slide_gen.providers.base import AIResponse, PromptRequest
+from slide_gen.providers.failover import CircuitBreaker, FailoverProvider
+from slide_gen.providers.lmstudio_provider import LMStudioProvider
+from slide_gen.providers.mock_provider import MockProvider
+from slide_gen.providers.ollama_provider import OllamaProvider
+
+
+def closed_port() -> int:
+    """A local port nothing is listening on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def mock(**config) -> MockProvider:
+    return MockProvider(dict(prompt_latency=0, image_latency=0, image_size="8x8", **config))
+
+
+class RejectingProvider(MockProvider):
+    """Answers every prompt request with a 400."""
+
+    async def generate_prompt(self, request: PromptRequest) -> AIResponse:
+        self.calls = getattr(self, "calls", 0) + 1
+        return AIResponse(success=False, error="API error 400: content policy", status=400)
+
+
+async def test_unreachable_members_are_skipped_once_their_breakers_open():
+    ollama = OllamaProvider({"base_url": f"http://127.0.0.1:{closed_port()}"})
+    lmstudio = LMStudioProvider({"base_url": f"http://127.0.0.1:{closed_port()}/v1"})
+    chain = FailoverProvider([ollama, lmstudio, mock()], {"breaker_threshold": 2})
+
+    async with chain:
+        for _ in range(5):
+            response = await chain.generate_prompt(PromptRequest(slide_title="Growth"))
+            assert response.success
+            assert response.metadata["provider"] == "MockProvider"
+
+    assert [breaker.state for breaker in chain.breakers[:2]] == [CircuitBreaker.OPEN] * 2
+    assert chain.breakers[2].state == CircuitBreaker.CLOSED
+
+
+async def test_rejected_requests_do_not_open_the_breaker():
+    primary = RejectingProvider({"prompt_latency": 0})
+    chain = FailoverProvider([primary, mock()], {"breaker_threshold": 2})
+
+    for _ in range(5):
+        assert (await chain.generate_prompt(PromptRequest(slide_title="Growth"))).success
+
+    assert primary.calls == 5
+    assert chain.breakers[0].state == CircuitBreaker.CLOSED
+
+
+def test_chain_follows_the_active_member():
+    primary = OllamaProvider({"num_parallel": 2})
+    fallback = mock()
+    chain = FailoverProvider([primary, fallback])
+    assert chain.parallel_slots() == 2
+    assert not chain.supports_batch_prompts()
+
+    chain.breakers[0].trip()
+    assert chain.parallel_slots() is None
+    assert chain.supports_batch_prompts()
+    assert chain.max_images_per_request() == fallback.max_images_per_request()
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_half_open_breaker_lets_one_probe_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    # A failed probe opens it again, a successful one closes it
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
@@ -0,0 +1,93 @@
+"""Retries, backoff and the shared retry budget."""
+
+import time
+
+from slide_gen.providers.base import AIResponse
+from slide_gen.providers.retry import RetryBudget, RetryPolicy, retry_call
+
+FAST = RetryPolicy(max_retries=3, base_delay=0.001, max_delay=0.01)
+
+
+def responses(*sequence: AIResponse):
+    """A call returning the given responses in order, counting how often it ran."""
+    remaining = list(sequence)
+
+    async def call() -> AIResponse:
+        call.count += 1
+        return remaining.pop(0)
+
+    call.count = 0
+    return call
+
+
+def throttled(retry_after=None) -> AIResponse:
+    return AIResponse(success=False, error="API error 429", status=429, retryable=True,
+                      retry_after=retry_after)
+
+
+async def test_retries_transient_failures_until_success():
+    call = responses(throttled(), throttled(), AIResponse(success=True, content="prompt"))
+
+    response = await retry_call(call, FAST)
+
+    assert response.success
+    assert call.count == 3
+    assert response.metadata["attempts"] == 3
+    assert response.metadata["backoff_seconds"] > 0
+
+
+async def test_does_not_retry_fatal_failures():
+    call = responses(AIResponse(success=False, error="API error 400", status=400))
+
+    response = await retry_call(call, FAST)
+
+    assert not response.success
+    assert call.count == 1
+    assert response.metadata["attempts"] == 1
+
+
+async def test_gives_up_after_max_retries():
+    call = responses(*[throttled() for _ in range(10)])
+
+    response = await retry_call(call, FAST)
+
+    assert not response.success
+    assert call.count == FAST.max_retries + 1
+
+
+async def test_retry_after_is_capped_by_max_delay():
+    call = responses(throttled(retry_after=60), AIResponse(success=True))
+
+    started = time.monotonic()
+    await retry_call(call, FAST)
+
+    assert time.monotonic() - started < 1
+
+
+async def test_exhausted_budget_stops_retries():
+    budget = RetryBudget(max_retries=2)
+    first = responses(throttled(), throttled(), throttled(), AIResponse(success=True))
+    second = responses(throttled(), AIResponse(success=True))
+
+    assert not (await retry_call(first, FAST, budget)).success
+    assert first.count == 3
+    assert not (await retry_call(second, FAST, budget)).success
+    assert second.count == 1
+    assert budget.used == 2
+
+
+def test_budget_without_window_never_refills():
+    budget = RetryBudget(max_retries=1)
+    assert budget.try_spend()
+    time.sleep(0.02)
+    assert not budget.try_spend()
+
+
+def test_windowed_budget_refills_over_time():
+    budget = RetryBudget(max_retries=2, window=1.0)
+    assert budget.try_spend() and budget.try_spend()
+    assert not budget.try_spend()
+
+    time.sleep(0.6)  # a little over one retry's worth
+    assert budget.try_spend()
+    assert not budget.try_spend()
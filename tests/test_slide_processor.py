@@ -0,0 +1,78 @@
+"""Parsing slide titles from files."""
+
+import re
+from pathlib import Path
+
+import pytest
+
+from slide_gen.processors import SlideInfo, extract_slides_from_md, iter_slides, process_file, stream_slides
+
+EXAMPLES = sorted(Path(__file__).resolve().parent.parent.glob("examples/*/slides.md"))
+
+
+def regex_slides(path: Path):
+    """The whole-file regex parser iter_slides replaced."""
+    content = path.read_text(encoding="utf-8")
+    if path.suffix.lower() == ".md":
+        titles = [title.strip() for title in re.findall(r"^#+\s+(.+)$", content, re.MULTILINE)]
+    else:
+        titles = [line.strip() for line in content.split("\n") if line.strip()]
+    return [SlideInfo(title=title, index=i) for i, title in enumerate(titles)]
+
+
+MARKDOWN = """# Welcome
+
+Intro text with a # that is not a header.
+
+## Agenda ##
+### Deep   Dive  
+#NoSpace
+- bullet
+
+# Q&A
+"""
+
+
+@pytest.fixture(params=["deck.md", "titles.txt"])
+def slides_file(request, tmp_path):
+    path = tmp_path / request.param
+    if path.suffix == ".md":
+        path.write_text(MARKDOWN, encoding="utf-8")
+    else:
+        path.write_text("Agenda\n\n  Growth  \r\nQ&A", encoding="utf-8")
+    return path
+
+
+def test_matches_the_regex_parser(slides_file):
+    assert list(iter_slides(slides_file)) == regex_slides(slides_file)
+    assert process_file(slides_file) == regex_slides(slides_file)
+
+
+@pytest.mark.parametrize("path", EXAMPLES, ids=lambda path: path.parent.name)
+def test_matches_the_regex_parser_on_example_decks(path):
+    assert extract_slides_from_md(path.parent) == regex_slides(path)
+
+
+async def test_stream_slides_yields_the_same_slides(slides_file):
+    streamed = [slide async for slide in stream_slides(slides_file, batch_size=2)]
+    assert streamed == list(iter_slides(slides_file))
+
+
+async def test_stream_slides_can_stop_early(tmp_path):
+    path = tmp_path / "big.txt"
+    path.write_text("\n".join(f"Slide {i}" for i in range(10000)), encoding="utf-8")
+
+    stream = stream_slides(path, batch_size=10)
+    first = []
+    async for slide in stream:
+        first.append(slide.title)
+        if len(first) == 3:
+            break
+    await stream.aclose()
+
+    assert first == ["Slide 0", "Slide 1", "Slide 2"]
+
+
+async def test_missing_file_is_reported():
+    with pytest.raises(FileNotFoundError):
+        [slide async for slide in stream_slides(Path("no-such-slides.md"))]
@@ -0,0 +1,59 @@
+"""Decoding base64 image payloads from a streamed JSON body."""
+
+import base64
+import random
+
+import pytest
+
+from slide_gen.providers.streaming import Base64FieldWriter
+
+
+def images(count: int):
+    rng = random.Random(7)
+    # 0xff-heavy bytes make plenty of "/" in the base64, which JSON may escape
+    return [bytes(rng.choice([0xff, 0xfb, rng.randrange(256)]) for _ in range(3001 + i)) for i in range(count)]
+
+
+def body(payloads, wrap: int = 76) -> bytes:
+    """An images API reply with escaped slashes and wrapped base64 lines."""
+    entries = []
+    for payload in payloads:
+        encoded = base64.b64encode(payload).decode()
+        wrapped = "\\n".join(encoded[i:i + wrap] for i in range(0, len(encoded), wrap))
+        entries.append('{"revised_prompt": "b64_json", "b64_json": "%s"}' % wrapped.replace("/", "\\/"))
+    return ('{"created": 1, "data": [%s]}' % ", ".join(entries)).encode()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7, 64, 4096])
+def test_decodes_every_value_across_chunk_boundaries(tmp_path, chunk_size):
+    payloads = images(2)
+    data = body(payloads)
+    writer = Base64FieldWriter("b64_json", tmp_path)
+
+    for start in range(0, len(data), chunk_size):
+        writer.feed(data[start:start + chunk_size])
+    paths = writer.finish()
+
+    assert [path.read_bytes() for path in paths] == payloads
+
+
+def test_escape_split_after_backslash(tmp_path):
+    payload = b"\xff" * 300
+    data = body([payload])
+    split = data.index(b"\\/") + 1  # between the backslash and the slash
+    writer = Base64FieldWriter("b64_json", tmp_path)
+
+    writer.feed(data[:split])
+    writer.feed(data[split:])
+
+    assert [path.read_bytes() for path in writer.finish()] == [payload]
+
+
+def test_truncated_body_is_an_error_and_leaves_no_files(tmp_path):
+    data = body(images(1))
+    writer = Base64FieldWriter("b64_json", tmp_path)
+    writer.feed(data[:len(data) // 2])
+
+    with pytest.raises(ValueError):
+        writer.finish()
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,37 @@
+"""Span queueing and metric export."""
+
+import asyncio
+
+from slide_gen.telemetry import Telemetry
+
+
+class CollectingExporter:
+    def __init__(self):
+        self.spans = []
+
+    async def export(self, spans):
+        self.spans.extend(spans)
+
+
+def test_dropped_spans_are_exported_as_a_metric():
+    # Without a running loop nothing can flush early, so the queue overflows
+    telemetry = Telemetry([CollectingExporter()], max_queued_spans=4)
+    for _ in range(10):
+        with telemetry.span("slide"):
+            pass
+
+    assert telemetry.dropped_spans == 6
+    assert "slide_gen_telemetry_dropped_spans_total 6" in telemetry.metrics.prometheus_text()
+
+
+async def test_a_half_full_queue_is_flushed_early():
+    exporter = CollectingExporter()
+    telemetry = Telemetry([exporter], max_queued_spans=4)
+    for _ in range(10):
+        with telemetry.span("slide"):
+            pass
+        await asyncio.sleep(0)  # let the early flush run
+    await telemetry.close()
+
+    assert len(exporter.spans) == 10
+    assert telemetry.dropped_spans == 0
@@ -0,0 +1,47 @@
+"""Loading local models before the first request."""
+
+import asyncio
+
+from aiohttp import web
+
+from slide_gen.providers.mock_provider import MockProvider
+from slide_gen.providers.ollama_provider import OllamaProvider
+
+
+async def test_concurrent_callers_share_one_load():
+    loads = []
+
+    async def generate(request: web.Request) -> web.Response:
+        loads.append(await request.json())
+        await asyncio.sleep(0.05)
+        return web.json_response({"done": True})
+
+    app = web.Application()
+    app.add_routes([web.post("/api/generate", generate)])
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        async with OllamaProvider({"base_url": f"http://127.0.0.1:{port}", "model": "llama3.2"}) as provider:
+            outcomes = await asyncio.gather(*(provider.warm_up() for _ in range(5)))
+    finally:
+        await runner.cleanup()
+
+    assert len(loads) == 1
+    assert loads[0]["model"] == "llama3.2"
+    assert all(outcome is outcomes[0] for outcome in outcomes)
+    assert outcomes[0].error is None
+    assert str(outcomes[0]).startswith("Warm-up: llama3.2 ready in")
+
+
+async def test_failed_load_is_reported_not_raised():
+    async with OllamaProvider({"base_url": "http://127.0.0.1:9", "model": "llama3.2"}) as provider:
+        outcome = await provider.warm_up()
+    assert outcome.error
+    assert str(outcome).startswith("Warm-up: could not load llama3.2")
+
+
+async def test_hosted_providers_have_nothing_to_load():
+    assert await MockProvider({}).warm_up() is None